@@ -1,6 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from unfold.admin import ModelAdmin
-from .models import Competencia, Planificacion, Curso, Clase, PeriodoAcademico, Grado, Cargo, Pago
+from portal import boletas
+from .models import Competencia, Planificacion, Curso, Clase, PeriodoAcademico, Grado, Cargo, Pago, CategoriaCalificacion
 
 @admin.register(Competencia)
 class CompetenciaAdmin(ModelAdmin):
@@ -14,17 +15,48 @@ class PlanificacionAdmin(ModelAdmin):
 class CursoAdmin(ModelAdmin):
     pass
 
+@admin.register(CategoriaCalificacion)
+class CategoriaCalificacionAdmin(ModelAdmin):
+    list_display = ('nombre', 'curso', 'peso')
+    list_filter = ('curso',)
+
 @admin.register(Clase)
 class ClaseAdmin(ModelAdmin):
     pass
 
+def _generar_boletas(modeladmin, request, grupos):
+    """
+    Lanza en segundo plano la generación de las boletas de cada
+    ``(periodo, grado)``: generar un grado completo no cabe en una petición.
+    """
+    for periodo, grado in grupos:
+        nombre = grado.nombre if grado else periodo.nombre
+        try:
+            boletas.generar_en_segundo_plano(periodo, grado=grado)
+        except (boletas.GeneracionNoDisponible, OSError) as error:
+            modeladmin.message_user(request, str(error), messages.ERROR)
+            return
+        modeladmin.message_user(
+            request,
+            f"{nombre}: generación de boletas iniciada; aparecerán en Boletas Generadas a medida que terminen.",
+            messages.SUCCESS,
+        )
+
 @admin.register(PeriodoAcademico)
 class PeriodoAcademicoAdmin(ModelAdmin):
-    pass
+    actions = ['generar_boletas']
+
+    @admin.action(description="Generar boletas en PDF")
+    def generar_boletas(self, request, queryset):
+        _generar_boletas(self, request, [(periodo, None) for periodo in queryset])
 
 @admin.register(Grado)
 class GradoAdmin(ModelAdmin):
-    pass
+    actions = ['generar_boletas']
+
+    @admin.action(description="Generar boletas en PDF")
+    def generar_boletas(self, request, queryset):
+        _generar_boletas(self, request, [(grado.periodo, grado) for grado in queryset.select_related('periodo')])
 
 @admin.register(Cargo)
 class CargoAdmin(ModelAdmin):
@@ -1,5 +1,7 @@
 from django.db import models
 from django.db.models import Sum
+from django.core.exceptions import ValidationError
+from decimal import Decimal
 import datetime
 from django.utils import timezone
 from django.conf import settings
@@ -82,6 +84,7 @@ class Clase(models.Model):
         blank=True, # Una clase puede empezar sin estudiantes
         related_name='clases_inscritas'
     )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Clase"
@@ -92,6 +95,35 @@ class Clase(models.Model):
     def __str__(self):
         return f"{self.curso.nombre} ({self.get_dia_semana_display()} {self.hora_inicio:%H:%M} - {self.hora_fin:%H:%M})"
 
+class CategoriaCalificacion(models.Model):
+    """
+    Categoría del esquema de ponderación de un curso, p. ej. "Exámenes" con
+    40 % de la nota final. Las actividades sin categoría pesan lo que falte
+    para llegar a 100.
+    """
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='categorias_calificacion')
+    nombre = models.CharField(max_length=100, verbose_name="Nombre de la Categoría")
+    peso = models.DecimalField(max_digits=5, decimal_places=2, verbose_name="Peso (%)")
+
+    class Meta:
+        verbose_name = "Categoría de Calificación"
+        verbose_name_plural = "Categorías de Calificación"
+        unique_together = ('curso', 'nombre')
+        ordering = ['curso', '-peso', 'nombre']
+
+    def __str__(self):
+        return f"{self.nombre} ({self.peso}%) - {self.curso.nombre}"
+
+    def clean(self):
+        if self.peso is None or not self.curso_id:
+            return
+        if self.peso <= 0:
+            raise ValidationError({'peso': "El peso debe ser mayor que cero."})
+        otras = CategoriaCalificacion.objects.filter(curso_id=self.curso_id).exclude(pk=self.pk)
+        total = (otras.aggregate(total=Sum('peso'))['total'] or Decimal(0)) + self.peso
+        if total > 100:
+            raise ValidationError({'peso': f"Los pesos del curso sumarían {total}%, el máximo es 100%."})
+
 class Actividad(models.Model):
     """
     Representa una tarea, proyecto o cualquier actividad asignada por un maestro
@@ -110,6 +142,25 @@ class Actividad(models.Model):
     )
     fecha_inicio_calculo = models.DateTimeField(null=True, blank=True, verbose_name="Inicio del llenado")
     fecha_fin_calculo = models.DateTimeField(null=True, blank=True, verbose_name="Fin del llenado")
+    categoria = models.ForeignKey(
+        CategoriaCalificacion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='actividades',
+        verbose_name="Categoría"
+    )
+    peso = models.DecimalField(
+        max_digits=5, decimal_places=2, default=1,
+        verbose_name="Peso dentro de la categoría"
+    )
+    competencias = models.ManyToManyField(
+        'Competencia',
+        blank=True,
+        related_name='actividades',
+        verbose_name="Competencias Evaluadas"
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Actividad"
@@ -130,6 +181,7 @@ class Entrega(models.Model):
     comentarios = models.TextField(blank=True, verbose_name="Comentarios del Estudiante")
     calificacion = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     comentarios_maestro = models.TextField(blank=True, verbose_name="Comentarios del Maestro")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Entrega"
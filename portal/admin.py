@@ -1,6 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from unfold.admin import ModelAdmin
-from .models import Noticia, Notificacion
+from .models import Noticia, Notificacion, ResumenKpiCurso, NotaFinal, PosicionRanking, ResumenAcademico, BoletaGenerada, DominioCompetencia, AsistenciaMensual, LoteSincronizacion, DispositivoKiosco
+from . import kiosco, notificaciones
 
 @admin.register(Noticia)
 class NoticiaAdmin(ModelAdmin):
@@ -30,11 +31,74 @@ class NoticiaAdmin(ModelAdmin):
 
 @admin.register(Notificacion)
 class NotificacionAdmin(ModelAdmin):
-    list_display = ('mensaje', 'audiencia', 'autor', 'fecha_envio')
+    list_display = ('mensaje', 'audiencia', 'grado', 'clase', 'autor', 'fecha_envio', 'fecha_distribucion')
     list_filter = ('audiencia', 'fecha_envio')
     exclude = ('autor',)
+    readonly_fields = ('fecha_distribucion',)
 
     def save_model(self, request, obj, form, change):
         if not obj.pk:
             obj.autor = request.user
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+            notificaciones.enviar(obj)
+        else:
+            super().save_model(request, obj, form, change)
+
+@admin.register(ResumenKpiCurso)
+class ResumenKpiCursoAdmin(ModelAdmin):
+    list_display = ('curso', 'maestro', 'periodo', 'total_entregas', 'total_asistencias', 'fecha_actualizacion')
+    list_filter = ('periodo',)
+    readonly_fields = ('fecha_actualizacion',)
+
+@admin.register(NotaFinal)
+class NotaFinalAdmin(ModelAdmin):
+    list_display = ('estudiante', 'curso', 'periodo', 'nota', 'fecha_actualizacion')
+    list_filter = ('periodo', 'curso')
+    readonly_fields = ('acumulados', 'nota', 'fecha_actualizacion')
+
+@admin.register(PosicionRanking)
+class PosicionRankingAdmin(ModelAdmin):
+    list_display = ('estudiante', 'ambito', 'grado', 'curso', 'periodo', 'posicion', 'total', 'percentil')
+    list_filter = ('periodo', 'ambito', 'grado')
+    readonly_fields = ('fecha_actualizacion',)
+
+@admin.register(ResumenAcademico)
+class ResumenAcademicoAdmin(ModelAdmin):
+    list_display = ('estudiante', 'periodo', 'creditos', 'promedio', 'promedio_acumulado', 'fecha_actualizacion')
+    list_filter = ('periodo',)
+    readonly_fields = ('fecha_actualizacion',)
+
+@admin.register(BoletaGenerada)
+class BoletaGeneradaAdmin(ModelAdmin):
+    list_display = ('estudiante', 'periodo', 'archivo', 'fecha_generacion')
+    list_filter = ('periodo',)
+    readonly_fields = ('huella', 'fecha_generacion')
+
+@admin.register(DominioCompetencia)
+class DominioCompetenciaAdmin(ModelAdmin):
+    list_display = ('estudiante', 'competencia', 'periodo', 'nivel', 'evaluaciones', 'fecha_actualizacion')
+    list_filter = ('periodo',)
+    readonly_fields = ('suma', 'pesos', 'evaluaciones', 'nivel', 'fecha_actualizacion')
+
+@admin.register(AsistenciaMensual)
+class AsistenciaMensualAdmin(ModelAdmin):
+    list_display = ('estudiante', 'clase', 'mes', 'estados')
+    list_filter = ('mes',)
+    readonly_fields = ('estados',)
+
+@admin.register(LoteSincronizacion)
+class LoteSincronizacionAdmin(ModelAdmin):
+    list_display = ('clave', 'maestro', 'fecha_creacion')
+    search_fields = ('clave',)
+    readonly_fields = ('respuesta', 'fecha_creacion')
+
+@admin.register(DispositivoKiosco)
+class DispositivoKioscoAdmin(ModelAdmin):
+    list_display = ('nombre', 'activo', 'tolerancia_minutos', 'fecha_creacion')
+    list_filter = ('activo',)
+    readonly_fields = ('huella_token', 'fecha_creacion')
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            token, obj.huella_token = kiosco.generar_token()
+            messages.warning(request, f"Token del kiosco \"{obj.nombre}\" (se muestra una sola vez): {token}")
+        super().save_model(request, obj, form, change)
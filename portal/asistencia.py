@@ -0,0 +1,146 @@
+"""
+Hojas de asistencia: una clase en una fecha, o todas las clases del maestro
+en un día.
+
+Las hojas se llenan con una consulta de inscritos y otra de
+``(clase_id, estudiante_id, estado)``, sin importar cuántas clases sean, y
+se guardan con un único ``bulk_create(update_conflicts=True)`` sobre la
+llave única (clase, estudiante, fecha), validando contra los inscritos
+leídos una vez. Como las escrituras masivas no disparan señales, la
+diferencia en el resumen de KPIs se aplica con una actualización por clase
+y las filas mensuales (portal/asistencia_mensual.py) se actualizan en lote.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from academico.models import Clase, AsistenciaClase
+from . import asistencia_mensual, kpi
+
+
+DIAS_SEMANA = ['LUN', 'MAR', 'MIE', 'JUE', 'VIE', 'SAB']
+
+
+def estados_del_dia(clase, fecha):
+    """``{estudiante_id: estado}`` de la asistencia ya tomada."""
+    return dict(
+        AsistenciaClase.objects.filter(clase=clase, fecha=fecha).values_list('estudiante_id', 'estado')
+    )
+
+
+def clases_del_dia(maestro, fecha):
+    """Clases del maestro que se dictan en el día de la semana de ``fecha``, dentro de su periodo."""
+    dia = fecha.weekday()
+    if dia >= len(DIAS_SEMANA):
+        return []
+    return list(Clase.objects.filter(
+        maestro=maestro,
+        dia_semana=DIAS_SEMANA[dia],
+        periodo__fecha_inicio__lte=fecha,
+        periodo__fecha_fin__gte=fecha,
+    ).select_related('curso').order_by('hora_inicio'))
+
+
+def hoja_del_dia(clases, fecha):
+    """
+    ``{clase_id: [(estudiante_id, nombre, estado)]}`` con los inscritos de
+    cada clase y el estado ya tomado (``None`` si aún no hay registro).
+    """
+    clase_ids = [clase.pk for clase in clases]
+    estados = {
+        (clase_id, estudiante_id): estado
+        for clase_id, estudiante_id, estado in AsistenciaClase.objects.filter(
+            clase_id__in=clase_ids, fecha=fecha
+        ).values_list('clase_id', 'estudiante_id', 'estado')
+    }
+    hoja = {clase_id: [] for clase_id in clase_ids}
+    for clase_id, estudiante_id, nombre, apellido in Clase.estudiantes.through.objects.filter(
+        clase_id__in=clase_ids
+    ).order_by('estudiante__user__last_name', 'estudiante__user__first_name').values_list(
+        'clase_id', 'estudiante_id', 'estudiante__user__first_name', 'estudiante__user__last_name'
+    ):
+        hoja[clase_id].append((estudiante_id, f"{nombre} {apellido}", estados.get((clase_id, estudiante_id))))
+    return hoja
+
+
+def _aporte_kpi(clase, estados):
+    presentes = sum(1 for estado in estados if estado == AsistenciaClase.EstadoAsistencia.PRESENTE)
+    return (clase.maestro_id, clase.periodo_id, clase.curso_id), {
+        'total_asistencias': len(estados), 'total_presentes': presentes,
+    }
+
+
+def guardar_registros(clases, registros, sobrescribir=True):
+    """
+    Inserta o actualiza en una transacción registros de asistencia de
+    ``clases`` a partir de ``{(clase_id, estudiante_id, fecha): estado}``
+    (pueden ser de varias fechas). Los estudiantes no inscritos en la clase
+    se ignoran, y con ``sobrescribir=False`` también los registros que ya
+    existen. Devuelve el conjunto de llaves guardadas.
+    """
+    clases = {clase.pk: clase for clase in clases}
+    inscritos = set(
+        Clase.estudiantes.through.objects.filter(
+            clase_id__in={clase_id for clase_id, _, _ in registros if clase_id in clases}
+        ).values_list('clase_id', 'estudiante_id')
+    )
+    filas = {
+        clave: estado for clave, estado in registros.items()
+        if clave[0] in clases and clave[:2] in inscritos
+    }
+    if not filas:
+        return set()
+
+    opciones = {}
+    if connection.features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = ['clase', 'estudiante', 'fecha']
+
+    with transaction.atomic():
+        anteriores = defaultdict(list)
+        for clase_id, estudiante_id, fecha, estado in AsistenciaClase.objects.select_for_update().filter(
+            clase_id__in={clave[0] for clave in filas},
+            estudiante_id__in={clave[1] for clave in filas},
+            fecha__in={clave[2] for clave in filas},
+        ).values_list('clase_id', 'estudiante_id', 'fecha', 'estado'):
+            if (clase_id, estudiante_id, fecha) not in filas:
+                continue
+            if sobrescribir:
+                anteriores[clase_id].append(estado)
+            else:
+                del filas[(clase_id, estudiante_id, fecha)]
+        if not filas:
+            return set()
+
+        AsistenciaClase.objects.bulk_create([
+            AsistenciaClase(clase_id=clase_id, estudiante_id=estudiante_id, fecha=fecha, estado=estado)
+            for (clase_id, estudiante_id, fecha), estado in filas.items()
+        ], update_conflicts=True, update_fields=['estado'], **opciones)
+        asistencia_mensual.registrar({
+            (estudiante_id, clase_id, fecha): estado for (clase_id, estudiante_id, fecha), estado in filas.items()
+        })
+
+        actuales = defaultdict(list)
+        for (clase_id, _, _), estado in filas.items():
+            actuales[clase_id].append(estado)
+        for clase_id, estados in actuales.items():
+            clase = clases[clase_id]
+            if clase.maestro_id:
+                kpi.aplicar_cambio(_aporte_kpi(clase, anteriores[clase_id]), _aporte_kpi(clase, estados))
+    return set(filas)
+
+
+def guardar_asistencias_por_clase(clases, fecha, estados_por_clase):
+    """
+    Hoja de varias clases en ``fecha``: ``estados_por_clase`` es
+    ``{clase_id: {estudiante_id: estado}}``. Devuelve el número de registros guardados.
+    """
+    return len(guardar_registros(clases, {
+        (clase_id, estudiante_id, fecha): estado
+        for clase_id, estados in estados_por_clase.items()
+        for estudiante_id, estado in estados.items()
+    }))
+
+
+def guardar_asistencias(clase, fecha, estados):
+    """Hoja de una sola clase: ``estados`` es ``{estudiante_id: estado}``."""
+    return guardar_asistencias_por_clase([clase], fecha, {clase.pk: estados})
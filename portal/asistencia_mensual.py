@@ -0,0 +1,139 @@
+"""
+Asistencia compacta por (estudiante, clase, mes) (AsistenciaMensual).
+
+Cada fila guarda un carácter por día del mes, así el calendario de un
+periodo completo se arma con unas pocas filas pequeñas en lugar de recorrer
+todos los registros de AsistenciaClase. Las filas se actualizan desde
+``portal.signals`` y desde las escrituras masivas de ``portal.asistencia``.
+"""
+import calendar
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.db import transaction
+
+from academico.models import AsistenciaClase
+from .models import AsistenciaMensual
+
+
+SIN_REGISTRO = '-'
+DIAS = 31
+Estado = AsistenciaClase.EstadoAsistencia
+# En el calendario de varias clases, cada día muestra el estado más grave
+GRAVEDAD = {Estado.AUSENTE: 4, Estado.TARDANZA: 3, Estado.JUSTIFICADO: 2, Estado.PRESENTE: 1}
+
+
+def _mes(fecha):
+    return fecha.replace(day=1)
+
+
+def _marcar(estados, dia, estado):
+    dias = list(estados.ljust(DIAS, SIN_REGISTRO))
+    dias[dia - 1] = estado or SIN_REGISTRO
+    return ''.join(dias).rstrip(SIN_REGISTRO)
+
+
+def registrar(cambios):
+    """
+    Aplica ``{(estudiante_id, clase_id, fecha): estado}`` a las filas
+    mensuales (``estado=None`` borra el día) con una lectura y una escritura
+    por tipo de operación.
+    """
+    if not cambios:
+        return
+    por_fila = defaultdict(dict)
+    for (estudiante_id, clase_id, fecha), estado in cambios.items():
+        por_fila[(estudiante_id, clase_id, _mes(fecha))][fecha.day] = estado
+
+    with transaction.atomic():
+        existentes = {
+            (fila.estudiante_id, fila.clase_id, fila.mes): fila
+            for fila in AsistenciaMensual.objects.select_for_update().filter(
+                estudiante_id__in={clave[0] for clave in por_fila},
+                clase_id__in={clave[1] for clave in por_fila},
+                mes__in={clave[2] for clave in por_fila},
+            )
+        }
+        nuevas, modificadas, vacias = [], [], []
+        for clave, dias in por_fila.items():
+            fila = existentes.get(clave)
+            if fila is None:
+                fila = AsistenciaMensual(estudiante_id=clave[0], clase_id=clave[1], mes=clave[2])
+            for dia, estado in dias.items():
+                fila.estados = _marcar(fila.estados, dia, estado)
+            if fila.pk is None:
+                if fila.estados:
+                    nuevas.append(fila)
+            elif fila.estados:
+                modificadas.append(fila)
+            else:
+                vacias.append(fila.pk)
+
+        AsistenciaMensual.objects.bulk_create(nuevas)
+        AsistenciaMensual.objects.bulk_update(modificadas, ['estados'])
+        if vacias:
+            AsistenciaMensual.objects.filter(pk__in=vacias).delete()
+
+
+def reconstruir(clase_ids=None):
+    """Reconstruye desde AsistenciaClase las filas mensuales (de todas o de algunas clases)."""
+    asistencias = AsistenciaClase.objects.all()
+    filas = AsistenciaMensual.objects.all()
+    if clase_ids is not None:
+        clase_ids = list(clase_ids)
+        asistencias = asistencias.filter(clase_id__in=clase_ids)
+        filas = filas.filter(clase_id__in=clase_ids)
+
+    estados = defaultdict(str)
+    for estudiante_id, clase_id, fecha, estado in asistencias.values_list(
+        'estudiante_id', 'clase_id', 'fecha', 'estado'
+    ).order_by().iterator(chunk_size=5000):
+        clave = (estudiante_id, clase_id, _mes(fecha))
+        estados[clave] = _marcar(estados[clave], fecha.day, estado)
+
+    with transaction.atomic():
+        filas.delete()
+        AsistenciaMensual.objects.bulk_create([
+            AsistenciaMensual(estudiante_id=estudiante_id, clase_id=clase_id, mes=mes, estados=dias)
+            for (estudiante_id, clase_id, mes), dias in estados.items()
+        ], batch_size=1000)
+    return len(estados)
+
+
+def calendario(estudiante, desde, hasta, clase_ids=None):
+    """
+    Meses de ``desde`` a ``hasta`` con el estado de cada día (el más grave
+    entre las clases) y el total de registros por estado.
+    """
+    filas = AsistenciaMensual.objects.filter(estudiante=estudiante, mes__gte=_mes(desde), mes__lte=hasta)
+    if clase_ids is not None:
+        filas = filas.filter(clase_id__in=clase_ids)
+
+    por_mes = defaultdict(dict)
+    totales = Counter()
+    for mes, estados in filas.values_list('mes', 'estados'):
+        dias = por_mes[mes]
+        for dia, estado in enumerate(estados, start=1):
+            if estado == SIN_REGISTRO:
+                continue
+            totales[estado] += 1
+            if GRAVEDAD.get(estado, 0) > GRAVEDAD.get(dias.get(dia), 0):
+                dias[dia] = estado
+
+    etiquetas = dict(Estado.choices)
+    meses = []
+    mes = _mes(desde)
+    while mes <= hasta:
+        dias = por_mes.get(mes, {})
+        meses.append({
+            'mes': mes,
+            'semanas': [
+                [
+                    {'dia': dia, 'estado': dias.get(dia), 'etiqueta': etiquetas.get(dias.get(dia))} if dia else None
+                    for dia in semana
+                ]
+                for semana in calendar.monthcalendar(mes.year, mes.month)
+            ],
+        })
+        mes = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+    return meses, [(etiquetas[codigo], totales[codigo]) for codigo in Estado.values]
@@ -0,0 +1,188 @@
+"""
+Generación masiva de boletas en PDF (BoletaGenerada).
+
+Los datos de todas las boletas de un periodo (o de un grado) se leen por
+adelantado con unas pocas consultas: estudiantes, notas finales, ranking y
+resumen académico. Cada boleta queda como un diccionario de cadenas, del que
+sale su huella (SHA-256); las que no cambiaron desde su último PDF se
+omiten. El HTML y el PDF (WeasyPrint) se generan en procesos aparte, sin
+acceso a la base de datos, y cada PDF terminado se guarda y registra de
+inmediato: si la generación se interrumpe, al repetirla solo se procesan las
+boletas que faltaron.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.template.loader import render_to_string
+
+from users.models import Estudiante
+from .models import BoletaGenerada, NotaFinal, PosicionRanking, ResumenAcademico
+
+try:
+    from weasyprint import HTML
+    WEASYPRINT_AVAILABLE = True
+except (ImportError, OSError):
+    WEASYPRINT_AVAILABLE = False
+    HTML = None
+
+
+TEMPLATE = 'portal/boleta_pdf.html'
+
+
+class GeneracionNoDisponible(Exception):
+    """WeasyPrint no está instalado (o le faltan librerías del sistema)."""
+
+
+@dataclass
+class ResultadoGeneracion:
+    generadas: int = 0
+    omitidas: int = 0
+    errores: list = field(default_factory=list)
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor)
+
+
+def datos_boletas(periodo, grado=None):
+    """``{estudiante_id: datos}`` de las boletas del periodo (o solo del grado)."""
+    estudiantes = Estudiante.objects.filter(grado=grado) if grado else Estudiante.objects.filter(
+        notas_finales__periodo=periodo
+    ).distinct()
+    datos = {
+        pk: {
+            'nombre': f"{nombre} {apellido}".strip(), 'matricula': matricula, 'grado': _texto(nombre_grado),
+            'periodo': periodo.nombre, 'notas': [],
+            'promedio': '', 'promedio_acumulado': '', 'posicion_grado': '', 'total_grado': '',
+        }
+        for pk, nombre, apellido, matricula, nombre_grado in estudiantes.order_by('matricula').values_list(
+            'pk', 'user__first_name', 'user__last_name', 'matricula', 'grado__nombre'
+        )
+    }
+    if not datos:
+        return datos
+
+    posiciones = defaultdict(dict)
+    for fila in PosicionRanking.objects.filter(periodo=periodo, estudiante_id__in=datos).values(
+        'estudiante_id', 'ambito', 'curso_id', 'posicion', 'total'
+    ):
+        if fila['ambito'] == PosicionRanking.Ambito.GRADO:
+            datos[fila['estudiante_id']].update(posicion_grado=str(fila['posicion']), total_grado=str(fila['total']))
+        else:
+            posiciones[fila['estudiante_id']][fila['curso_id']] = fila
+
+    for estudiante_id, curso_id, curso, nota in NotaFinal.objects.filter(
+        periodo=periodo, estudiante_id__in=datos, nota__isnull=False
+    ).order_by('curso__nombre').values_list('estudiante_id', 'curso_id', 'curso__nombre', 'nota'):
+        posicion = posiciones[estudiante_id].get(curso_id, {})
+        datos[estudiante_id]['notas'].append({
+            'curso': curso, 'nota': str(nota),
+            'posicion': _texto(posicion.get('posicion')), 'total': _texto(posicion.get('total')),
+        })
+
+    for estudiante_id, promedio, acumulado in ResumenAcademico.objects.filter(
+        periodo=periodo, estudiante_id__in=datos
+    ).values_list('estudiante_id', 'promedio', 'promedio_acumulado'):
+        datos[estudiante_id].update(promedio=_texto(promedio), promedio_acumulado=_texto(acumulado))
+    return datos
+
+
+def huella(datos):
+    return hashlib.sha256(json.dumps(datos, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _iniciar_proceso():
+    django.setup()
+
+
+def pdf_boleta(datos):
+    """Bytes del PDF de una boleta. Se ejecuta en los procesos de trabajo."""
+    return HTML(string=render_to_string(TEMPLATE, datos)).write_pdf()
+
+
+def _guardar(estudiante_id, periodo, datos, huella_datos, pdf):
+    boleta = BoletaGenerada.objects.filter(estudiante_id=estudiante_id, periodo=periodo).first()
+    if boleta is None:
+        boleta = BoletaGenerada(estudiante_id=estudiante_id, periodo=periodo)
+    elif boleta.archivo:
+        # Mismo nombre en cada generación: se borra el PDF anterior
+        boleta.archivo.delete(save=False)
+    boleta.huella = huella_datos
+    boleta.archivo.save(f"{periodo.pk}/{datos['matricula']}.pdf", ContentFile(pdf), save=False)
+    boleta.save()
+
+
+def _verificar_disponible():
+    if not WEASYPRINT_AVAILABLE:
+        raise GeneracionNoDisponible("No se pueden generar PDFs: falta WeasyPrint o sus librerías del sistema.")
+
+
+def generar_en_segundo_plano(periodo, grado=None):
+    """
+    Lanza ``manage.py generar_boletas`` en un proceso aparte y vuelve de
+    inmediato, para no generar cientos de PDFs dentro de una petición web. El
+    proceso sigue aunque termine el worker que lo lanzó; las boletas aparecen
+    en BoletaGenerada a medida que se guardan y los errores van al log del servidor.
+    """
+    _verificar_disponible()
+    comando = [
+        sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'generar_boletas', '--periodo', str(periodo.pk),
+    ]
+    if grado is not None:
+        comando += ['--grado', str(grado.pk)]
+    return subprocess.Popen(comando, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, start_new_session=True)
+
+
+def generar(periodo, grado=None, procesos=None, forzar=False, progreso=None):
+    """
+    Genera las boletas pendientes del periodo (o del grado). Con
+    ``procesos=1`` se generan en el proceso actual. ``progreso`` recibe
+    ``(estudiante_id, error)`` por cada boleta terminada.
+    """
+    _verificar_disponible()
+    resultado = ResultadoGeneracion()
+    datos = datos_boletas(periodo, grado)
+    anteriores = dict(
+        BoletaGenerada.objects.filter(periodo=periodo, estudiante_id__in=datos).values_list('estudiante_id', 'huella')
+    )
+    pendientes = {}
+    for estudiante_id, boleta in datos.items():
+        huella_datos = huella(boleta)
+        if not forzar and anteriores.get(estudiante_id) == huella_datos:
+            resultado.omitidas += 1
+        else:
+            pendientes[estudiante_id] = huella_datos
+
+    def terminar(estudiante_id, obtener_pdf):
+        try:
+            _guardar(estudiante_id, periodo, datos[estudiante_id], pendientes[estudiante_id], obtener_pdf())
+        except Exception as error:
+            resultado.errores.append((datos[estudiante_id]['matricula'], str(error)))
+            error = str(error)
+        else:
+            resultado.generadas += 1
+            error = None
+        if progreso:
+            progreso(estudiante_id, error)
+
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(pendientes) <= 1:
+        for estudiante_id in pendientes:
+            terminar(estudiante_id, lambda: pdf_boleta(datos[estudiante_id]))
+        return resultado
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as pool:
+        futuros = {pool.submit(pdf_boleta, datos[estudiante_id]): estudiante_id for estudiante_id in pendientes}
+        for futuro in as_completed(futuros):
+            terminar(futuros[futuro], futuro.result)
+    return resultado
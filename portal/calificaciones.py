@@ -0,0 +1,68 @@
+"""
+Libreta de calificaciones del estudiante calculada en la base de datos.
+
+``resumen_por_curso`` devuelve promedio, cantidad, mínima y máxima de cada
+curso con una sola consulta agrupada; el detalle de un curso se pide aparte
+(``detalle_curso``) cuando el usuario lo expande, como diccionarios y no
+como instancias de modelos.
+
+``propagar_calificaciones`` actualiza lo que depende de las calificaciones
+después de escrituras masivas (``bulk_update``/``bulk_create``), que no
+disparan señales.
+"""
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min
+
+from academico.models import Entrega
+from . import dominio, estadisticas, kpi, notas_finales
+from .services import StudentDashboardService
+
+
+def _calificadas(estudiante):
+    return Entrega.objects.filter(estudiante=estudiante, calificacion__isnull=False)
+
+
+def resumen_por_curso(estudiante):
+    """Lista de ``{'curso_id', 'curso', 'promedio', 'total', 'minima', 'maxima'}`` por curso."""
+    return list(
+        _calificadas(estudiante).values(
+            curso_id=F('actividad__clase__curso'), curso=F('actividad__clase__curso__nombre'),
+        ).annotate(
+            promedio=Avg('calificacion'),
+            total=Count('pk'),
+            minima=Min('calificacion'),
+            maxima=Max('calificacion'),
+        ).order_by('curso', 'curso_id')
+    )
+
+
+def detalle_curso(estudiante, curso_id):
+    """Calificaciones de un curso, de la actividad más antigua a la más reciente."""
+    return list(
+        _calificadas(estudiante).filter(
+            actividad__clase__curso_id=curso_id
+        ).values(
+            'calificacion', 'comentarios_maestro',
+            actividad_pk=F('actividad'),
+            titulo=F('actividad__titulo'),
+            fecha_limite=F('actividad__fecha_entrega'),
+        ).order_by('actividad__fecha_entrega', 'pk')
+    )
+
+
+def propagar_calificaciones(clase, estudiante_ids):
+    """
+    Tras calificar en bloque entregas de ``clase``: recalcula una sola vez el
+    resumen de KPIs de la clase, las notas finales y el dominio de
+    competencias de los estudiantes, e invalida sus dashboards y las
+    estadísticas de las actividades al confirmar la transacción.
+    """
+    estudiante_ids = sorted(set(estudiante_ids))
+    if not estudiante_ids:
+        return
+    kpi.recalcular_para_clases([clase.pk])
+    notas_finales.recalcular(clase.curso_id, clase.periodo_id, estudiante_ids)
+    dominio.recalcular(clase.curso_id, clase.periodo_id, estudiante_ids)
+    periodo_id = clase.periodo_id
+    transaction.on_commit(lambda: StudentDashboardService.invalidar(estudiante_ids, periodo_id))
+    transaction.on_commit(lambda: estadisticas.invalidar_clases([clase.pk]))
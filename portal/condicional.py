@@ -0,0 +1,114 @@
+"""
+GET condicional (ETag / Last-Modified) para los portales.
+
+Cada vista declara sus validadores: agregados baratos (``Max`` de
+``fecha_actualizacion`` y ``Count``) de los datos que muestra. Con ellos, el
+usuario, el periodo y el secreto CSRF se arma un ETag; si el navegador ya
+tiene esa versión se responde ``304 Not Modified`` sin construir el contexto
+ni renderizar la plantilla. El conteo detecta eliminaciones, que no mueven
+el máximo de ``fecha_actualizacion``.
+"""
+import hashlib
+from datetime import datetime
+
+from django.contrib import messages
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils import timezone
+from django.utils.http import http_date
+
+from academico.models import Clase, Actividad, Entrega
+from .models import Noticia, NotificacionUsuario
+
+
+def huella(queryset, **extra):
+    """Último ``fecha_actualizacion`` y cantidad de filas del queryset."""
+    datos = queryset.order_by().aggregate(ultima=Max('fecha_actualizacion'), total=Count('pk'), **extra)
+    return tuple(datos[clave] for clave in sorted(datos))
+
+
+def huella_estudiante(estudiante, periodo):
+    """Clases, actividades y entregas del estudiante en el periodo."""
+    if not periodo:
+        return ()
+    return (
+        huella(Clase.objects.filter(estudiantes=estudiante, periodo=periodo)),
+        huella(Actividad.objects.filter(clase__estudiantes=estudiante, clase__periodo=periodo)),
+        huella(Entrega.objects.filter(estudiante=estudiante, actividad__clase__periodo=periodo)),
+    )
+
+
+def huella_familia(hijo_ids, periodo, ahora):
+    """Datos del resumen familiar; depende del día y de las actividades aún no vencidas."""
+    if not periodo or not hijo_ids:
+        return ()
+    return (
+        sorted(hijo_ids),
+        timezone.localdate(ahora),
+        huella(Clase.objects.filter(estudiantes__in=hijo_ids, periodo=periodo)),
+        huella(
+            Actividad.objects.filter(clase__estudiantes__in=hijo_ids, clase__periodo=periodo),
+            vigentes=Count('pk', filter=Q(fecha_entrega__gte=ahora)),
+        ),
+        huella(Entrega.objects.filter(estudiante__in=hijo_ids, actividad__clase__periodo=periodo)),
+    )
+
+
+def huella_bandeja(usuario):
+    """Notificaciones en la bandeja del usuario y cuántas siguen sin leer."""
+    return tuple(NotificacionUsuario.objects.filter(usuario=usuario).aggregate(
+        ultima_fila=Max('pk'),
+        ultima=Max('notificacion__fecha_actualizacion'),
+        no_leidas=Count('pk', filter=Q(leida=False)),
+    ).values())
+
+
+def huella_noticias():
+    return huella(Noticia.objects.filter(publicado=True))
+
+
+def _ultima_fecha(valores):
+    """La fecha más reciente dentro de una estructura anidada de tuplas."""
+    fechas = []
+    for valor in valores:
+        if isinstance(valor, (tuple, list)):
+            fecha = _ultima_fecha(valor)
+            if fecha:
+                fechas.append(fecha)
+        elif isinstance(valor, datetime):
+            fechas.append(valor)
+    return max(fechas) if fechas else None
+
+
+class RespuestaCondicionalMixin:
+    """
+    Responde 304 a GETs cuyo ETag o Last-Modified coincide con la versión
+    actual de los datos. Las vistas implementan ``get_validadores()``.
+    """
+
+    def get_validadores(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        # Los mensajes pendientes solo se muestran una vez: no se puede reutilizar la página
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+
+        validadores = (
+            request.user.pk,
+            request.META.get('CSRF_COOKIE'),
+            huella_bandeja(request.user),
+            self.get_validadores(),
+        )
+        etag = '"%s"' % hashlib.md5(repr(validadores).encode()).hexdigest()
+        ultima = _ultima_fecha(validadores)
+        last_modified = int(ultima.timestamp()) if ultima else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
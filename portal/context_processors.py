@@ -1,4 +1,5 @@
 from academico.models import PeriodoAcademico
+from portal.notificaciones import no_leidas
 
 def periodos_context(request):
     """
@@ -17,4 +18,13 @@ def periodos_context(request):
     return {
         'lista_todos_periodos': periodos,
         'periodo_seleccionado_id': periodo_seleccionado_id
-    }
\ No newline at end of file
+    }
+
+
+def notificaciones_context(request):
+    """
+    Cantidad de notificaciones sin leer para el contador de ``base.html``.
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return {'notificaciones_no_leidas': no_leidas(request.user)}
@@ -0,0 +1,325 @@
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+
+from academico.models import Clase, Actividad, Entrega, AsistenciaClase, Planificacion, BitacoraPedagogica
+
+
+DURACION_LLENADO = ExpressionWrapper(
+    F('fecha_fin_calculo') - F('fecha_inicio_calculo'),
+    output_field=DurationField()
+)
+
+# Contadores crudos por curso. Coinciden con los campos de ResumenKpiCurso.
+CONTADORES = (
+    'total_actividades',
+    'total_entregas',
+    'total_entregas_calificadas',
+    'suma_calificaciones',
+    'total_asistencias',
+    'total_presentes',
+    'total_planificaciones',
+    'total_bitacoras',
+    'bitacoras_con_tiempo',
+    'bitacoras_tiempo_validos',
+    'bitacoras_segundos',
+    'actividades_con_tiempo',
+    'actividades_tiempo_validos',
+    'actividades_segundos',
+    'planificaciones_con_tiempo',
+    'planificaciones_tiempo_validos',
+    'planificaciones_segundos',
+)
+
+
+def kpi_vacio():
+    """Estructura base de KPIs del portal del maestro."""
+    return {
+        'total_estudiantes': 0,
+        'total_cursos': 0,
+        'total_clases_semana': 0,
+        'total_actividades': 0,
+        'total_entregas': 0,
+        'total_entregas_calificadas': 0,
+        'promedio_general': None,
+        'tasa_asistencia': None,
+        'total_bitacoras': 0,
+        'total_planificaciones': 0,
+        'total_bitacoras_con_tiempo': 0,
+        'tiempo_promedio_bitacora': None,
+        'tiempo_promedio_segundos': None,
+        'total_actividades_con_tiempo': 0,
+        'tiempo_promedio_actividad': None,
+        'total_planificaciones_con_tiempo': 0,
+        'tiempo_promedio_planificacion': None,
+    }
+
+
+def contadores_vacios():
+    return {campo: 0 for campo in CONTADORES}
+
+
+def formatear_duracion(segundos):
+    """Convierte segundos a '12m 5s' o '1h 20m'."""
+    if segundos is None:
+        return None
+    if segundos < 3600:
+        return f"{int(segundos // 60)}m {int(segundos % 60)}s"
+    return f"{int(segundos // 3600)}h {int((segundos % 3600) // 60)}m"
+
+
+def _tasa(parte, total):
+    if not total:
+        return None
+    return round((parte / total) * 100, 1)
+
+
+def _promedio(suma, cantidad):
+    if not cantidad or suma is None:
+        return None
+    return round(suma / cantidad, 1)
+
+
+def _segundos_promedio(segundos, validos):
+    if not validos:
+        return None
+    return segundos / validos
+
+
+def _conteos_con_tiempo(model, clase_ids, prefijo, contadores):
+    """
+    Una sola consulta agrupada por curso con el total de registros, los que
+    tienen tiempo de llenado y la suma/cantidad de duraciones positivas.
+    """
+    con_tiempo = Q(fecha_inicio_calculo__isnull=False, fecha_fin_calculo__isnull=False)
+    positivo = con_tiempo & Q(duracion__gt=timedelta(0))
+    filas = model.objects.filter(
+        clase__in=clase_ids
+    ).annotate(
+        duracion=DURACION_LLENADO
+    ).values('clase__curso').annotate(
+        total=Count('pk'),
+        con_tiempo=Count('pk', filter=con_tiempo),
+        validos=Count('pk', filter=positivo),
+        suma_duracion=Sum('duracion', filter=positivo),
+    ).order_by()
+    for fila in filas:
+        datos = contadores.setdefault(fila['clase__curso'], contadores_vacios())
+        datos[f"total_{prefijo}"] = fila['total']
+        datos[f"{prefijo}_con_tiempo"] = fila['con_tiempo']
+        datos[f"{prefijo}_tiempo_validos"] = fila['validos']
+        datos[f"{prefijo}_segundos"] = fila['suma_duracion'].total_seconds() if fila['suma_duracion'] else 0
+
+
+def contadores_por_curso(clase_ids):
+    """
+    Calcula los contadores crudos de cada curso para el conjunto de clases dado.
+
+    Usa una consulta agrupada por modelo (GROUP BY curso), sin importar
+    cuántos cursos o clases haya. Devuelve ``{curso_id: {contador: valor}}``.
+    """
+    contadores = {}
+    if not clase_ids:
+        return contadores
+
+    calificada = Q(calificacion__isnull=False)
+    for fila in Entrega.objects.filter(
+        actividad__clase__in=clase_ids
+    ).values('actividad__clase__curso').annotate(
+        total=Count('pk'),
+        calificadas=Count('pk', filter=calificada),
+        suma=Sum('calificacion', filter=calificada),
+    ).order_by():
+        datos = contadores.setdefault(fila['actividad__clase__curso'], contadores_vacios())
+        datos['total_entregas'] = fila['total']
+        datos['total_entregas_calificadas'] = fila['calificadas']
+        datos['suma_calificaciones'] = fila['suma'] or 0
+
+    for fila in AsistenciaClase.objects.filter(
+        clase__in=clase_ids
+    ).values('clase__curso').annotate(
+        total=Count('pk'),
+        presentes=Count('pk', filter=Q(estado=AsistenciaClase.EstadoAsistencia.PRESENTE)),
+    ).order_by():
+        datos = contadores.setdefault(fila['clase__curso'], contadores_vacios())
+        datos['total_asistencias'] = fila['total']
+        datos['total_presentes'] = fila['presentes']
+
+    _conteos_con_tiempo(BitacoraPedagogica, clase_ids, 'bitacoras', contadores)
+    _conteos_con_tiempo(Planificacion, clase_ids, 'planificaciones', contadores)
+    _conteos_con_tiempo(Actividad, clase_ids, 'actividades', contadores)
+    return contadores
+
+
+def clases_del_maestro(maestro, periodo, curso_id=None):
+    """Clases del maestro en el periodo, con curso y estudiantes precargados."""
+    clases = Clase.objects.filter(maestro=maestro, periodo=periodo)
+    if curso_id is not None:
+        clases = clases.filter(curso_id=curso_id)
+    return list(
+        clases.select_related('curso').prefetch_related(
+            'estudiantes__user'
+        ).order_by('curso__nombre')
+    )
+
+
+def anotar_entregas(actividades):
+    """Agrega ``num_entregas`` y ``num_calificadas`` calculados en la base de datos."""
+    return actividades.annotate(
+        num_entregas=Count('entregas'),
+        num_calificadas=Count('entregas', filter=Q(entregas__calificacion__isnull=False)),
+    )
+
+
+def actividades_del_maestro(clase_ids):
+    return anotar_entregas(
+        Actividad.objects.filter(clase__in=clase_ids)
+    ).select_related('clase__curso').order_by('-fecha_creacion')
+
+
+def sumar_contadores(contadores):
+    totales = contadores_vacios()
+    for datos in contadores:
+        for campo in CONTADORES:
+            totales[campo] += datos[campo]
+    return totales
+
+
+def kpi_desde_totales(totales, total_clases, total_cursos, total_estudiantes):
+    """Arma los KPIs globales a partir de la suma de los contadores por curso."""
+    kpi = kpi_vacio()
+    kpi['total_clases_semana'] = total_clases
+    kpi['total_cursos'] = total_cursos
+    kpi['total_estudiantes'] = total_estudiantes
+    kpi['total_actividades'] = totales['total_actividades']
+    kpi['total_entregas'] = totales['total_entregas']
+    kpi['total_entregas_calificadas'] = totales['total_entregas_calificadas']
+    kpi['promedio_general'] = _promedio(totales['suma_calificaciones'], totales['total_entregas_calificadas'])
+    kpi['tasa_asistencia'] = _tasa(totales['total_presentes'], totales['total_asistencias'])
+    kpi['total_planificaciones'] = totales['total_planificaciones']
+    kpi['total_bitacoras'] = totales['total_bitacoras']
+    kpi['total_bitacoras_con_tiempo'] = totales['bitacoras_con_tiempo']
+    kpi['total_actividades_con_tiempo'] = totales['actividades_con_tiempo']
+    kpi['total_planificaciones_con_tiempo'] = totales['planificaciones_con_tiempo']
+
+    segundos_bitacora = _segundos_promedio(totales['bitacoras_segundos'], totales['bitacoras_tiempo_validos'])
+    kpi['tiempo_promedio_bitacora'] = formatear_duracion(segundos_bitacora)
+    kpi['tiempo_promedio_segundos'] = round(segundos_bitacora, 1) if segundos_bitacora is not None else None
+    kpi['tiempo_promedio_actividad'] = formatear_duracion(
+        _segundos_promedio(totales['actividades_segundos'], totales['actividades_tiempo_validos'])
+    )
+    kpi['tiempo_promedio_planificacion'] = formatear_duracion(
+        _segundos_promedio(totales['planificaciones_segundos'], totales['planificaciones_tiempo_validos'])
+    )
+    return kpi
+
+
+def construir_dashboard(clases, actividades, contadores):
+    """
+    Arma ``(kpi, cursos_con_clases)`` para la plantilla del portal del maestro
+    a partir de las clases, las actividades (anotadas con ``anotar_entregas``)
+    y los contadores por curso. No ejecuta consultas adicionales.
+    """
+    cursos_con_clases = []
+
+    clases_por_curso = OrderedDict()
+    for clase in clases:
+        data = clases_por_curso.setdefault(clase.curso_id, {
+            'curso': clase.curso,
+            'clases': [],
+            'estudiantes': [],
+            'estudiantes_set': set(),
+        })
+        data['clases'].append(clase)
+        for est in clase.estudiantes.all():
+            if est.pk not in data['estudiantes_set']:
+                data['estudiantes'].append(est)
+                data['estudiantes_set'].add(est.pk)
+
+    actividades_por_curso = {}
+    for actividad in actividades:
+        actividades_por_curso.setdefault(actividad.clase.curso_id, []).append(actividad)
+
+    # Las actividades ya traen sus conteos, así que los totales de actividades
+    # y entregas se toman de ellas en lugar de los contadores materializados.
+    vivos = {'total_actividades': 0, 'total_entregas': 0, 'total_entregas_calificadas': 0}
+    todos_estudiantes = set()
+
+    for curso_id, data in clases_por_curso.items():
+        curso_actividades = actividades_por_curso.get(curso_id, [])
+        datos = contadores.get(curso_id) or contadores_vacios()
+        todos_estudiantes.update(data['estudiantes_set'])
+
+        total_entregas = sum(actividad.num_entregas for actividad in curso_actividades)
+        total_calificadas = sum(actividad.num_calificadas for actividad in curso_actividades)
+        vivos['total_actividades'] += len(curso_actividades)
+        vivos['total_entregas'] += total_entregas
+        vivos['total_entregas_calificadas'] += total_calificadas
+
+        cursos_con_clases.append({
+            'curso': data['curso'],
+            'clases': data['clases'],
+            'estudiantes': data['estudiantes'],
+            'actividades': curso_actividades,
+            'total_actividades': len(curso_actividades),
+            'total_entregas': total_entregas,
+            'total_entregas_calificadas': total_calificadas,
+            'promedio': _promedio(datos['suma_calificaciones'], datos['total_entregas_calificadas']),
+            'tasa_asistencia': _tasa(datos['total_presentes'], datos['total_asistencias']),
+            'planificaciones': datos['total_planificaciones'],
+            'bitacoras': datos['total_bitacoras'],
+            'num_estudiantes': len(data['estudiantes']),
+            'bitacoras_con_tiempo': datos['bitacoras_con_tiempo'],
+            'tiempo_promedio_bitacora': formatear_duracion(
+                _segundos_promedio(datos['bitacoras_segundos'], datos['bitacoras_tiempo_validos'])
+            ),
+            'actividades_con_tiempo': datos['actividades_con_tiempo'],
+            'tiempo_promedio_actividad': formatear_duracion(
+                _segundos_promedio(datos['actividades_segundos'], datos['actividades_tiempo_validos'])
+            ),
+            'planificaciones_con_tiempo': datos['planificaciones_con_tiempo'],
+            'tiempo_promedio_planificacion': formatear_duracion(
+                _segundos_promedio(datos['planificaciones_segundos'], datos['planificaciones_tiempo_validos'])
+            ),
+        })
+
+    totales = sumar_contadores(contadores.get(curso_id) or contadores_vacios() for curso_id in clases_por_curso)
+    kpi = kpi_desde_totales(totales, len(clases), len(clases_por_curso), len(todos_estudiantes))
+    kpi.update(vivos)
+    return kpi, cursos_con_clases
+
+
+def tarjeta_a_json(item):
+    """Versión serializable de una tarjeta de curso (sin instancias de modelos)."""
+    datos = {
+        clave: valor for clave, valor in item.items()
+        if clave not in ('curso', 'clases', 'estudiantes', 'actividades')
+    }
+    if datos['promedio'] is not None:
+        datos['promedio'] = float(datos['promedio'])
+    datos['curso'] = {'id': item['curso'].pk, 'nombre': item['curso'].nombre}
+    datos['clases'] = [
+        {
+            'id': clase.pk,
+            'dia': clase.get_dia_semana_display(),
+            'hora_inicio': clase.hora_inicio.strftime('%H:%M'),
+            'hora_fin': clase.hora_fin.strftime('%H:%M'),
+        }
+        for clase in item['clases']
+    ]
+    datos['estudiantes'] = [
+        {'id': estudiante.pk, 'nombre': estudiante.user.get_full_name()}
+        for estudiante in item['estudiantes']
+    ]
+    datos['actividades'] = [
+        {
+            'id': actividad.pk,
+            'titulo': actividad.titulo,
+            'fecha_entrega': actividad.fecha_entrega.isoformat(),
+            'num_entregas': actividad.num_entregas,
+            'num_calificadas': actividad.num_calificadas,
+        }
+        for actividad in item['actividades']
+    ]
+    return datos
@@ -0,0 +1,200 @@
+"""
+Dominio de competencias por estudiante y periodo (DominioCompetencia).
+
+Una actividad puede evaluar varias competencias de su curso. Cada fila del
+resumen guarda ``suma`` (calificación × peso), ``pesos`` y el número de
+evaluaciones de las actividades vinculadas a la competencia, así que al
+calificar una entrega solo se suma la diferencia en las competencias de su
+actividad. El mapa de calor de una clase lee el resumen con una consulta.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+from academico.models import Clase, Actividad, Entrega, Competencia
+from users.models import Estudiante
+from . import historial
+from .models import DominioCompetencia
+
+
+CERO = Decimal(0)
+CENTESIMOS = Decimal('0.01')
+# (mínimo, etiqueta), de mayor a menor
+NIVELES = (
+    (Decimal('85'), 'Logrado'),
+    (Decimal('70'), 'En proceso'),
+    (CERO, 'En inicio'),
+)
+
+
+def etiqueta(nivel):
+    if nivel is None:
+        return None
+    for minimo, nombre in NIVELES:
+        if nivel >= minimo:
+            return nombre
+    return NIVELES[-1][1]
+
+
+def calcular_nivel(suma, pesos):
+    return (Decimal(suma) / Decimal(pesos)).quantize(CENTESIMOS) if pesos > 0 else None
+
+
+def aporte(entrega):
+    """
+    Devuelve ``(estudiante_id, periodo_id, competencia_ids, calificación × peso, peso)``
+    de una entrega calificada cuya actividad evalúa competencias, o ``None``.
+    """
+    if entrega.calificacion is None:
+        return None
+    # Como en ``recalcular``: solo cuentan las competencias del curso de la clase
+    filas = list(Actividad.competencias.through.objects.filter(
+        actividad_id=entrega.actividad_id, competencia__curso_id=F('actividad__clase__curso_id')
+    ).values_list('competencia_id', 'actividad__clase__periodo_id', 'actividad__peso'))
+    if not filas:
+        return None
+    _, periodo_id, peso = filas[0]
+    competencia_ids = tuple(fila[0] for fila in filas)
+    return entrega.estudiante_id, periodo_id, competencia_ids, entrega.calificacion * peso, peso
+
+
+def aplicar_cambio(anterior, actual):
+    """Aplica al resumen la diferencia entre dos aportes (cualquiera puede ser ``None``)."""
+    deltas = defaultdict(lambda: [CERO, CERO, 0])
+    for signo, datos in ((-1, anterior), (1, actual)):
+        if datos:
+            estudiante_id, periodo_id, competencia_ids, suma, peso = datos
+            for competencia_id in competencia_ids:
+                delta = deltas[(estudiante_id, periodo_id, competencia_id)]
+                delta[0] += signo * suma
+                delta[1] += signo * peso
+                delta[2] += signo
+
+    por_estudiante = defaultdict(dict)
+    for (estudiante_id, periodo_id, competencia_id), delta in deltas.items():
+        if any(delta):
+            por_estudiante[(estudiante_id, periodo_id)][competencia_id] = delta
+    for (estudiante_id, periodo_id), cambios in por_estudiante.items():
+        _aplicar(estudiante_id, periodo_id, cambios)
+
+
+def _aplicar(estudiante_id, periodo_id, cambios):
+    with transaction.atomic():
+        # El estudiante se bloquea antes que su dominio, igual que en notas_finales._aplicar
+        historial.bloquear([estudiante_id])
+        filas = {
+            fila.competencia_id: fila
+            for fila in DominioCompetencia.objects.select_for_update().filter(
+                estudiante_id=estudiante_id, periodo_id=periodo_id, competencia_id__in=cambios
+            )
+        }
+        nuevas, vacias = [], []
+        for competencia_id, (suma, pesos, evaluaciones) in cambios.items():
+            fila = filas.get(competencia_id)
+            if fila is None:
+                fila = DominioCompetencia(estudiante_id=estudiante_id, periodo_id=periodo_id, competencia_id=competencia_id)
+                nuevas.append(fila)
+            fila.suma += suma
+            fila.pesos += pesos
+            fila.evaluaciones += evaluaciones
+            fila.nivel = calcular_nivel(fila.suma, fila.pesos)
+            if fila.evaluaciones <= 0:
+                vacias.append(competencia_id)
+            elif fila.pk:
+                fila.save(update_fields=['suma', 'pesos', 'evaluaciones', 'nivel', 'fecha_actualizacion'])
+
+        DominioCompetencia.objects.bulk_create([fila for fila in nuevas if fila.evaluaciones > 0])
+        if vacias:
+            DominioCompetencia.objects.filter(
+                estudiante_id=estudiante_id, periodo_id=periodo_id, competencia_id__in=vacias
+            ).delete()
+
+
+def recalcular(curso_id, periodo_id, estudiante_ids=None):
+    """
+    Recalcula desde las entregas el dominio de las competencias de un curso en
+    un periodo (o solo el de ``estudiante_ids``). Se usa para reparar y tras
+    escrituras masivas que no disparan señales.
+    """
+    entregas = Entrega.objects.filter(
+        actividad__clase__curso_id=curso_id,
+        actividad__clase__periodo_id=periodo_id,
+        actividad__competencias__curso_id=curso_id,
+        calificacion__isnull=False,
+    )
+    filas = DominioCompetencia.objects.filter(periodo_id=periodo_id, competencia__curso_id=curso_id)
+    if estudiante_ids is not None:
+        estudiante_ids = list(estudiante_ids)
+        entregas = entregas.filter(estudiante_id__in=estudiante_ids)
+        filas = filas.filter(estudiante_id__in=estudiante_ids)
+
+    sumas = entregas.values('estudiante_id', 'actividad__competencias').annotate(
+        suma=Sum(ExpressionWrapper(
+            F('calificacion') * F('actividad__peso'),
+            output_field=DecimalField(max_digits=12, decimal_places=4),
+        )),
+        pesos=Sum('actividad__peso'),
+        evaluaciones=Count('pk'),
+    ).order_by()
+
+    with transaction.atomic():
+        filas.delete()
+        DominioCompetencia.objects.bulk_create([
+            DominioCompetencia(
+                estudiante_id=fila['estudiante_id'], competencia_id=fila['actividad__competencias'],
+                periodo_id=periodo_id, suma=fila['suma'], pesos=fila['pesos'],
+                evaluaciones=fila['evaluaciones'], nivel=calcular_nivel(fila['suma'], fila['pesos']),
+            )
+            for fila in sumas
+        ], batch_size=1000)
+    return len(sumas)
+
+
+def recalcular_actividad(actividad, clase_ids):
+    """
+    Cuando cambian las competencias, el peso o la clase de una actividad,
+    recalcula el dominio de los estudiantes que la tienen calificada.
+    """
+    estudiante_ids = list(
+        Entrega.objects.filter(actividad=actividad, calificacion__isnull=False).values_list('estudiante_id', flat=True)
+    )
+    if not estudiante_ids:
+        return
+    pares = Clase.objects.filter(pk__in=clase_ids).values_list('curso_id', 'periodo_id').distinct()
+    for curso_id, periodo_id in pares:
+        recalcular(curso_id, periodo_id, estudiante_ids)
+
+
+def mapa_de_calor(clase):
+    """
+    Estudiantes × competencias del curso con el nivel de dominio de cada uno
+    en el periodo de la clase, y el promedio por competencia.
+    """
+    estudiantes = list(
+        Estudiante.objects.filter(clases_inscritas=clase).order_by(
+            'user__last_name', 'user__first_name'
+        ).values_list('pk', 'user__first_name', 'user__last_name')
+    )
+    competencias = list(Competencia.objects.filter(curso_id=clase.curso_id).values('pk', 'codigo', 'descripcion'))
+    niveles = {
+        (estudiante_id, competencia_id): nivel
+        for estudiante_id, competencia_id, nivel in DominioCompetencia.objects.filter(
+            periodo_id=clase.periodo_id, competencia__curso_id=clase.curso_id,
+            estudiante_id__in=[pk for pk, _, _ in estudiantes],
+        ).values_list('estudiante_id', 'competencia_id', 'nivel')
+    }
+
+    filas = []
+    for pk, nombre, apellido in estudiantes:
+        celdas = [niveles.get((pk, competencia['pk'])) for competencia in competencias]
+        filas.append({
+            'nombre': f"{apellido}, {nombre}",
+            'celdas': [{'nivel': nivel, 'etiqueta': etiqueta(nivel)} for nivel in celdas],
+        })
+    for i, competencia in enumerate(competencias):
+        valores = [fila['celdas'][i]['nivel'] for fila in filas if fila['celdas'][i]['nivel'] is not None]
+        competencia['promedio'] = (sum(valores) / len(valores)).quantize(CENTESIMOS) if valores else None
+        competencia['etiqueta'] = etiqueta(competencia['promedio'])
+    return competencias, filas
@@ -0,0 +1,94 @@
+"""
+Distribución de calificaciones de una actividad.
+
+Las calificaciones se leen con un solo ``values_list`` y las estadísticas
+(media, mediana, desviación estándar, cuartiles e histograma) se calculan
+con numpy. El resultado es un diccionario serializable a JSON que se guarda
+en la caché por actividad y se invalida desde ``portal.signals`` cuando
+cambia alguna de sus entregas (o desde ``propagar_calificaciones`` tras
+escrituras masivas).
+"""
+import math
+
+import numpy as np
+
+from django.core.cache import cache
+
+from academico.models import Actividad, Entrega
+from users.models import Estudiante
+
+
+CACHE_TIMEOUT = 60 * 60
+ANCHO_INTERVALO = 10
+
+
+def _clave(actividad_id):
+    return f"portal:estadisticas_actividad:{actividad_id}"
+
+
+def invalidar(actividad_ids):
+    """Elimina de la caché las estadísticas de las actividades indicadas."""
+    cache.delete_many([_clave(actividad_id) for actividad_id in actividad_ids])
+
+
+def invalidar_clases(clase_ids):
+    """Invalida las estadísticas de todas las actividades de las clases."""
+    invalidar(Actividad.objects.filter(clase_id__in=clase_ids).values_list('pk', flat=True))
+
+
+def _redondear(valor):
+    return round(float(valor), 2)
+
+
+def histograma(valores, ancho=ANCHO_INTERVALO):
+    """Intervalos de ``ancho`` puntos desde 0 hasta 100 (o la calificación máxima)."""
+    tope = max(100, math.ceil(valores.max() / ancho) * ancho) if valores.size else 100
+    bordes = np.arange(0, tope + ancho, ancho)
+    conteos, _ = np.histogram(valores, bins=bordes)
+    return [
+        {'desde': int(desde), 'hasta': int(hasta), 'total': int(total)}
+        for desde, hasta, total in zip(bordes[:-1], bordes[1:], conteos)
+    ]
+
+
+def calcular(actividad):
+    """Estadísticas de las calificaciones de la actividad (dos consultas)."""
+    calificaciones = list(
+        Entrega.objects.filter(actividad=actividad).values_list('calificacion', flat=True)
+    )
+    faltantes = Estudiante.objects.filter(clases_inscritas=actividad.clase_id).exclude(
+        entregas__actividad=actividad
+    ).count()
+
+    valores = np.array([c for c in calificaciones if c is not None], dtype=float)
+    datos = {
+        'actividad': actividad.pk,
+        'entregas': len(calificaciones),
+        'calificadas': int(valores.size),
+        'sin_calificar': len(calificaciones) - int(valores.size),
+        'faltantes': faltantes,
+        'media': None, 'mediana': None, 'desviacion': None,
+        'minima': None, 'maxima': None, 'cuartiles': None,
+        'histograma': histograma(valores),
+    }
+    if valores.size:
+        q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+        datos.update({
+            'media': _redondear(valores.mean()),
+            'mediana': _redondear(mediana),
+            'desviacion': _redondear(valores.std()),
+            'minima': _redondear(valores.min()),
+            'maxima': _redondear(valores.max()),
+            'cuartiles': [_redondear(q1), _redondear(mediana), _redondear(q3)],
+        })
+    return datos
+
+
+def obtener(actividad):
+    """Estadísticas de la actividad desde la caché (o calculadas y guardadas)."""
+    clave = _clave(actividad.pk)
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular(actividad)
+        cache.set(clave, datos, CACHE_TIMEOUT)
+    return datos
@@ -2,23 +2,41 @@
 from django import forms
 from academico.models import Actividad, Entrega, AsistenciaClase, Competencia, Planificacion
 from .models import Noticia, Notificacion
+from .importacion import EXTENSIONES, OPENPYXL_AVAILABLE
 
 class ActividadForm(forms.ModelForm):
     class Meta:
         model = Actividad
-        fields = ['titulo', 'descripcion', 'fecha_entrega', 'recurso_adjunto']
+        fields = ['titulo', 'descripcion', 'fecha_entrega', 'categoria', 'peso', 'competencias', 'recurso_adjunto']
         widgets = {
             'fecha_entrega': forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
             'descripcion': forms.Textarea(attrs={'rows': 5}), # Un poco más grande
             'recurso_adjunto': forms.ClearableFileInput(attrs={'class': 'mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'}),
+            'competencias': forms.CheckboxSelectMultiple,
         }
 
     def __init__(self, *args, **kwargs):
+        curso = kwargs.pop('curso', None)
         super().__init__(*args, **kwargs)
+        # Solo las categorías del esquema de ponderación del curso
+        self.fields['categoria'].queryset = (
+            curso.categorias_calificacion.all() if curso else self.fields['categoria'].queryset.none()
+        )
+        # Y solo las competencias del curso
+        self.fields['competencias'].queryset = (
+            curso.competencias.all() if curso else self.fields['competencias'].queryset.none()
+        )
         for field_name, field in self.fields.items():
-            field.widget.attrs.update({
-                'class': 'mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
-            })
+            if field_name != 'competencias':
+                field.widget.attrs.update({
+                    'class': 'mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
+                })
+
+    def clean_peso(self):
+        peso = self.cleaned_data.get('peso')
+        if peso is not None and peso < 0:
+            raise forms.ValidationError("El peso no puede ser negativo.")
+        return peso
 
 class EntregaForm(forms.ModelForm):
     class Meta:
@@ -54,6 +72,52 @@ class CalificacionForm(forms.ModelForm):
                 'class': 'mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
             })
 
+class CalificacionMasivaForm(forms.ModelForm):
+    """
+    Una fila de la hoja de calificación masiva de una actividad.
+    """
+    class Meta:
+        model = Entrega
+        fields = ['calificacion', 'comentarios_maestro']
+        widgets = {
+            'comentarios_maestro': forms.Textarea(attrs={'rows': 1}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name, field in self.fields.items():
+            field.widget.attrs.update({
+                'class': 'block w-full px-2 py-1 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 text-sm'
+            })
+
+
+CalificacionMasivaFormSet = forms.modelformset_factory(
+    Entrega, form=CalificacionMasivaForm, extra=0, can_delete=False
+)
+
+class ImportarCalificacionesForm(forms.Form):
+    """
+    Archivo CSV o XLSX con las columnas matricula, actividad, calificacion y
+    (opcional) comentario.
+    """
+    archivo = forms.FileField(label="Archivo de calificaciones (CSV o XLSX)")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['archivo'].widget.attrs.update({
+            'accept': '.csv,.xlsx' if OPENPYXL_AVAILABLE else '.csv',
+            'class': 'mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
+        })
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        nombre = archivo.name.lower()
+        if not nombre.endswith(EXTENSIONES):
+            raise forms.ValidationError("Formato no soportado: use CSV o XLSX.")
+        if nombre.endswith('.xlsx') and not OPENPYXL_AVAILABLE:
+            raise forms.ValidationError("La importación de Excel no está disponible en este servidor; use CSV.")
+        return archivo
+
 class EntregaEditForm(forms.ModelForm):
     """
     Formulario para que el maestro edite una entrega (cambiar actividad, calificar, etc.).
@@ -94,18 +158,25 @@ class NoticiaForm(forms.ModelForm):
 class NotificacionForm(forms.ModelForm):
     class Meta:
         model = Notificacion
-        fields = ['audiencia', 'mensaje']
+        fields = ['audiencia', 'grado', 'clase', 'mensaje']
         widgets = {
             'mensaje': forms.Textarea(attrs={'rows': 5, 'placeholder': 'Escribe tu mensaje corto aquí...'}),
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields['clase'].queryset = self.fields['clase'].queryset.select_related('curso')
         for field_name, field in self.fields.items():
             field.widget.attrs.update({
                 'class': 'mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500'
             })
 
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('grado') and cleaned_data.get('clase'):
+            raise forms.ValidationError("Seleccione un grado o una clase, no ambos.")
+        return cleaned_data
+
 class AsistenciaForm(forms.Form):
     """
     Representa una sola fila en la hoja de asistencia.
@@ -0,0 +1,117 @@
+"""
+Historial académico (ResumenAcademico).
+
+Por estudiante y periodo se guarda la suma de créditos y de nota × créditos
+de sus notas finales, el promedio ponderado por créditos del periodo y el
+acumulado hasta ese periodo. Se recalcula a partir de NotaFinal (una fila por
+curso, ya agregada) cada vez que cambian las notas finales del estudiante,
+así el historial y el cuadro de honor se leen sin volver a las entregas. La
+actualización de un estudiante se serializa bloqueando su fila (``bloquear``).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from academico.models import Curso, PeriodoAcademico
+from users.models import Estudiante
+from .models import NotaFinal, ResumenAcademico
+
+
+CENTESIMOS = Decimal('0.01')
+MINIMO_CUADRO_HONOR = Decimal('90')
+
+
+def _promedio(puntos, creditos):
+    return (puntos / creditos).quantize(CENTESIMOS) if creditos else None
+
+
+def bloquear(estudiante_ids):
+    """
+    Bloquea las filas de los estudiantes (siempre en el mismo orden) para que
+    las notas y el historial de un estudiante se actualicen de a una
+    transacción a la vez. Debe llamarse dentro de una transacción, antes de
+    leer o escribir sus notas finales.
+    """
+    list(Estudiante.objects.select_for_update().filter(pk__in=estudiante_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def actualizar(estudiante_ids=None):
+    """
+    Recalcula el historial de los estudiantes indicados (o de todos) a partir
+    de sus notas finales. Devuelve el número de filas.
+
+    Con ``estudiante_ids`` los estudiantes se bloquean primero y las notas se
+    leen con una lectura de bloqueo, que ve lo último confirmado aunque la
+    transacción ya haya leído antes: dos maestros que califican al mismo
+    estudiante no escriben un historial armado con notas viejas.
+    """
+    notas = NotaFinal.objects.filter(nota__isnull=False)
+    resumenes = ResumenAcademico.objects.all()
+    if estudiante_ids is not None:
+        estudiante_ids = list(estudiante_ids)
+        if not estudiante_ids:
+            return 0
+        notas = notas.filter(estudiante_id__in=estudiante_ids).select_for_update()
+        resumenes = resumenes.filter(estudiante_id__in=estudiante_ids)
+
+    with transaction.atomic():
+        if estudiante_ids is not None:
+            bloquear(estudiante_ids)
+        filas = list(notas.values_list('estudiante_id', 'periodo_id', 'curso_id', 'nota'))
+        creditos_curso = dict(Curso.objects.filter(pk__in={f[2] for f in filas}).values_list('pk', 'creditos'))
+        orden_periodo = dict(
+            PeriodoAcademico.objects.filter(pk__in={f[1] for f in filas}).values_list('pk', 'fecha_inicio')
+        )
+
+        por_periodo = defaultdict(lambda: [Decimal(0), 0])
+        for estudiante_id, periodo_id, curso_id, nota in filas:
+            creditos = creditos_curso.get(curso_id) or 0
+            totales = por_periodo[(estudiante_id, periodo_id)]
+            totales[0] += nota * creditos
+            totales[1] += creditos
+
+        nuevas = []
+        acumulados = defaultdict(lambda: [Decimal(0), 0])
+        for (estudiante_id, periodo_id), (puntos, creditos) in sorted(
+            por_periodo.items(), key=lambda item: (item[0][0], orden_periodo[item[0][1]], item[0][1])
+        ):
+            acumulado = acumulados[estudiante_id]
+            acumulado[0] += puntos
+            acumulado[1] += creditos
+            nuevas.append(ResumenAcademico(
+                estudiante_id=estudiante_id, periodo_id=periodo_id,
+                creditos=creditos, puntos=puntos, promedio=_promedio(puntos, creditos),
+                creditos_acumulados=acumulado[1], puntos_acumulados=acumulado[0],
+                promedio_acumulado=_promedio(*acumulado),
+            ))
+
+        resumenes.delete()
+        ResumenAcademico.objects.bulk_create(nuevas, batch_size=1000)
+    return len(nuevas)
+
+
+def historial(estudiante):
+    """
+    Historial completo del estudiante, del periodo más antiguo al más
+    reciente: ``[{'periodo', 'resumen', 'cursos'}]``. Dos consultas.
+    """
+    cursos = defaultdict(list)
+    for nota in NotaFinal.objects.filter(estudiante=estudiante, nota__isnull=False).select_related(
+        'curso'
+    ).order_by('curso__nombre'):
+        cursos[nota.periodo_id].append(nota)
+
+    return [
+        {'periodo': resumen.periodo, 'resumen': resumen, 'cursos': cursos[resumen.periodo_id]}
+        for resumen in ResumenAcademico.objects.filter(estudiante=estudiante).select_related(
+            'periodo'
+        ).order_by('periodo__fecha_inicio', 'periodo_id')
+    ]
+
+
+def cuadro_de_honor(periodo, minimo=MINIMO_CUADRO_HONOR):
+    """Estudiantes con promedio del periodo mayor o igual a ``minimo``, del mejor al peor."""
+    return ResumenAcademico.objects.filter(
+        periodo=periodo, promedio__gte=minimo
+    ).select_related('estudiante__user', 'estudiante__grado').order_by('-promedio', 'estudiante__user__last_name')
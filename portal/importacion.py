@@ -0,0 +1,197 @@
+"""
+Importación masiva de calificaciones desde CSV o XLSX.
+
+El archivo se recorre fila por fila (``matricula``, ``actividad``,
+``calificacion``, ``comentario``). Los estudiantes y las actividades de la
+clase se resuelven con dos diccionarios precargados, sin consultas por fila,
+y las entregas se insertan o actualizan por lotes con
+``bulk_create(update_conflicts=True)`` sobre la llave única
+(actividad, estudiante). Las filas inválidas se reportan con su número de
+línea y no detienen la importación.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+
+from academico.models import Actividad, Entrega
+from users.models import Estudiante
+from .calificaciones import propagar_calificaciones
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    load_workbook = None
+
+
+TAMANO_LOTE = 500
+COLUMNAS = ('matricula', 'actividad', 'calificacion', 'comentario')
+EXTENSIONES = ('.csv', '.xlsx')
+CALIFICACION_MAXIMA = Decimal('999.99')  # DecimalField(max_digits=5, decimal_places=2)
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede leer o no tiene las columnas esperadas."""
+
+
+@dataclass
+class ResultadoImportacion:
+    guardadas: int = 0
+    errores: list = field(default_factory=list)
+
+    def error(self, linea, mensaje):
+        self.errores.append((linea, mensaje))
+
+
+def _normalizar(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        # Excel guarda los números como flotantes: la matrícula 12345 llega como 12345.0
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _filas(encabezados, filas, primera_linea=2):
+    """Convierte filas en diccionarios por nombre de columna: ``(linea, fila)``."""
+    columnas = [_normalizar(c).lower() for c in encabezados]
+    faltantes = [c for c in COLUMNAS[:3] if c not in columnas]
+    if faltantes:
+        raise ArchivoInvalido(f"Faltan las columnas: {', '.join(faltantes)}.")
+    for linea, valores in enumerate(filas, start=primera_linea):
+        fila = dict(zip(columnas, (_normalizar(v) for v in valores)))
+        if any(fila.values()):
+            yield linea, fila
+
+
+def leer_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    lector = csv.reader(texto)
+    try:
+        encabezados = next(lector, None)
+        if encabezados is None:
+            raise ArchivoInvalido("El archivo está vacío.")
+        yield from _filas(encabezados, lector)
+    except UnicodeDecodeError:
+        raise ArchivoInvalido("El archivo CSV debe estar codificado en UTF-8.")
+
+
+def leer_xlsx(archivo):
+    if not OPENPYXL_AVAILABLE:
+        raise ArchivoInvalido("La importación de Excel no está disponible en este servidor.")
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception:
+        raise ArchivoInvalido("No se pudo leer el archivo de Excel.")
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = next(filas, None)
+        if encabezados is None:
+            raise ArchivoInvalido("El archivo está vacío.")
+        yield from _filas(encabezados, filas)
+    finally:
+        libro.close()
+
+
+def leer_archivo(archivo, nombre):
+    """Generador de ``(linea, fila)`` según la extensión del archivo."""
+    nombre = nombre.lower()
+    if nombre.endswith('.csv'):
+        return leer_csv(archivo)
+    if nombre.endswith('.xlsx'):
+        return leer_xlsx(archivo)
+    raise ArchivoInvalido("Formato no soportado: use CSV o XLSX.")
+
+
+def _actividades_de(clase):
+    """
+    Actividades de la clase por pk y por título. Los títulos repetidos son
+    ambiguos y se guardan como ``None``.
+    """
+    por_pk, por_titulo = {}, {}
+    for pk, titulo in Actividad.objects.filter(clase=clase).values_list('pk', 'titulo'):
+        por_pk[str(pk)] = pk
+        clave = titulo.strip().lower()
+        por_titulo[clave] = None if clave in por_titulo else pk
+    return por_pk, por_titulo
+
+
+def _guardar(lote, con_comentario):
+    opciones = {}
+    if connection.features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = ['actividad', 'estudiante']
+    # Sin columna de comentario se conservan los comentarios existentes
+    campos = ['calificacion', 'comentarios_maestro', 'fecha_actualizacion'] if con_comentario else [
+        'calificacion', 'fecha_actualizacion'
+    ]
+    Entrega.objects.bulk_create(lote.values(), update_conflicts=True, update_fields=campos, **opciones)
+
+
+def importar_calificaciones(clase, filas, tamano_lote=TAMANO_LOTE):
+    """
+    Inserta o actualiza las entregas de ``clase`` a partir de ``(linea, fila)``.
+    Todo ocurre en una transacción y lo derivado (KPIs, notas finales,
+    dashboards) se actualiza una sola vez al final.
+    """
+    resultado = ResultadoImportacion()
+    estudiantes = dict(
+        Estudiante.objects.filter(clases_inscritas=clase).values_list('matricula', 'pk')
+    )
+    actividades_por_pk, actividades_por_titulo = _actividades_de(clase)
+    calificados = set()
+    con_comentario = False
+    # Un lote por (actividad, estudiante): si el archivo repite una pareja, gana la última fila
+    lote = {}
+
+    with transaction.atomic():
+        for linea, fila in filas:
+            estudiante_id = estudiantes.get(fila.get('matricula', ''))
+            if estudiante_id is None:
+                resultado.error(linea, f"Matrícula '{fila.get('matricula', '')}' no inscrita en la clase.")
+                continue
+
+            actividad = fila.get('actividad', '')
+            clave = actividad.lower()
+            if clave in actividades_por_titulo:
+                actividad_id = actividades_por_titulo[clave]
+                if actividad_id is None:
+                    resultado.error(linea, f"Hay varias actividades llamadas '{actividad}'; use su número.")
+                    continue
+            elif actividad in actividades_por_pk:
+                actividad_id = actividades_por_pk[actividad]
+            else:
+                resultado.error(linea, f"Actividad '{actividad}' no encontrada en la clase.")
+                continue
+
+            try:
+                calificacion = Decimal(fila.get('calificacion', '').replace(',', '.'))
+            except InvalidOperation:
+                calificacion = None
+            if calificacion is None or not calificacion.is_finite():
+                resultado.error(linea, f"Calificación inválida: '{fila.get('calificacion', '')}'.")
+                continue
+            if not Decimal(0) <= calificacion <= CALIFICACION_MAXIMA:
+                resultado.error(linea, f"Calificación fuera de rango: {calificacion}.")
+                continue
+            calificacion = calificacion.quantize(Decimal('0.01'))
+
+            lote[(actividad_id, estudiante_id)] = Entrega(
+                actividad_id=actividad_id, estudiante_id=estudiante_id,
+                calificacion=calificacion, comentarios_maestro=fila.get('comentario', ''),
+            )
+            calificados.add(estudiante_id)
+            con_comentario = 'comentario' in fila
+            if len(lote) >= tamano_lote:
+                _guardar(lote, con_comentario)
+                resultado.guardadas += len(lote)
+                lote = {}
+
+        if lote:
+            _guardar(lote, con_comentario)
+            resultado.guardadas += len(lote)
+        propagar_calificaciones(clase, calificados)
+    return resultado
@@ -0,0 +1,232 @@
+"""
+Registro de llegada en kioscos (tabletas en la entrada del colegio).
+
+A primera hora llegan cientos de estudiantes en pocos minutos, así que cada
+registro evita la base de datos: el kiosco se autentica con un token cuya
+huella se recuerda en memoria, el padrón del día (matrícula -> clases de hoy)
+se arma con una consulta y se reutiliza unos minutos, y la llegada se anota
+en un búfer en memoria. Un hilo vacía el búfer cada pocos segundos con un
+único upsert (``portal.asistencia.guardar_registros``), que también
+actualiza KPIs y asistencia mensual.
+
+Cada proceso del servidor tiene su propio búfer; al terminar el proceso se
+vacía lo pendiente. Las llegadas nunca sobrescriben asistencia ya tomada.
+"""
+import atexit
+import hashlib
+import logging
+import secrets
+import threading
+import time
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from academico.models import Clase, AsistenciaClase
+from . import asistencia
+from .models import DispositivoKiosco
+
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_VACIADO = 3
+VIGENCIA_DISPOSITIVOS = 60
+VIGENCIA_PADRON = 300
+MAXIMO_DISPOSITIVOS = 500
+ANTICIPACION_MINUTOS = 30
+
+
+class LlegadaRechazada(Exception):
+    """La llegada no se puede registrar; el mensaje se muestra en el kiosco."""
+
+
+def generar_token():
+    """Devuelve ``(token, huella)``: el token se entrega una vez, solo se guarda la huella."""
+    token = secrets.token_urlsafe(32)
+    return token, huella_token(token)
+
+
+def huella_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class _Memoria:
+    """
+    Valores calculados que se reutilizan durante ``vigencia`` segundos en este
+    proceso, hasta ``maximo`` claves. Los resultados ``None`` no se guardan
+    (un token inválido no ocupa memoria) y al guardar se descartan las claves
+    vencidas y, si sobran, las más antiguas.
+    """
+
+    def __init__(self, vigencia, maximo):
+        self.vigencia = vigencia
+        self.maximo = maximo
+        self.valores = {}
+        self.lock = threading.Lock()
+
+    def obtener(self, clave, calcular):
+        ahora = time.monotonic()
+        with self.lock:
+            guardado = self.valores.get(clave)
+        if guardado is not None and guardado[0] > ahora:
+            return guardado[1]
+        valor = calcular()
+        if valor is None:
+            return None
+        with self.lock:
+            for vencida in [c for c, (expira, _) in self.valores.items() if expira <= ahora]:
+                del self.valores[vencida]
+            self.valores.pop(clave, None)
+            self.valores[clave] = (ahora + self.vigencia, valor)
+            while len(self.valores) > self.maximo:
+                del self.valores[next(iter(self.valores))]
+        return valor
+
+    def limpiar(self):
+        with self.lock:
+            self.valores.clear()
+
+
+_dispositivos = _Memoria(VIGENCIA_DISPOSITIVOS, MAXIMO_DISPOSITIVOS)
+# Solo hace falta el padrón de hoy (y el de ayer, cerca de la medianoche)
+_padrones = _Memoria(VIGENCIA_PADRON, 2)
+
+
+def autenticar(token):
+    """``(dispositivo_id, tolerancia_minutos)`` del kiosco activo con ese token, o ``None``."""
+    if not token:
+        return None
+    huella = huella_token(token)
+    return _dispositivos.obtener(huella, lambda: DispositivoKiosco.objects.filter(
+        huella_token=huella, activo=True
+    ).values_list('pk', 'tolerancia_minutos').first())
+
+
+def padron(fecha):
+    """
+    ``{matricula: (estudiante_id, nombre, [(clase_id, curso, hora_inicio, hora_fin)])}``
+    con las clases de ``fecha`` de cada estudiante, ordenadas por hora.
+    """
+    def calcular():
+        dia = fecha.weekday()
+        if dia >= len(asistencia.DIAS_SEMANA):
+            return {}
+        estudiantes = {}
+        for fila in Clase.estudiantes.through.objects.filter(
+            clase__dia_semana=asistencia.DIAS_SEMANA[dia],
+            clase__periodo__fecha_inicio__lte=fecha,
+            clase__periodo__fecha_fin__gte=fecha,
+        ).order_by('clase__hora_inicio').values_list(
+            'estudiante__matricula', 'estudiante_id', 'estudiante__user__first_name',
+            'estudiante__user__last_name', 'clase_id', 'clase__curso__nombre',
+            'clase__hora_inicio', 'clase__hora_fin',
+        ):
+            matricula, estudiante_id, nombre, apellido = fila[:4]
+            estudiantes.setdefault(matricula, (estudiante_id, f"{nombre} {apellido}", []))[2].append(fila[4:])
+        return estudiantes
+    return _padrones.obtener(fecha, calcular)
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def elegir_clase(horarios, hora):
+    """La primera clase que aún no termina y a la que ya se puede llegar (o ``None``)."""
+    for horario in horarios:
+        inicio, fin = _minutos(horario[2]), _minutos(horario[3])
+        if inicio - ANTICIPACION_MINUTOS <= _minutos(hora) <= fin:
+            return horario
+    return None
+
+
+def estado_llegada(hora_inicio, hora, tolerancia_minutos):
+    """PRESENTE hasta ``tolerancia_minutos`` después del inicio, TARDANZA después."""
+    if _minutos(hora) <= _minutos(hora_inicio) + tolerancia_minutos:
+        return AsistenciaClase.EstadoAsistencia.PRESENTE
+    return AsistenciaClase.EstadoAsistencia.TARDANZA
+
+
+class BufferAsistencia:
+    """
+    Llegadas pendientes ``{(clase_id, estudiante_id, fecha): estado}``. Con
+    ``intervalo`` el primer registro arranca un hilo que vacía el búfer
+    periódicamente; sin él se vacía llamando a ``vaciar``.
+    """
+
+    def __init__(self, intervalo=INTERVALO_VACIADO):
+        self.intervalo = intervalo
+        self.pendientes = {}
+        self.lock = threading.Lock()
+        self.hilo = None
+
+    def agregar(self, clave, estado):
+        """Anota la llegada; devuelve ``False`` si ya estaba pendiente (vale la primera)."""
+        with self.lock:
+            if clave in self.pendientes:
+                return False
+            self.pendientes[clave] = estado
+            if self.intervalo and self.hilo is None:
+                self.hilo = threading.Thread(target=self._ciclo, name='kiosco-asistencia', daemon=True)
+                self.hilo.start()
+                atexit.register(self.vaciar)
+        return True
+
+    def vaciar(self):
+        """Guarda lo pendiente en una transacción y devuelve el número de registros nuevos."""
+        with self.lock:
+            pendientes, self.pendientes = self.pendientes, {}
+        if not pendientes:
+            return 0
+        try:
+            clases = Clase.objects.filter(pk__in={clave[0] for clave in pendientes}).only(
+                'maestro', 'periodo', 'curso'
+            )
+            return len(asistencia.guardar_registros(clases, pendientes, sobrescribir=False))
+        except Exception:
+            # Se reintenta en el siguiente ciclo; lo llegado mientras tanto tiene prioridad
+            with self.lock:
+                for clave, estado in pendientes.items():
+                    self.pendientes.setdefault(clave, estado)
+            raise
+
+    def _ciclo(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.vaciar()
+            except Exception:
+                logger.exception("No se pudo guardar la asistencia del kiosco")
+            finally:
+                close_old_connections()
+
+
+buffer = BufferAsistencia()
+
+
+def registrar_llegada(dispositivo, matricula, ahora=None):
+    """
+    Anota la llegada del estudiante con ``matricula`` a su clase en curso (o
+    la próxima) y devuelve los datos para mostrar en el kiosco.
+    """
+    ahora = timezone.localtime(ahora)
+    fecha, hora = ahora.date(), ahora.time()
+    estudiante = padron(fecha).get(matricula.strip())
+    if estudiante is None:
+        raise LlegadaRechazada("Matrícula no encontrada o sin clases hoy.")
+    estudiante_id, nombre, horarios = estudiante
+    horario = elegir_clase(horarios, hora)
+    if horario is None:
+        raise LlegadaRechazada("No tiene una clase en este horario.")
+
+    clase_id, curso, hora_inicio, _ = horario
+    estado = estado_llegada(hora_inicio, hora, dispositivo[1])
+    nueva = buffer.agregar((clase_id, estudiante_id, fecha), estado)
+    return {
+        'estudiante': nombre,
+        'clase': curso,
+        'estado': estado,
+        'estado_display': AsistenciaClase.EstadoAsistencia(estado).label,
+        'hora': f"{hora:%H:%M}",
+        'repetido': not nueva,
+    }
@@ -0,0 +1,217 @@
+"""
+Snapshots materializados de KPIs del portal del maestro (ResumenKpiCurso).
+
+Cada fila de Actividad, Entrega, AsistenciaClase, Planificacion y
+BitacoraPedagogica "aporta" contadores a la fila (maestro, periodo, curso)
+de su clase. Las señales aplican la diferencia entre el aporte anterior y el
+nuevo con actualizaciones ``F()``, así el portal lee una fila por curso.
+"""
+from collections import OrderedDict, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from academico.models import Clase, Actividad, Entrega, AsistenciaClase
+from .dashboard import (
+    CONTADORES, contadores_por_curso, contadores_vacios, clases_del_maestro,
+    actividades_del_maestro, construir_dashboard, kpi_vacio, kpi_desde_totales, sumar_contadores,
+)
+from .models import ResumenKpiCurso
+
+
+PREFIJOS_TIEMPO = {
+    'Actividad': 'actividades',
+    'Planificacion': 'planificaciones',
+    'BitacoraPedagogica': 'bitacoras',
+}
+
+
+def _clave(instance):
+    """Devuelve (maestro_id, periodo_id, curso_id) de la clase del registro."""
+    if isinstance(instance, Entrega):
+        fila = Actividad.objects.filter(pk=instance.actividad_id).values_list(
+            'clase__maestro', 'clase__periodo', 'clase__curso'
+        ).first()
+    else:
+        fila = Clase.objects.filter(pk=instance.clase_id).values_list(
+            'maestro', 'periodo', 'curso'
+        ).first()
+    if not fila or fila[0] is None:
+        return None
+    return fila
+
+
+def _aportes_tiempo(instance, prefijo):
+    datos = {f"total_{prefijo}": 1}
+    if instance.fecha_inicio_calculo and instance.fecha_fin_calculo:
+        datos[f"{prefijo}_con_tiempo"] = 1
+        segundos = (instance.fecha_fin_calculo - instance.fecha_inicio_calculo).total_seconds()
+        if segundos > 0:
+            datos[f"{prefijo}_tiempo_validos"] = 1
+            datos[f"{prefijo}_segundos"] = segundos
+    return datos
+
+
+def aportes(instance):
+    """
+    Devuelve ``(clave, contadores)`` con lo que un registro suma a su resumen,
+    o ``None`` si la clase no tiene maestro asignado.
+    """
+    clave = _clave(instance)
+    if clave is None:
+        return None
+
+    if isinstance(instance, Entrega):
+        datos = {'total_entregas': 1}
+        if instance.calificacion is not None:
+            datos['total_entregas_calificadas'] = 1
+            datos['suma_calificaciones'] = instance.calificacion
+    elif isinstance(instance, AsistenciaClase):
+        datos = {'total_asistencias': 1}
+        if instance.estado == AsistenciaClase.EstadoAsistencia.PRESENTE:
+            datos['total_presentes'] = 1
+    else:
+        datos = _aportes_tiempo(instance, PREFIJOS_TIEMPO[type(instance).__name__])
+    return clave, datos
+
+
+def aplicar_cambio(anterior, actual):
+    """
+    Aplica a los resúmenes la diferencia entre dos aportes (cualquiera puede
+    ser ``None``). Si la fila del resumen aún no existe no se crea: se
+    calculará completa la próxima vez que el maestro abra su portal.
+
+    Toda clave tocada actualiza ``fecha_actualizacion`` aunque sus contadores
+    no cambien (p. ej. al editar el título de una actividad), porque se usa
+    como versión para cachear las tarjetas del portal.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    if anterior:
+        for campo, valor in anterior[1].items():
+            deltas[anterior[0]][campo] -= valor
+    if actual:
+        for campo, valor in actual[1].items():
+            deltas[actual[0]][campo] += valor
+
+    for (maestro_id, periodo_id, curso_id), cambios in deltas.items():
+        ResumenKpiCurso.objects.filter(
+            maestro_id=maestro_id, periodo_id=periodo_id, curso_id=curso_id
+        ).update(
+            fecha_actualizacion=timezone.now(),
+            **{campo: F(campo) + valor for campo, valor in cambios.items() if valor}
+        )
+
+
+def marcar_clases_actualizadas(clases):
+    """
+    Actualiza ``fecha_actualizacion`` de los resúmenes de las clases dadas
+    (cambios de horario o de estudiantes inscritos que no mueven contadores).
+    """
+    for clase in clases:
+        if clase.maestro_id:
+            ResumenKpiCurso.objects.filter(
+                maestro_id=clase.maestro_id, periodo_id=clase.periodo_id, curso_id=clase.curso_id
+            ).update(fecha_actualizacion=timezone.now())
+
+
+def recalcular(maestro_id, periodo_id):
+    """Recalcula desde cero todos los resúmenes de un maestro en un periodo."""
+    clases = list(Clase.objects.filter(maestro_id=maestro_id, periodo_id=periodo_id).values_list('pk', 'curso_id'))
+    contadores = contadores_por_curso([pk for pk, _ in clases])
+    curso_ids = {curso_id for _, curso_id in clases}
+
+    with transaction.atomic():
+        ResumenKpiCurso.objects.filter(maestro_id=maestro_id, periodo_id=periodo_id).delete()
+        ResumenKpiCurso.objects.bulk_create([
+            ResumenKpiCurso(
+                maestro_id=maestro_id, periodo_id=periodo_id, curso_id=curso_id,
+                **contadores.get(curso_id, contadores_vacios())
+            )
+            for curso_id in curso_ids
+        ])
+    return len(curso_ids)
+
+
+def recalcular_para_clases(clase_ids):
+    """
+    Recalcula los resúmenes afectados por escrituras masivas (``bulk_create``,
+    ``bulk_update``, ``update()``) que no disparan señales.
+    """
+    pares = Clase.objects.filter(
+        pk__in=clase_ids, maestro__isnull=False
+    ).values_list('maestro_id', 'periodo_id').distinct()
+    for maestro_id, periodo_id in pares:
+        recalcular(maestro_id, periodo_id)
+
+
+def contadores_materializados(maestro, periodo, clases):
+    """
+    Lee los contadores por curso desde ResumenKpiCurso. Los cursos sin fila
+    se calculan con consultas agrupadas y se guardan para la próxima lectura.
+    """
+    curso_ids = {clase.curso_id for clase in clases}
+    contadores = {
+        resumen.curso_id: {campo: getattr(resumen, campo) for campo in CONTADORES}
+        for resumen in ResumenKpiCurso.objects.filter(maestro=maestro, periodo=periodo, curso__in=curso_ids)
+    }
+
+    faltantes = curso_ids - contadores.keys()
+    if faltantes:
+        calculados = contadores_por_curso([clase.pk for clase in clases if clase.curso_id in faltantes])
+        for curso_id in faltantes:
+            contadores[curso_id] = calculados.get(curso_id, contadores_vacios())
+        ResumenKpiCurso.objects.bulk_create([
+            ResumenKpiCurso(maestro=maestro, periodo=periodo, curso_id=curso_id, **contadores[curso_id])
+            for curso_id in faltantes
+        ], ignore_conflicts=True)
+    return contadores
+
+
+def kpi_maestro(maestro, periodo):
+    """
+    KPIs globales y lista liviana de cursos para el esqueleto del portal.
+
+    No carga estudiantes ni actividades: usa la lista de clases, un conteo
+    de estudiantes distintos y los resúmenes materializados. Devuelve
+    ``(kpi, cursos)`` donde cada curso es ``{'curso': ..., 'clases': [...]}``.
+    """
+    if not periodo or not maestro:
+        return kpi_vacio(), []
+    clases = list(
+        Clase.objects.filter(maestro=maestro, periodo=periodo).select_related('curso').order_by('curso__nombre')
+    )
+    if not clases:
+        return kpi_vacio(), []
+
+    cursos = OrderedDict()
+    for clase in clases:
+        cursos.setdefault(clase.curso_id, {'curso': clase.curso, 'clases': []})['clases'].append(clase)
+
+    total_estudiantes = Clase.estudiantes.through.objects.filter(
+        clase__in=clases
+    ).values('estudiante').distinct().count()
+    contadores = contadores_materializados(maestro, periodo, clases)
+    kpi = kpi_desde_totales(sumar_contadores(contadores.values()), len(clases), len(cursos), total_estudiantes)
+    return kpi, list(cursos.values())
+
+
+def tarjeta_curso(maestro, periodo, curso_id):
+    """
+    Estadísticas, estudiantes y actividades de un solo curso del maestro.
+    Devuelve ``None`` si el maestro no imparte el curso en el periodo.
+    """
+    clases = clases_del_maestro(maestro, periodo, curso_id=curso_id)
+    if not clases:
+        return None
+    contadores = contadores_materializados(maestro, periodo, clases)
+    _, cursos = construir_dashboard(clases, actividades_del_maestro([clase.pk for clase in clases]), contadores)
+    return cursos[0]
+
+
+def version_resumen(maestro, periodo, curso_id):
+    """Marca de tiempo del resumen del curso, usada como versión de caché."""
+    fecha = ResumenKpiCurso.objects.filter(
+        maestro=maestro, periodo=periodo, curso_id=curso_id
+    ).values_list('fecha_actualizacion', flat=True).first()
+    return fecha.timestamp() if fecha else 0
@@ -0,0 +1,121 @@
+"""
+Libro de notas de una clase: matriz estudiantes × actividades.
+
+Las calificaciones se leen con una sola consulta de tuplas
+``(estudiante_id, actividad_id, calificacion)`` y se colocan en un arreglo
+de numpy (``NaN`` = sin calificar), del que salen los promedios por fila y
+por columna. Las exportaciones recorren la matriz fila por fila para no
+armar el archivo completo en memoria.
+"""
+import csv
+import tempfile
+
+import numpy as np
+
+from academico.models import Actividad, Entrega
+from users.models import Estudiante
+
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    Workbook = None
+
+
+def _redondear(valor):
+    return None if np.isnan(valor) else round(float(valor), 2)
+
+
+class MatrizCalificaciones:
+    """Calificaciones densas de una clase con sus encabezados."""
+
+    def __init__(self, clase):
+        self.clase = clase
+        self.estudiantes = list(
+            Estudiante.objects.filter(clases_inscritas=clase).order_by(
+                'user__last_name', 'user__first_name'
+            ).values_list('pk', 'user__first_name', 'user__last_name')
+        )
+        self.actividades = list(
+            Actividad.objects.filter(clase=clase).order_by('fecha_entrega', 'pk').values_list('pk', 'titulo')
+        )
+        fila = {pk: i for i, (pk, _, _) in enumerate(self.estudiantes)}
+        columna = {pk: j for j, (pk, _) in enumerate(self.actividades)}
+
+        self.valores = np.full((len(self.estudiantes), len(self.actividades)), np.nan)
+        entregas = Entrega.objects.filter(
+            actividad__clase=clase, calificacion__isnull=False
+        ).values_list('estudiante_id', 'actividad_id', 'calificacion')
+        for estudiante_id, actividad_id, calificacion in entregas:
+            # Entregas de estudiantes ya no inscritos no entran en la matriz
+            if estudiante_id in fila:
+                self.valores[fila[estudiante_id], columna[actividad_id]] = calificacion
+
+    def _promedios(self, eje):
+        if self.valores.size == 0:
+            return [None] * self.valores.shape[1 - eje]
+        calificadas = np.sum(~np.isnan(self.valores), axis=eje)
+        sumas = np.nansum(self.valores, axis=eje)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return [_redondear(v) for v in np.where(calificadas > 0, sumas / calificadas, np.nan)]
+
+    @property
+    def promedios_estudiantes(self):
+        return self._promedios(eje=1)
+
+    @property
+    def promedios_actividades(self):
+        return self._promedios(eje=0)
+
+    @property
+    def promedio_general(self):
+        if np.isnan(self.valores).all():
+            return None
+        return _redondear(np.nanmean(self.valores))
+
+    def encabezados(self):
+        return ['Estudiante'] + [titulo for _, titulo in self.actividades] + ['Promedio']
+
+    def filas(self):
+        """Genera ``(nombre, [calificaciones], promedio)`` por estudiante."""
+        promedios = self.promedios_estudiantes
+        for i, (_, nombre, apellido) in enumerate(self.estudiantes):
+            yield f"{apellido}, {nombre}", [_redondear(v) for v in self.valores[i]], promedios[i]
+
+    def filas_exportacion(self):
+        """Encabezado, una fila por estudiante y la fila de promedios por actividad."""
+        yield self.encabezados()
+        for nombre, valores, promedio in self.filas():
+            yield [nombre, *valores, promedio]
+        yield ['Promedio', *self.promedios_actividades, self.promedio_general]
+
+
+class _Eco:
+    """Pseudo-archivo para ``csv.writer``: devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def exportar_csv(matriz):
+    """Generador de líneas CSV para ``StreamingHttpResponse``."""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff'  # BOM para que Excel detecte UTF-8
+    for fila in matriz.filas_exportacion():
+        yield escritor.writerow(['' if valor is None else valor for valor in fila])
+
+
+def exportar_xlsx(matriz):
+    """
+    Escribe la matriz en un libro de openpyxl en modo ``write_only`` (las filas
+    van directo a disco) y devuelve el archivo temporal abierto al inicio.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title='Calificaciones')
+    for fila in matriz.filas_exportacion():
+        hoja.append(fila)
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return archivo
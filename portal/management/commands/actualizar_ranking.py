@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from academico.models import PeriodoAcademico
+from portal import ranking
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el ranking (posición y percentil por grado y por curso) de los estudiantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodo',
+            type=int,
+            help='Solo recalcula el ranking de este periodo (pk); por defecto, el más reciente',
+        )
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Recalcula el ranking de todos los periodos',
+        )
+
+    def handle(self, *args, **options):
+        if options['todos']:
+            periodos = list(PeriodoAcademico.objects.order_by('fecha_inicio'))
+        elif options['periodo']:
+            periodos = list(PeriodoAcademico.objects.filter(pk=options['periodo']))
+            if not periodos:
+                raise CommandError(f"No existe el periodo {options['periodo']}")
+        else:
+            periodos = list(PeriodoAcademico.objects.order_by('-fecha_inicio')[:1])
+
+        for periodo in periodos:
+            inicio = time.monotonic()
+            filas = ranking.actualizar(periodo)
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ {periodo.nombre}: {filas} posiciones en {time.monotonic() - inicio:.1f} s")
+            )
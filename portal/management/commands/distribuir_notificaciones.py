@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from portal import notificaciones
+from portal.models import Notificacion
+
+
+class Command(BaseCommand):
+    help = 'Copia las notificaciones pendientes a las bandejas de sus destinatarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Vuelve a distribuir también las notificaciones ya distribuidas',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=notificaciones.TAMANO_LOTE,
+            help='Cantidad de filas por cada inserción masiva',
+        )
+
+    def handle(self, *args, **options):
+        pendientes = Notificacion.objects.order_by('pk')
+        if not options['todas']:
+            pendientes = pendientes.filter(fecha_distribucion__isnull=True)
+
+        total_notificaciones = 0
+        total_destinatarios = 0
+        for notificacion in pendientes.iterator():
+            total_destinatarios += notificaciones.distribuir(notificacion, tamano_lote=options['lote'])
+            total_notificaciones += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {total_notificaciones} notificaciones distribuidas a {total_destinatarios} destinatarios"
+            )
+        )
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from academico.models import Grado, PeriodoAcademico
+from portal import boletas
+
+
+class Command(BaseCommand):
+    help = 'Genera en PDF las boletas de un periodo o de un grado, omitiendo las que no cambiaron'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodo',
+            type=int,
+            help='Periodo (pk); por defecto, el del grado o el más reciente',
+        )
+        parser.add_argument(
+            '--grado',
+            type=int,
+            help='Solo genera las boletas de los estudiantes de este grado (pk)',
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=None,
+            help='Procesos de trabajo (por defecto, uno por CPU)',
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Regenera también las boletas cuyos datos no cambiaron',
+        )
+
+    def handle(self, *args, **options):
+        grado = None
+        if options['grado']:
+            grado = Grado.objects.select_related('periodo').filter(pk=options['grado']).first()
+            if grado is None:
+                raise CommandError(f"No existe el grado {options['grado']}")
+
+        if options['periodo']:
+            periodo = PeriodoAcademico.objects.filter(pk=options['periodo']).first()
+            if periodo is None:
+                raise CommandError(f"No existe el periodo {options['periodo']}")
+        elif grado:
+            periodo = grado.periodo
+        else:
+            periodo = PeriodoAcademico.objects.order_by('-fecha_inicio').first()
+            if periodo is None:
+                raise CommandError("No hay periodos académicos")
+
+        inicio = time.monotonic()
+        try:
+            resultado = boletas.generar(
+                periodo, grado=grado, procesos=options['procesos'], forzar=options['forzar']
+            )
+        except boletas.GeneracionNoDisponible as error:
+            raise CommandError(str(error))
+
+        for matricula, error in resultado.errores:
+            self.stderr.write(f"  {matricula}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {periodo.nombre}: {resultado.generadas} boletas generadas, {resultado.omitidas} sin cambios, "
+            f"{len(resultado.errores)} con error en {time.monotonic() - inicio:.1f} s"
+        ))
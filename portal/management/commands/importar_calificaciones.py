@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from academico.models import Clase
+from portal import importacion
+
+
+class Command(BaseCommand):
+    help = 'Importa calificaciones de un archivo CSV o XLSX (matricula, actividad, calificacion, comentario) a una clase'
+
+    def add_arguments(self, parser):
+        parser.add_argument('clase', type=int, help='pk de la clase')
+        parser.add_argument('archivo', help='Ruta del archivo CSV o XLSX')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=importacion.TAMANO_LOTE,
+            help='Entregas por cada inserción masiva',
+        )
+
+    def handle(self, *args, **options):
+        clase = Clase.objects.select_related('curso').filter(pk=options['clase']).first()
+        if clase is None:
+            raise CommandError(f"No existe la clase {options['clase']}")
+
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importacion.importar_calificaciones(
+                    clase, importacion.leer_archivo(archivo, options['archivo']), tamano_lote=options['lote']
+                )
+        except OSError as error:
+            raise CommandError(f"No se pudo abrir el archivo: {error}")
+        except importacion.ArchivoInvalido as error:
+            raise CommandError(str(error))
+
+        for linea, mensaje in resultado.errores:
+            self.stdout.write(self.style.WARNING(f"  Línea {linea}: {mensaje}"))
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ {resultado.guardadas} calificaciones importadas en {clase.curso.nombre}")
+        )
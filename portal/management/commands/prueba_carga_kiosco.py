@@ -0,0 +1,77 @@
+import json
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib import error, request
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from portal import kiosco
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga del registro de llegada en kioscos contra un servidor en marcha. '
+        'Registra asistencia real: úsese en un entorno de pruebas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='URL base del servidor, p. ej. http://localhost:8000')
+        parser.add_argument('--token', required=True, help='Token del dispositivo kiosco')
+        parser.add_argument(
+            '--solicitudes',
+            type=int,
+            default=2000,
+            help='Número total de llegadas a enviar',
+        )
+        parser.add_argument(
+            '--concurrencia',
+            type=int,
+            default=50,
+            help='Solicitudes simultáneas',
+        )
+        parser.add_argument(
+            '--matricula',
+            action='append',
+            help='Matrícula a usar (se puede repetir); por defecto, las del padrón de hoy',
+        )
+
+    def handle(self, *args, **options):
+        matriculas = options['matricula'] or sorted(kiosco.padron(timezone.localdate()))
+        if not matriculas:
+            raise CommandError("No hay estudiantes con clases hoy; indique matrículas con --matricula")
+        url = options['url'].rstrip('/') + reverse('kiosco_llegada')
+        cabeceras = {'Authorization': f"Token {options['token']}", 'Content-Type': 'application/json'}
+
+        def enviar(indice):
+            cuerpo = json.dumps({'matricula': matriculas[indice % len(matriculas)]}).encode()
+            inicio = time.perf_counter()
+            try:
+                with request.urlopen(request.Request(url, cuerpo, cabeceras), timeout=30) as respuesta:
+                    codigo = respuesta.status
+            except error.HTTPError as respuesta:
+                codigo = respuesta.code
+            except OSError:
+                codigo = 'sin respuesta'
+            return codigo, time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrencia']) as ejecutor:
+            resultados = list(ejecutor.map(enviar, range(options['solicitudes'])))
+        duracion = time.perf_counter() - inicio
+
+        codigos = Counter(codigo for codigo, _ in resultados)
+        latencias = sorted(segundos * 1000 for _, segundos in resultados)
+        percentiles = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99
+        self.stdout.write(f"Códigos de respuesta: {dict(codigos)}")
+        self.stdout.write(
+            f"Latencia (ms): p50 {percentiles[49]:.1f} · p95 {percentiles[94]:.1f} · "
+            f"p99 {percentiles[98]:.1f} · máx {latencias[-1]:.1f}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {len(resultados)} llegadas en {duracion:.1f} s "
+            f"({len(resultados) / duracion:.0f} solicitudes/s, concurrencia {options['concurrencia']})"
+        ))
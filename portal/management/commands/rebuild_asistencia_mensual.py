@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from portal import asistencia_mensual
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye (o repara) la asistencia mensual compacta a partir de los registros de asistencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clase',
+            type=int,
+            action='append',
+            help='Solo reconstruye la asistencia de esta clase (pk); se puede repetir',
+        )
+
+    def handle(self, *args, **options):
+        filas = asistencia_mensual.reconstruir(options['clase'])
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ {filas} filas de asistencia mensual reconstruidas")
+        )
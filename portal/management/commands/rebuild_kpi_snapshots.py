@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from academico.models import Clase
+from portal import kpi
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye (o repara) los resúmenes de KPIs del portal del maestro'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--maestro',
+            type=int,
+            help='Solo reconstruye los resúmenes de este maestro (pk)',
+        )
+        parser.add_argument(
+            '--periodo',
+            type=int,
+            help='Solo reconstruye los resúmenes de este periodo (pk)',
+        )
+
+    def handle(self, *args, **options):
+        clases = Clase.objects.filter(maestro__isnull=False)
+        if options['maestro']:
+            clases = clases.filter(maestro_id=options['maestro'])
+        if options['periodo']:
+            clases = clases.filter(periodo_id=options['periodo'])
+
+        pares = list(clases.values_list('maestro_id', 'periodo_id').distinct().order_by())
+        self.stdout.write(f"Reconstruyendo resúmenes para {len(pares)} combinaciones maestro/periodo")
+
+        total_filas = 0
+        for maestro_id, periodo_id in pares:
+            total_filas += kpi.recalcular(maestro_id, periodo_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ {total_filas} resúmenes por curso reconstruidos")
+        )
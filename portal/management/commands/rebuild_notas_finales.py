@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from academico.models import Clase
+from portal import dominio, historial, notas_finales
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye (o repara) las notas finales ponderadas, el dominio de competencias y el historial académico de los estudiantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--curso',
+            type=int,
+            help='Solo reconstruye las notas de este curso (pk)',
+        )
+        parser.add_argument(
+            '--periodo',
+            type=int,
+            help='Solo reconstruye las notas de este periodo (pk)',
+        )
+
+    def handle(self, *args, **options):
+        clases = Clase.objects.all()
+        if options['curso']:
+            clases = clases.filter(curso_id=options['curso'])
+        if options['periodo']:
+            clases = clases.filter(periodo_id=options['periodo'])
+
+        pares = list(clases.values_list('curso_id', 'periodo_id').distinct().order_by())
+        self.stdout.write(f"Reconstruyendo notas finales para {len(pares)} combinaciones curso/periodo")
+
+        total = dominios = 0
+        for curso_id, periodo_id in pares:
+            total += notas_finales.recalcular(curso_id, periodo_id, actualizar_historial=False)
+            dominios += dominio.recalcular(curso_id, periodo_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ {total} notas finales reconstruidas")
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ {dominios} dominios de competencia reconstruidos")
+        )
+
+        # El historial acumula todos los periodos: se reconstruye completo una sola vez
+        resumenes = historial.actualizar()
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ {resumenes} resúmenes académicos reconstruidos")
+        )
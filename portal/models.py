@@ -18,6 +18,7 @@ class Noticia(models.Model):
         limit_choices_to={'user_type': 'ADMIN'} # Solo los admins pueden ser autores
     )
     publicado = models.BooleanField(default=True, verbose_name="¿Está publicado?")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Noticia"
@@ -49,8 +50,31 @@ class Notificacion(models.Model):
         default=TargetAudiencia.TODOS,
         verbose_name="Dirigido a"
     )
+    grado = models.ForeignKey(
+        'academico.Grado',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notificaciones',
+        verbose_name="Solo para el grado",
+        help_text="Opcional. Limita la audiencia a los miembros de este grado."
+    )
+    clase = models.ForeignKey(
+        'academico.Clase',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notificaciones',
+        verbose_name="Solo para la clase",
+        help_text="Opcional. Limita la audiencia a los miembros de esta clase."
+    )
     mensaje = models.TextField(verbose_name="Contenido del Mensaje")
     fecha_envio = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    fecha_distribucion = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Momento en que se copió a las bandejas de los destinatarios."
+    )
     
     class Meta:
         verbose_name = "Notificación"
@@ -58,4 +82,283 @@ class Notificacion(models.Model):
         ordering = ['-fecha_envio']
 
     def __str__(self):
-        return f"Notificación para {self.get_audiencia_display()} por {self.autor.username}"
\ No newline at end of file
+        return f"Notificación para {self.get_audiencia_display()} por {self.autor.username}"
+
+class NotificacionUsuario(models.Model):
+    """
+    Copia de una notificación en la bandeja de un usuario, con su estado de
+    lectura. Se llena por lotes con ``portal.notificaciones.distribuir``.
+    """
+    notificacion = models.ForeignKey(Notificacion, on_delete=models.CASCADE, related_name='destinatarios')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bandeja_notificaciones')
+    leida = models.BooleanField(default=False)
+    fecha_lectura = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Notificación de Usuario"
+        verbose_name_plural = "Notificaciones de Usuarios"
+        unique_together = ('notificacion', 'usuario')
+        indexes = [
+            # Contador de no leídas y paginación por id descendente
+            models.Index(fields=['usuario', 'leida', 'id'], name='notif_usuario_leida_idx'),
+            models.Index(fields=['usuario', 'id'], name='notif_usuario_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.notificacion} -> {self.usuario.username}"
+
+
+class ResumenKpiCurso(models.Model):
+    """
+    Snapshot materializado de los KPIs del portal del maestro para un curso
+    en un periodo. Se mantiene con contadores incrementales (ver portal/signals.py)
+    y se repara con el comando ``rebuild_kpi_snapshots``.
+    """
+    maestro = models.ForeignKey('users.Maestro', on_delete=models.CASCADE, related_name='resumenes_kpi')
+    periodo = models.ForeignKey('academico.PeriodoAcademico', on_delete=models.CASCADE, related_name='resumenes_kpi')
+    curso = models.ForeignKey('academico.Curso', on_delete=models.CASCADE, related_name='resumenes_kpi')
+
+    total_actividades = models.IntegerField(default=0)
+    total_entregas = models.IntegerField(default=0)
+    total_entregas_calificadas = models.IntegerField(default=0)
+    suma_calificaciones = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_asistencias = models.IntegerField(default=0)
+    total_presentes = models.IntegerField(default=0)
+    total_planificaciones = models.IntegerField(default=0)
+    total_bitacoras = models.IntegerField(default=0)
+
+    # --- Tiempo de llenado (running sums de duraciones positivas) ---
+    bitacoras_con_tiempo = models.IntegerField(default=0)
+    bitacoras_tiempo_validos = models.IntegerField(default=0)
+    bitacoras_segundos = models.FloatField(default=0)
+    actividades_con_tiempo = models.IntegerField(default=0)
+    actividades_tiempo_validos = models.IntegerField(default=0)
+    actividades_segundos = models.FloatField(default=0)
+    planificaciones_con_tiempo = models.IntegerField(default=0)
+    planificaciones_tiempo_validos = models.IntegerField(default=0)
+    planificaciones_segundos = models.FloatField(default=0)
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen KPI por Curso"
+        verbose_name_plural = "Resúmenes KPI por Curso"
+        unique_together = ('maestro', 'periodo', 'curso')
+
+    def __str__(self):
+        return f"KPI {self.curso} - {self.periodo} ({self.maestro})"
+
+
+class NotaFinal(models.Model):
+    """
+    Nota final ponderada de un estudiante en un curso y periodo. ``acumulados``
+    guarda por categoría ``[suma de calificación × peso, suma de pesos]`` para
+    que calificar una entrega solo aplique la diferencia (ver portal/notas_finales.py).
+    Se repara con el comando ``rebuild_notas_finales``.
+    """
+    estudiante = models.ForeignKey('users.Estudiante', on_delete=models.CASCADE, related_name='notas_finales')
+    curso = models.ForeignKey('academico.Curso', on_delete=models.CASCADE, related_name='notas_finales')
+    periodo = models.ForeignKey('academico.PeriodoAcademico', on_delete=models.CASCADE, related_name='notas_finales')
+    acumulados = models.JSONField(default=dict)
+    nota = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Nota Final"
+        verbose_name_plural = "Notas Finales"
+        unique_together = ('estudiante', 'curso', 'periodo')
+        indexes = [
+            # Boleta: todas las notas de un estudiante en un periodo
+            models.Index(fields=['estudiante', 'periodo'], name='nota_final_estudiante_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante} - {self.curso} ({self.periodo}): {self.nota}"
+
+
+class PosicionRanking(models.Model):
+    """
+    Posición de un estudiante dentro de su Grado (por promedio general) o
+    dentro de un curso (por nota final) en un periodo. La tabla completa del
+    periodo se regenera con el comando ``actualizar_ranking``.
+    """
+    class Ambito(models.TextChoices):
+        GRADO = 'GRADO', 'Grado'
+        CURSO = 'CURSO', 'Curso'
+
+    estudiante = models.ForeignKey('users.Estudiante', on_delete=models.CASCADE, related_name='posiciones_ranking')
+    periodo = models.ForeignKey('academico.PeriodoAcademico', on_delete=models.CASCADE, related_name='posiciones_ranking')
+    ambito = models.CharField(max_length=5, choices=Ambito.choices)
+    grado = models.ForeignKey('academico.Grado', on_delete=models.CASCADE, null=True, blank=True, related_name='posiciones_ranking')
+    curso = models.ForeignKey('academico.Curso', on_delete=models.CASCADE, null=True, blank=True, related_name='posiciones_ranking')
+    promedio = models.DecimalField(max_digits=5, decimal_places=2)
+    posicion = models.PositiveIntegerField()
+    total = models.PositiveIntegerField()
+    percentil = models.DecimalField(max_digits=5, decimal_places=2)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Posición en Ranking"
+        verbose_name_plural = "Posiciones en Ranking"
+        indexes = [
+            models.Index(fields=['estudiante', 'periodo'], name='ranking_estudiante_idx'),
+            models.Index(fields=['periodo', 'ambito'], name='ranking_periodo_idx'),
+        ]
+
+    def __str__(self):
+        grupo = self.grado if self.ambito == self.Ambito.GRADO else self.curso
+        return f"{self.estudiante} - {grupo} ({self.periodo}): {self.posicion}/{self.total}"
+
+
+class ResumenAcademico(models.Model):
+    """
+    Historial académico de un estudiante por periodo: créditos cursados y
+    promedio ponderado por créditos (escala de las notas, 0-100), del periodo
+    y acumulado hasta él. Se deriva de NotaFinal y se actualiza cuando
+    cambian sus notas (ver portal/historial.py).
+    """
+    estudiante = models.ForeignKey('users.Estudiante', on_delete=models.CASCADE, related_name='resumenes_academicos')
+    periodo = models.ForeignKey('academico.PeriodoAcademico', on_delete=models.CASCADE, related_name='resumenes_academicos')
+
+    creditos = models.PositiveIntegerField(default=0)
+    puntos = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    promedio = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    creditos_acumulados = models.PositiveIntegerField(default=0)
+    puntos_acumulados = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    promedio_acumulado = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen Académico"
+        verbose_name_plural = "Resúmenes Académicos"
+        unique_together = ('estudiante', 'periodo')
+        indexes = [
+            # Cuadro de honor: mejores promedios de un periodo
+            models.Index(fields=['periodo', 'promedio'], name='resumen_acad_promedio_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante} - {self.periodo}: {self.promedio} ({self.creditos} créditos)"
+
+
+class BoletaGenerada(models.Model):
+    """
+    Último PDF de la boleta de un estudiante en un periodo. ``huella`` es el
+    SHA-256 de los datos con que se generó: si no cambian, la boleta no se
+    vuelve a generar (ver portal/boletas.py).
+    """
+    estudiante = models.ForeignKey('users.Estudiante', on_delete=models.CASCADE, related_name='boletas')
+    periodo = models.ForeignKey('academico.PeriodoAcademico', on_delete=models.CASCADE, related_name='boletas')
+    archivo = models.FileField(upload_to='boletas/')
+    huella = models.CharField(max_length=64)
+    fecha_generacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Boleta Generada"
+        verbose_name_plural = "Boletas Generadas"
+        unique_together = ('estudiante', 'periodo')
+
+    def __str__(self):
+        return f"Boleta de {self.estudiante} - {self.periodo}"
+
+
+class DominioCompetencia(models.Model):
+    """
+    Dominio de una competencia por estudiante y periodo: promedio ponderado
+    (por el peso de cada actividad) de las calificaciones de las actividades
+    vinculadas a la competencia. Se actualiza incrementalmente con cada
+    calificación (ver portal/dominio.py).
+    """
+    estudiante = models.ForeignKey('users.Estudiante', on_delete=models.CASCADE, related_name='dominios_competencia')
+    competencia = models.ForeignKey('academico.Competencia', on_delete=models.CASCADE, related_name='dominios')
+    periodo = models.ForeignKey('academico.PeriodoAcademico', on_delete=models.CASCADE, related_name='dominios_competencia')
+
+    suma = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    pesos = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    evaluaciones = models.PositiveIntegerField(default=0)
+    nivel = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Dominio de Competencia"
+        verbose_name_plural = "Dominios de Competencias"
+        unique_together = ('estudiante', 'competencia', 'periodo')
+        indexes = [
+            # Mapa de calor: todas las competencias de un curso en un periodo
+            models.Index(fields=['periodo', 'competencia'], name='dominio_comp_periodo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante} - {self.competencia_id} ({self.periodo}): {self.nivel}"
+
+
+class AsistenciaMensual(models.Model):
+    """
+    Asistencia compacta de un estudiante en una clase durante un mes:
+    ``estados`` guarda un carácter por día (el código de
+    AsistenciaClase.EstadoAsistencia, o ``-`` sin registro). Se mantiene junto
+    con AsistenciaClase (ver portal/asistencia_mensual.py) y alimenta los
+    calendarios de asistencia.
+    """
+    estudiante = models.ForeignKey('users.Estudiante', on_delete=models.CASCADE, related_name='asistencias_mensuales')
+    clase = models.ForeignKey('academico.Clase', on_delete=models.CASCADE, related_name='asistencias_mensuales')
+    mes = models.DateField(verbose_name="Mes (primer día)")
+    estados = models.CharField(max_length=31, default='')
+
+    class Meta:
+        verbose_name = "Asistencia Mensual"
+        verbose_name_plural = "Asistencias Mensuales"
+        unique_together = ('estudiante', 'clase', 'mes')
+        indexes = [
+            # Calendario de un estudiante: sus meses de un periodo
+            models.Index(fields=['estudiante', 'mes'], name='asistencia_mensual_est_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante} - {self.clase_id} ({self.mes:%m/%Y})"
+
+
+class LoteSincronizacion(models.Model):
+    """
+    Lote de asistencia enviado por un maestro con una clave de idempotencia
+    generada en el cliente. Guarda la respuesta para devolverla tal cual si
+    el mismo lote se reenvía (ver portal/sincronizacion.py).
+    """
+    maestro = models.ForeignKey('users.Maestro', on_delete=models.CASCADE, related_name='lotes_sincronizacion')
+    clave = models.CharField(max_length=64)
+    respuesta = models.JSONField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Lote de Sincronización"
+        verbose_name_plural = "Lotes de Sincronización"
+        unique_together = ('maestro', 'clave')
+
+    def __str__(self):
+        return f"{self.maestro} - {self.clave}"
+
+
+class DispositivoKiosco(models.Model):
+    """
+    Kiosco de registro de llegada (tableta en la entrada). Se autentica con un
+    token propio en lugar de una sesión; solo se guarda su huella SHA-256
+    (ver portal/kiosco.py).
+    """
+    nombre = models.CharField(max_length=100)
+    huella_token = models.CharField(max_length=64, unique=True, editable=False)
+    activo = models.BooleanField(default=True)
+    tolerancia_minutos = models.PositiveSmallIntegerField(
+        default=10, verbose_name="Tolerancia (minutos)",
+        help_text="Minutos después del inicio de la clase en que la llegada aún cuenta como presente.",
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Dispositivo Kiosco"
+        verbose_name_plural = "Dispositivos Kiosco"
+
+    def __str__(self):
+        return self.nombre
@@ -0,0 +1,209 @@
+"""
+Notas finales ponderadas por categoría (NotaFinal).
+
+Cada curso define su esquema con CategoriaCalificacion (p. ej. Exámenes 40 %,
+Tareas 30 %) y cada Actividad pertenece a una categoría con un peso propio
+dentro de ella. Por estudiante, curso y periodo se guarda en ``acumulados``
+``{categoria: [suma de calificación × peso, suma de pesos]}``: calificar una
+entrega solo suma la diferencia en su categoría y vuelve a combinar las
+categorías con el esquema del curso, sin recorrer las demás entregas.
+
+Las actividades sin categoría se agrupan bajo ``SIN_CATEGORIA`` y pesan lo
+que le falte al esquema para llegar a 100 (todo, si el curso no tiene
+esquema; así la nota es el promedio simple de siempre).
+
+Cada cambio en las notas finales actualiza también el historial académico
+del estudiante (portal/historial.py).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from academico.models import Clase, Actividad, Entrega, CategoriaCalificacion
+from . import historial
+from .models import NotaFinal
+
+
+SIN_CATEGORIA = '0'
+CERO = Decimal(0)
+CENTESIMOS = Decimal('0.01')
+
+
+def _categoria(categoria_id):
+    # Las claves de un JSONField siempre son cadenas
+    return str(categoria_id) if categoria_id else SIN_CATEGORIA
+
+
+def esquema(curso_id):
+    """``{categoria: peso}`` del curso, incluida la parte sin categoría."""
+    pesos = {
+        _categoria(pk): peso
+        for pk, peso in CategoriaCalificacion.objects.filter(curso_id=curso_id).values_list('pk', 'peso')
+    }
+    pesos[SIN_CATEGORIA] = max(Decimal(100) - sum(pesos.values(), CERO), CERO)
+    return pesos
+
+
+def calcular_nota(acumulados, pesos):
+    """
+    Promedio de cada categoría combinado con su peso. Las categorías sin
+    calificaciones no cuentan y el resto se re-normaliza.
+    """
+    ponderado = total = CERO
+    for categoria, (suma, pesos_actividades) in acumulados.items():
+        peso = pesos.get(categoria, CERO)
+        pesos_actividades = Decimal(pesos_actividades)
+        if peso > 0 and pesos_actividades > 0:
+            ponderado += peso * Decimal(suma) / pesos_actividades
+            total += peso
+    if not total:
+        return None
+    return (ponderado / total).quantize(CENTESIMOS)
+
+
+def aporte(entrega):
+    """
+    Devuelve ``(clave, categoria, calificación × peso, peso)`` de una entrega
+    calificada, con ``clave = (estudiante_id, curso_id, periodo_id)``, o ``None``.
+    """
+    if entrega.calificacion is None:
+        return None
+    fila = Actividad.objects.filter(pk=entrega.actividad_id).values_list(
+        'clase__curso', 'clase__periodo', 'categoria', 'peso'
+    ).first()
+    if not fila:
+        return None
+    curso_id, periodo_id, categoria_id, peso = fila
+    return (entrega.estudiante_id, curso_id, periodo_id), _categoria(categoria_id), entrega.calificacion * peso, peso
+
+
+def aplicar_cambio(anterior, actual):
+    """Aplica a las notas finales la diferencia entre dos aportes (cualquiera puede ser ``None``)."""
+    deltas = defaultdict(lambda: defaultdict(lambda: [CERO, CERO]))
+    for signo, datos in ((-1, anterior), (1, actual)):
+        if datos:
+            clave, categoria, suma, peso = datos
+            deltas[clave][categoria][0] += signo * suma
+            deltas[clave][categoria][1] += signo * peso
+
+    for clave, cambios in deltas.items():
+        cambios = {categoria: valores for categoria, valores in cambios.items() if any(valores)}
+        if cambios:
+            _aplicar(clave, cambios)
+
+
+def _aplicar(clave, cambios):
+    estudiante_id, curso_id, periodo_id = clave
+    with transaction.atomic():
+        # El estudiante se bloquea antes que su nota, igual que en historial.actualizar
+        historial.bloquear([estudiante_id])
+        nota = NotaFinal.objects.select_for_update().filter(
+            estudiante_id=estudiante_id, curso_id=curso_id, periodo_id=periodo_id
+        ).first()
+        if nota is None:
+            # Primera calificación (o fila perdida): se calcula solo para este estudiante
+            recalcular(curso_id, periodo_id, [estudiante_id])
+            return
+
+        for categoria, (suma, peso) in cambios.items():
+            suma_actual, peso_actual = nota.acumulados.get(categoria, (0, 0))
+            suma, peso = Decimal(suma_actual) + suma, Decimal(peso_actual) + peso
+            if peso or suma:
+                nota.acumulados[categoria] = [str(suma), str(peso)]
+            else:
+                nota.acumulados.pop(categoria, None)
+        nota.nota = calcular_nota(nota.acumulados, esquema(curso_id))
+        nota.save(update_fields=['acumulados', 'nota', 'fecha_actualizacion'])
+        historial.actualizar([estudiante_id])
+
+
+def recalcular(curso_id, periodo_id, estudiante_ids=None, actualizar_historial=True):
+    """
+    Recalcula desde las entregas las notas de un curso en un periodo (o solo
+    las de ``estudiante_ids``). Se usa para reparar y tras escrituras masivas
+    que no disparan señales. Con ``actualizar_historial=False`` el historial
+    queda a cargo de quien llama (p. ej. una reconstrucción completa).
+    """
+    entregas = Entrega.objects.filter(
+        actividad__clase__curso_id=curso_id,
+        actividad__clase__periodo_id=periodo_id,
+        calificacion__isnull=False,
+    )
+    notas = NotaFinal.objects.filter(curso_id=curso_id, periodo_id=periodo_id)
+    if estudiante_ids is not None:
+        estudiante_ids = list(estudiante_ids)
+        entregas = entregas.filter(estudiante_id__in=estudiante_ids)
+        notas = notas.filter(estudiante_id__in=estudiante_ids)
+
+    sumas = entregas.values('estudiante_id', 'actividad__categoria_id').annotate(
+        suma=Sum(ExpressionWrapper(
+            F('calificacion') * F('actividad__peso'),
+            output_field=DecimalField(max_digits=12, decimal_places=4),
+        )),
+        pesos=Sum('actividad__peso'),
+    ).order_by()
+
+    acumulados = defaultdict(dict)
+    for fila in sumas:
+        acumulados[fila['estudiante_id']][_categoria(fila['actividad__categoria_id'])] = [
+            str(fila['suma']), str(fila['pesos'])
+        ]
+
+    pesos = esquema(curso_id)
+    with transaction.atomic():
+        if estudiante_ids is not None:
+            historial.bloquear(estudiante_ids)
+        afectados = set(notas.values_list('estudiante_id', flat=True)) | set(acumulados)
+        notas.delete()
+        NotaFinal.objects.bulk_create([
+            NotaFinal(
+                estudiante_id=estudiante_id, curso_id=curso_id, periodo_id=periodo_id,
+                acumulados=datos, nota=calcular_nota(datos, pesos),
+            )
+            for estudiante_id, datos in acumulados.items()
+        ])
+        if actualizar_historial:
+            historial.actualizar(afectados)
+    return len(acumulados)
+
+
+def recalcular_actividad(actividad, clase_ids):
+    """
+    Cuando cambia la categoría, el peso o la clase de una actividad, recalcula
+    las notas de los estudiantes que tienen esa actividad calificada.
+    """
+    estudiante_ids = list(
+        Entrega.objects.filter(actividad=actividad, calificacion__isnull=False).values_list('estudiante_id', flat=True)
+    )
+    if not estudiante_ids:
+        return
+    pares = Clase.objects.filter(pk__in=clase_ids).values_list('curso_id', 'periodo_id').distinct()
+    for curso_id, periodo_id in pares:
+        recalcular(curso_id, periodo_id, estudiante_ids)
+
+
+def aplicar_esquema(curso_id, categoria_eliminada=None):
+    """
+    Recalcula las notas del curso cuando cambia su esquema de ponderación,
+    a partir de los acumulados (sin leer entregas). Las sumas de una
+    categoría eliminada pasan a ``SIN_CATEGORIA``, igual que sus actividades.
+    """
+    pesos = esquema(curso_id)
+    eliminada = _categoria(categoria_eliminada) if categoria_eliminada else None
+    notas = list(NotaFinal.objects.filter(curso_id=curso_id))
+    ahora = timezone.now()
+    for nota in notas:
+        if eliminada and eliminada in nota.acumulados:
+            suma, peso = nota.acumulados.pop(eliminada)
+            suma_sin, peso_sin = nota.acumulados.get(SIN_CATEGORIA, (0, 0))
+            nota.acumulados[SIN_CATEGORIA] = [
+                str(Decimal(suma_sin) + Decimal(suma)), str(Decimal(peso_sin) + Decimal(peso))
+            ]
+        nota.nota = calcular_nota(nota.acumulados, pesos)
+        nota.fecha_actualizacion = ahora
+    NotaFinal.objects.bulk_update(notas, ['acumulados', 'nota', 'fecha_actualizacion'], batch_size=500)
+    historial.actualizar({nota.estudiante_id for nota in notas})
+    return len(notas)
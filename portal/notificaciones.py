@@ -0,0 +1,126 @@
+"""
+Bandeja de notificaciones por usuario.
+
+Cuando un administrador envía una Notificacion, ``distribuir`` resuelve sus
+destinatarios (por tipo de usuario y, opcionalmente, por Grado o Clase) y
+crea una fila NotificacionUsuario por destinatario con ``bulk_create`` en
+lotes. Las lecturas usan el índice (usuario, leida, id): el contador de no
+leídas es un COUNT sobre el índice y el historial se pagina por id
+(keyset), sin OFFSET.
+"""
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from academico.models import Clase
+from users.models import User, Estudiante, Maestro, PadreDeFamilia
+from .models import Notificacion, NotificacionUsuario
+
+
+TAMANO_LOTE = 1000
+TAMANO_PAGINA = 20
+
+TIPOS_POR_AUDIENCIA = {
+    Notificacion.TargetAudiencia.TODOS: (User.UserType.ESTUDIANTE, User.UserType.MAESTRO, User.UserType.PADRE),
+    Notificacion.TargetAudiencia.ESTUDIANTES: (User.UserType.ESTUDIANTE,),
+    Notificacion.TargetAudiencia.MAESTROS: (User.UserType.MAESTRO,),
+    Notificacion.TargetAudiencia.PADRES: (User.UserType.PADRE,),
+}
+
+
+def _usuarios_del_grupo(tipo, estudiantes, maestros):
+    """PKs de usuario de un tipo dentro del grupo (estudiantes y maestros de un grado o clase)."""
+    if tipo == User.UserType.ESTUDIANTE:
+        return estudiantes.values_list('user_id', flat=True)
+    if tipo == User.UserType.PADRE:
+        return PadreDeFamilia.objects.filter(hijos__in=estudiantes).values_list('user_id', flat=True)
+    return maestros.values_list('user_id', flat=True)
+
+
+def destinatarios(notificacion):
+    """Queryset con los PKs (distintos) de los usuarios que deben recibir la notificación."""
+    tipos = TIPOS_POR_AUDIENCIA[notificacion.audiencia]
+    usuarios = User.objects.filter(is_active=True, user_type__in=tipos)
+
+    if notificacion.clase_id:
+        estudiantes = Estudiante.objects.filter(clases_inscritas=notificacion.clase_id)
+        maestros = Maestro.objects.filter(clases=notificacion.clase_id)
+    elif notificacion.grado_id:
+        estudiantes = Estudiante.objects.filter(grado=notificacion.grado_id)
+        maestros = Maestro.objects.filter(clases__in=Clase.objects.filter(grados_asignados=notificacion.grado_id))
+    else:
+        return usuarios.values_list('pk', flat=True).order_by('pk')
+
+    condicion = Q()
+    for tipo in tipos:
+        condicion |= Q(pk__in=_usuarios_del_grupo(tipo, estudiantes, maestros))
+    return usuarios.filter(condicion).values_list('pk', flat=True).order_by('pk')
+
+
+def distribuir(notificacion, tamano_lote=TAMANO_LOTE):
+    """
+    Copia la notificación a la bandeja de cada destinatario en lotes de
+    ``tamano_lote`` filas. Es idempotente: las filas existentes se ignoran.
+    Devuelve el número de destinatarios procesados.
+    """
+    pks = destinatarios(notificacion).iterator(chunk_size=tamano_lote)
+    total = 0
+    while True:
+        lote = list(islice(pks, tamano_lote))
+        if not lote:
+            break
+        NotificacionUsuario.objects.bulk_create(
+            [NotificacionUsuario(notificacion=notificacion, usuario_id=pk) for pk in lote],
+            batch_size=tamano_lote,
+            ignore_conflicts=True,
+        )
+        total += len(lote)
+    Notificacion.objects.filter(pk=notificacion.pk).update(fecha_distribucion=timezone.now())
+    return total
+
+
+def enviar(notificacion):
+    """Guarda la notificación y la distribuye al confirmar la transacción."""
+    notificacion.save()
+    transaction.on_commit(lambda: distribuir(notificacion))
+    return notificacion
+
+
+def no_leidas(usuario):
+    """Cantidad de notificaciones sin leer del usuario (COUNT sobre el índice)."""
+    return NotificacionUsuario.objects.filter(usuario=usuario, leida=False).count()
+
+
+def bandeja(usuario, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Página del historial del usuario, de la más reciente a la más antigua.
+    ``antes`` es el id de la última fila de la página anterior. Devuelve
+    ``(filas, siguiente)`` donde ``siguiente`` es el cursor de la próxima
+    página o ``None``.
+    """
+    filas = NotificacionUsuario.objects.filter(usuario=usuario)
+    if antes:
+        filas = filas.filter(pk__lt=antes)
+    filas = list(filas.select_related('notificacion__autor').order_by('-pk')[:tamano + 1])
+    siguiente = filas[tamano - 1].pk if len(filas) > tamano else None
+    return filas[:tamano], siguiente
+
+
+def recientes(usuario, limite=5):
+    """Las últimas notificaciones del usuario, para los portales."""
+    return [
+        fila.notificacion
+        for fila in NotificacionUsuario.objects.filter(usuario=usuario).select_related(
+            'notificacion__autor'
+        ).order_by('-pk')[:limite]
+    ]
+
+
+def marcar_leidas(usuario, ids=None):
+    """Marca como leídas las notificaciones indicadas (o todas) del usuario."""
+    filas = NotificacionUsuario.objects.filter(usuario=usuario, leida=False)
+    if ids is not None:
+        filas = filas.filter(pk__in=ids)
+    return filas.update(leida=True, fecha_lectura=timezone.now())
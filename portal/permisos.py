@@ -0,0 +1,46 @@
+"""
+Autorización padre → hijo.
+
+El conjunto de PKs de los hijos de cada padre se guarda en la caché de Django
+y se invalida desde ``portal.signals`` cuando cambia ``PadreDeFamilia.hijos``.
+"""
+from django.core.cache import cache
+
+from users.models import User, PadreDeFamilia
+
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _clave(padre_id):
+    return f"portal:hijos_padre:{padre_id}"
+
+
+def hijos_del_padre(padre_id):
+    """Devuelve el ``frozenset`` de PKs de los hijos del padre (cacheado)."""
+    clave = _clave(padre_id)
+    hijos = cache.get(clave)
+    if hijos is None:
+        hijos = frozenset(
+            PadreDeFamilia.hijos.through.objects.filter(
+                padredefamilia_id=padre_id
+            ).values_list('estudiante_id', flat=True)
+        )
+        cache.set(clave, hijos, CACHE_TIMEOUT)
+    return hijos
+
+
+def invalidar_hijos(padre_ids):
+    """Elimina de la caché los hijos de los padres indicados."""
+    cache.delete_many([_clave(padre_id) for padre_id in padre_ids])
+
+
+def puede_ver_estudiante(user, estudiante_pk):
+    """Indica si el usuario es padre del estudiante ``estudiante_pk``."""
+    if user.user_type != User.UserType.PADRE:
+        return False
+    try:
+        estudiante_pk = int(estudiante_pk)
+    except (TypeError, ValueError):
+        return False
+    return estudiante_pk in hijos_del_padre(user.pk)
@@ -0,0 +1,124 @@
+"""
+Ranking de estudiantes por periodo (PosicionRanking).
+
+Las notas finales del periodo (NotaFinal, ya ponderadas como en la boleta)
+se leen con una sola consulta de tuplas y todo lo demás se hace con
+operaciones vectorizadas de numpy: promedio general por estudiante, orden
+por grupo, posiciones con empates (1, 2, 2, 4) y percentiles. No hay
+consultas ni ciclos por estudiante.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+from django.db import transaction
+
+from .models import NotaFinal, PosicionRanking
+
+
+def posiciones(grupos, valores):
+    """
+    Posición, tamaño del grupo y percentil de cada valor dentro de su grupo,
+    en el orden original. Los empates comparten la mejor posición y el
+    percentil es el porcentaje del grupo por debajo (los empates cuentan la mitad).
+    """
+    n = len(valores)
+    if n == 0:
+        vacio = np.array([], dtype=int)
+        return vacio, vacio, np.array([], dtype=float)
+
+    # Ordenado por grupo y, dentro de cada grupo, de mayor a menor
+    orden = np.lexsort((-valores, grupos))
+    g, v = grupos[orden], valores[orden]
+    indices = np.arange(n)
+
+    nuevo_grupo = np.ones(n, dtype=bool)
+    nuevo_grupo[1:] = g[1:] != g[:-1]
+    nuevo_valor = nuevo_grupo.copy()
+    nuevo_valor[1:] |= v[1:] != v[:-1]
+
+    inicio_grupo = np.maximum.accumulate(np.where(nuevo_grupo, indices, 0))
+    inicio_empate = np.maximum.accumulate(np.where(nuevo_valor, indices, 0))
+    posicion = inicio_empate - inicio_grupo + 1
+
+    grupo = np.cumsum(nuevo_grupo) - 1
+    empate = np.cumsum(nuevo_valor) - 1
+    total = np.bincount(grupo)[grupo]
+    empatados = np.bincount(empate)[empate]
+    debajo = total - (posicion - 1) - empatados
+    percentil = 100.0 * (debajo + 0.5 * empatados) / total
+
+    resultado = np.empty(n, dtype=int), np.empty(n, dtype=int), np.empty(n, dtype=float)
+    for destino, origen in zip(resultado, (posicion, total, percentil)):
+        destino[orden] = origen
+    return resultado
+
+
+def _decimal(valor):
+    return Decimal(str(round(float(valor), 2)))
+
+
+def calcular(periodo):
+    """Devuelve las filas de PosicionRanking (sin guardar) de un periodo."""
+    filas = list(NotaFinal.objects.filter(periodo=periodo, nota__isnull=False).values_list(
+        'estudiante_id', 'curso_id', 'nota', 'estudiante__grado_id', 'estudiante__grado__periodo_id'
+    ))
+    if not filas:
+        return []
+
+    estudiante_ids, curso_ids, notas, grado_ids, grado_periodos = zip(*filas)
+    estudiante_ids = np.array(estudiante_ids)
+    curso_ids = np.array(curso_ids)
+    notas = np.array(notas, dtype=float)
+
+    ranking = []
+
+    # --- Por curso: la nota final de cada estudiante en el curso ---
+    posicion, total, percentil = posiciones(curso_ids, notas)
+    for i in range(len(filas)):
+        ranking.append(PosicionRanking(
+            estudiante_id=int(estudiante_ids[i]), periodo=periodo, ambito=PosicionRanking.Ambito.CURSO,
+            curso_id=int(curso_ids[i]), promedio=_decimal(notas[i]),
+            posicion=int(posicion[i]), total=int(total[i]), percentil=_decimal(percentil[i]),
+        ))
+
+    # --- Por grado: promedio general de las notas finales del estudiante ---
+    # Solo cuentan los estudiantes cuyo grado pertenece a este periodo
+    en_periodo = np.array([p == periodo.pk for p in grado_periodos])
+    if en_periodo.any():
+        grados = np.array(grado_ids, dtype=object)[en_periodo].astype(int)
+        estudiantes, inverso = np.unique(estudiante_ids[en_periodo], return_inverse=True)
+        # Se redondea como el promedio guardado: la suma en coma flotante depende
+        # del orden de las filas y dos promedios iguales no empatarían
+        promedios = np.round(np.bincount(inverso, weights=notas[en_periodo]) / np.bincount(inverso), 2)
+        grado_por_estudiante = np.zeros(len(estudiantes), dtype=int)
+        grado_por_estudiante[inverso] = grados
+
+        posicion, total, percentil = posiciones(grado_por_estudiante, promedios)
+        for i, estudiante_id in enumerate(estudiantes):
+            ranking.append(PosicionRanking(
+                estudiante_id=int(estudiante_id), periodo=periodo, ambito=PosicionRanking.Ambito.GRADO,
+                grado_id=int(grado_por_estudiante[i]), promedio=_decimal(promedios[i]),
+                posicion=int(posicion[i]), total=int(total[i]), percentil=_decimal(percentil[i]),
+            ))
+    return ranking
+
+
+def actualizar(periodo, tamano_lote=1000):
+    """Reemplaza el ranking guardado del periodo. Devuelve el número de filas."""
+    ranking = calcular(periodo)
+    with transaction.atomic():
+        PosicionRanking.objects.filter(periodo=periodo).delete()
+        PosicionRanking.objects.bulk_create(ranking, batch_size=tamano_lote)
+    return len(ranking)
+
+
+def del_estudiante(estudiante, periodo):
+    """``(posicion_grado, {curso_id: posicion})`` del estudiante en el periodo."""
+    grado, cursos = None, {}
+    for fila in PosicionRanking.objects.filter(estudiante=estudiante, periodo=periodo).select_related('grado'):
+        if fila.ambito == PosicionRanking.Ambito.GRADO:
+            grado = fila
+        else:
+            cursos[fila.curso_id] = fila
+    return grado, cursos
@@ -0,0 +1,174 @@
+"""
+Datos del portal del estudiante compartidos por la vista del estudiante y la
+del padre de familia, y el resumen familiar con todos los hijos.
+
+El resultado para cada (estudiante, periodo) se guarda en la caché de Django;
+las señales de ``portal.signals`` lo invalidan cuando cambia una Entrega o
+Actividad del estudiante, una de sus clases o su inscripción.
+"""
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Subquery, DecimalField, Case, When, Value, IntegerField, F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from academico.models import Clase, Actividad, Entrega
+
+
+class StudentDashboardService:
+    """Horario y actividades de un estudiante en un periodo, con caché."""
+
+    CACHE_TIMEOUT = 60 * 15
+    ORDEN_DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+
+    def __init__(self, estudiante, periodo):
+        self.estudiante = estudiante
+        self.periodo = periodo
+
+    @staticmethod
+    def clave(estudiante_id, periodo_id):
+        return f"portal:dashboard_estudiante:{estudiante_id}:{periodo_id}"
+
+    @classmethod
+    def invalidar(cls, estudiante_ids, periodo_id):
+        """Elimina de la caché los dashboards de los estudiantes en el periodo."""
+        cache.delete_many([cls.clave(estudiante_id, periodo_id) for estudiante_id in estudiante_ids])
+
+    @classmethod
+    def invalidar_clases(cls, clase_ids):
+        """Invalida los dashboards de todos los estudiantes inscritos en las clases."""
+        inscripciones = Clase.estudiantes.through.objects.filter(
+            clase_id__in=clase_ids
+        ).values_list('estudiante_id', 'clase__periodo_id')
+        claves = {cls.clave(estudiante_id, periodo_id) for estudiante_id, periodo_id in inscripciones}
+        if claves:
+            cache.delete_many(list(claves))
+
+    def obtener(self):
+        """
+        Devuelve ``clases_inscritas``, ``actividades``, ``horario_por_dia`` y
+        ``actividades_por_curso`` listos para la plantilla.
+        """
+        if not self.periodo:
+            return self._construir()
+        clave = self.clave(self.estudiante.pk, self.periodo.pk)
+        datos = cache.get(clave)
+        if datos is None:
+            datos = self._construir()
+            cache.set(clave, datos, self.CACHE_TIMEOUT)
+        return datos
+
+    def _construir(self):
+        clases_inscritas = []
+        actividades = []
+
+        if self.periodo:
+            day_order = Case(
+                When(dia_semana='LUN', then=Value(0)),
+                When(dia_semana='MAR', then=Value(1)),
+                When(dia_semana='MIE', then=Value(2)),
+                When(dia_semana='JUE', then=Value(3)),
+                When(dia_semana='VIE', then=Value(4)),
+                When(dia_semana='SAB', then=Value(5)),
+                output_field=IntegerField(),
+            )
+            clases_inscritas = list(Clase.objects.filter(
+                estudiantes=self.estudiante,
+                periodo=self.periodo
+            ).select_related('curso', 'maestro__user').order_by(day_order, 'hora_inicio'))
+
+            subquery_entrega = Entrega.objects.filter(
+                actividad=OuterRef('pk'),
+                estudiante=self.estudiante
+            )
+            subquery_calificacion = subquery_entrega.values('calificacion')[:1]
+
+            actividades = list(Actividad.objects.filter(
+                clase__in=clases_inscritas
+            ).select_related('clase__curso').annotate(
+                fue_entregada=Exists(subquery_entrega),
+                calificacion_obtenida=Subquery(subquery_calificacion, output_field=DecimalField())
+            ).order_by('fecha_entrega'))
+
+        horario_por_dia = OrderedDict((dia, []) for dia in self.ORDEN_DIAS)
+        for clase in clases_inscritas:
+            horario_por_dia[clase.get_dia_semana_display()].append(clase)
+
+        actividades_por_curso = OrderedDict()
+        for actividad in actividades:
+            actividades_por_curso.setdefault(actividad.clase.curso.nombre, []).append(actividad)
+
+        return {
+            'clases_inscritas': clases_inscritas,
+            'actividades': actividades,
+            'horario_por_dia': horario_por_dia,
+            'actividades_por_curso': actividades_por_curso,
+        }
+
+
+class FamilyOverviewService:
+    """
+    Resumen de todos los hijos de un padre: clases de hoy, actividades
+    pendientes y calificaciones recientes. Cada sección es una sola consulta
+    para todos los hijos (``estudiante__in=hijos``).
+    """
+
+    LIMITE_CALIFICACIONES = 5
+    DIAS_SEMANA = ['LUN', 'MAR', 'MIE', 'JUE', 'VIE', 'SAB']
+
+    def __init__(self, hijos, periodo, ahora=None):
+        self.hijos = list(hijos)
+        self.periodo = periodo
+        self.ahora = ahora or timezone.now()
+
+    def obtener(self):
+        """Devuelve una lista ``[{'estudiante', 'clases_hoy', 'pendientes', 'calificaciones'}]``."""
+        resumen = OrderedDict(
+            (hijo.pk, {'estudiante': hijo, 'clases_hoy': [], 'pendientes': [], 'calificaciones': []})
+            for hijo in self.hijos
+        )
+        if not self.periodo or not resumen:
+            return list(resumen.values())
+
+        for inscripcion in self._clases_hoy():
+            resumen[inscripcion.estudiante_id]['clases_hoy'].append(inscripcion.clase)
+        for actividad in self._pendientes():
+            resumen[actividad.estudiante_id]['pendientes'].append(actividad)
+        for entrega in self._calificaciones_recientes():
+            resumen[entrega.estudiante_id]['calificaciones'].append(entrega)
+        return list(resumen.values())
+
+    def _clases_hoy(self):
+        dia = timezone.localtime(self.ahora).weekday()
+        if dia >= len(self.DIAS_SEMANA):
+            return []
+        return Clase.estudiantes.through.objects.filter(
+            estudiante__in=self.hijos,
+            clase__periodo=self.periodo,
+            clase__dia_semana=self.DIAS_SEMANA[dia],
+        ).select_related('clase__curso', 'clase__maestro__user').order_by('clase__hora_inicio')
+
+    def _pendientes(self):
+        # Una fila por (actividad, hijo inscrito en su clase) sin entrega de ese hijo
+        return Actividad.objects.filter(
+            clase__periodo=self.periodo,
+            clase__estudiantes__in=self.hijos,
+            fecha_entrega__gte=self.ahora,
+        ).annotate(
+            estudiante_id=F('clase__estudiantes'),
+        ).annotate(
+            fue_entregada=Exists(Entrega.objects.filter(actividad=OuterRef('pk'), estudiante=OuterRef('estudiante_id'))),
+        ).filter(fue_entregada=False).select_related('clase__curso').order_by('fecha_entrega')
+
+    def _calificaciones_recientes(self):
+        # Las últimas N por hijo, numeradas con ROW_NUMBER() en la misma consulta
+        return Entrega.objects.filter(
+            estudiante__in=self.hijos,
+            calificacion__isnull=False,
+            actividad__clase__periodo=self.periodo,
+        ).annotate(
+            posicion=Window(RowNumber(), partition_by=[F('estudiante')], order_by=F('fecha_entrega').desc()),
+        ).filter(
+            posicion__lte=self.LIMITE_CALIFICACIONES
+        ).select_related('actividad__clase__curso').order_by('estudiante', 'posicion')
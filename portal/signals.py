@@ -0,0 +1,388 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.db import transaction
+from django.dispatch import receiver
+from academico.models import Curso, Clase, Actividad, Entrega, AsistenciaClase, Planificacion, BitacoraPedagogica, CategoriaCalificacion
+from users.models import PadreDeFamilia
+from . import asistencia_mensual, dominio, estadisticas, historial, kpi, notas_finales, permisos
+from .models import NotaFinal
+from .services import StudentDashboardService
+
+MODELOS_KPI = (Actividad, Entrega, AsistenciaClase, Planificacion, BitacoraPedagogica)
+
+
+def guardar_aporte_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Antes de guardar, recuerda lo que el registro aportaba al resumen de KPIs
+    para poder aplicar solo la diferencia.
+    """
+    if raw or instance.pk is None:
+        return
+    anterior = sender.objects.filter(pk=instance.pk).first()
+    instance._kpi_aporte_anterior = kpi.aportes(anterior) if anterior else None
+    # Se aprovecha la misma lectura para las notas finales
+    if anterior and sender is Entrega:
+        instance._nota_aporte_anterior = notas_finales.aporte(anterior)
+        instance._dominio_aporte_anterior = dominio.aporte(anterior)
+        instance._actividad_anterior = anterior.actividad_id
+    elif anterior and sender is Actividad:
+        instance._ponderacion_anterior = (anterior.clase_id, anterior.categoria_id, anterior.peso)
+    elif anterior and sender is AsistenciaClase:
+        instance._dia_anterior = (anterior.estudiante_id, anterior.clase_id, anterior.fecha)
+
+
+def actualizar_resumen_kpi_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Cuando se guarda un registro, suma su aporte nuevo y resta el anterior.
+    """
+    if raw:
+        return
+    anterior = getattr(instance, '_kpi_aporte_anterior', None)
+    instance._kpi_aporte_anterior = None
+    kpi.aplicar_cambio(anterior, kpi.aportes(instance))
+
+
+def actualizar_resumen_kpi_on_delete(sender, instance, **kwargs):
+    """
+    Cuando se elimina un registro, resta su aporte del resumen.
+    """
+    kpi.aplicar_cambio(kpi.aportes(instance), None)
+
+
+for modelo in MODELOS_KPI:
+    receiver(pre_save, sender=modelo)(guardar_aporte_anterior)
+    receiver(post_save, sender=modelo)(actualizar_resumen_kpi_on_save)
+    receiver(post_delete, sender=modelo)(actualizar_resumen_kpi_on_delete)
+
+
+@receiver(post_save, sender=Entrega)
+def actualizar_nota_final_on_entrega_save(sender, instance, raw=False, **kwargs):
+    """
+    Cuando se califica una entrega, aplica la diferencia a la nota final del estudiante.
+    """
+    if raw:
+        return
+    anterior = getattr(instance, '_nota_aporte_anterior', None)
+    instance._nota_aporte_anterior = None
+    notas_finales.aplicar_cambio(anterior, notas_finales.aporte(instance))
+
+
+@receiver(post_delete, sender=Entrega)
+def actualizar_nota_final_on_entrega_delete(sender, instance, **kwargs):
+    """
+    Cuando se elimina una entrega, resta su calificación de la nota final.
+    """
+    notas_finales.aplicar_cambio(notas_finales.aporte(instance), None)
+
+
+@receiver(post_save, sender=Actividad)
+def actualizar_notas_finales_on_actividad(sender, instance, raw=False, **kwargs):
+    """
+    Cuando cambia la categoría, el peso o la clase de una actividad, recalcula
+    las notas finales (y el dominio de competencias, si cambió el peso o la
+    clase) de quienes la tienen calificada.
+    """
+    if raw:
+        return
+    anterior = getattr(instance, '_ponderacion_anterior', None)
+    instance._ponderacion_anterior = None
+    if anterior and anterior != (instance.clase_id, instance.categoria_id, instance.peso):
+        notas_finales.recalcular_actividad(instance, {anterior[0], instance.clase_id})
+        if (anterior[0], anterior[2]) != (instance.clase_id, instance.peso):
+            dominio.recalcular_actividad(instance, {anterior[0], instance.clase_id})
+
+
+@receiver(post_save, sender=Entrega)
+def actualizar_dominio_on_entrega_save(sender, instance, raw=False, **kwargs):
+    """
+    Cuando se califica una entrega, aplica la diferencia al dominio de las
+    competencias que evalúa su actividad.
+    """
+    if raw:
+        return
+    anterior = getattr(instance, '_dominio_aporte_anterior', None)
+    instance._dominio_aporte_anterior = None
+    dominio.aplicar_cambio(anterior, dominio.aporte(instance))
+
+
+@receiver(post_delete, sender=Entrega)
+def actualizar_dominio_on_entrega_delete(sender, instance, **kwargs):
+    """
+    Cuando se elimina una entrega, resta su calificación del dominio de competencias.
+    """
+    dominio.aplicar_cambio(dominio.aporte(instance), None)
+
+
+@receiver(m2m_changed, sender=Actividad.competencias.through)
+def actualizar_dominio_on_competencias(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Cuando cambian las competencias que evalúa una actividad, recalcula el
+    dominio de quienes la tienen calificada. En ``clear`` inverso se usa
+    ``pre_clear`` para recordar las actividades de la competencia.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            dominio.recalcular_actividad(instance, [instance.clase_id])
+        return
+    if action == 'pre_clear':
+        instance._actividades_anteriores = list(instance.actividades.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set, instance._actividades_anteriores = getattr(instance, '_actividades_anteriores', ()), None
+    elif action not in ('post_add', 'post_remove'):
+        return
+    for actividad in Actividad.objects.filter(pk__in=pk_set or ()):
+        dominio.recalcular_actividad(actividad, [actividad.clase_id])
+
+
+@receiver(pre_delete, sender=Actividad)
+def guardar_dominio_on_actividad_delete(sender, instance, **kwargs):
+    """
+    Antes de eliminar una actividad que evalúa competencias, recuerda a
+    quiénes afecta: sus vínculos se borran antes que las entregas.
+    """
+    if instance.competencias.exists():
+        instance._dominio_afectados = list(
+            instance.entregas.filter(calificacion__isnull=False).values_list('estudiante_id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Actividad)
+def recalcular_dominio_on_actividad_delete(sender, instance, **kwargs):
+    afectados = getattr(instance, '_dominio_afectados', None)
+    if afectados:
+        clase = Clase.objects.filter(pk=instance.clase_id).values_list('curso_id', 'periodo_id').first()
+        if clase:
+            dominio.recalcular(*clase, afectados)
+
+
+@receiver(post_save, sender=AsistenciaClase)
+def actualizar_asistencia_mensual_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Cuando se toma asistencia, marca el día en la fila mensual del estudiante
+    (y lo borra de la anterior si cambiaron la fecha, la clase o el estudiante).
+    """
+    if raw:
+        return
+    anterior = getattr(instance, '_dia_anterior', None)
+    instance._dia_anterior = None
+    actual = (instance.estudiante_id, instance.clase_id, instance.fecha)
+    cambios = {anterior: None} if anterior and anterior != actual else {}
+    cambios[actual] = instance.estado
+    asistencia_mensual.registrar(cambios)
+
+
+@receiver(post_delete, sender=AsistenciaClase)
+def actualizar_asistencia_mensual_on_delete(sender, instance, **kwargs):
+    """
+    Cuando se elimina un registro de asistencia, borra el día de la fila mensual.
+    """
+    asistencia_mensual.registrar({(instance.estudiante_id, instance.clase_id, instance.fecha): None})
+
+
+@receiver(post_save, sender=CategoriaCalificacion)
+def aplicar_esquema_on_categoria_save(sender, instance, raw=False, **kwargs):
+    """
+    Cuando cambia el esquema de ponderación de un curso, recalcula sus notas finales.
+    """
+    if not raw:
+        notas_finales.aplicar_esquema(instance.curso_id)
+
+
+@receiver(post_delete, sender=CategoriaCalificacion)
+def aplicar_esquema_on_categoria_delete(sender, instance, **kwargs):
+    """
+    Al eliminar una categoría sus actividades quedan sin categoría; sus sumas
+    pasan al grupo sin categoría de cada nota final.
+    """
+    notas_finales.aplicar_esquema(instance.curso_id, categoria_eliminada=instance.pk)
+
+
+@receiver(pre_save, sender=Curso)
+def guardar_creditos_anteriores(sender, instance, raw=False, **kwargs):
+    """
+    Antes de guardar un curso, recuerda sus créditos para saber si cambiaron.
+    """
+    if raw or instance.pk is None:
+        return
+    instance._creditos_anteriores = sender.objects.filter(pk=instance.pk).values_list('creditos', flat=True).first()
+
+
+@receiver(post_save, sender=Curso)
+def actualizar_historial_on_creditos(sender, instance, raw=False, **kwargs):
+    """
+    Cuando cambian los créditos de un curso, actualiza el historial de quienes lo cursaron.
+    """
+    if raw:
+        return
+    anteriores = getattr(instance, '_creditos_anteriores', None)
+    instance._creditos_anteriores = None
+    if anteriores is not None and anteriores != instance.creditos:
+        historial.actualizar(NotaFinal.objects.filter(curso=instance).values_list('estudiante_id', flat=True).distinct())
+
+
+@receiver(pre_save, sender=Clase)
+def guardar_clave_anterior_clase(sender, instance, raw=False, **kwargs):
+    """
+    Antes de guardar una clase, recuerda su (maestro, curso, periodo) para
+    saber si se reasignó.
+    """
+    instance._clave_anterior = None
+    if raw or instance.pk is None:
+        return
+    instance._clave_anterior = sender.objects.filter(pk=instance.pk).values_list(
+        'maestro_id', 'curso_id', 'periodo_id'
+    ).first()
+
+
+@receiver(post_save, sender=Clase)
+def marcar_resumen_on_clase_save(sender, instance, raw=False, **kwargs):
+    """
+    Cuando cambia una clase, invalida la tarjeta cacheada de su curso y el
+    dashboard de sus estudiantes. Si cambió de maestro, curso o periodo, sus
+    aportes se mueven de resumen: se recalculan el del maestro y periodo
+    anteriores y el de los nuevos.
+    """
+    if raw:
+        return
+    anterior = getattr(instance, '_clave_anterior', None)
+    if anterior and anterior != (instance.maestro_id, instance.curso_id, instance.periodo_id):
+        for maestro_id, periodo_id in {(anterior[0], anterior[2]), (instance.maestro_id, instance.periodo_id)}:
+            if maestro_id:
+                kpi.recalcular(maestro_id, periodo_id)
+    kpi.marcar_clases_actualizadas([instance])
+    StudentDashboardService.invalidar_clases([instance.pk])
+
+
+@receiver(post_save, sender=Clase)
+def recalcular_notas_on_clase_reasignada(sender, instance, raw=False, **kwargs):
+    """
+    Si una clase cambió de curso o de periodo, las calificaciones de sus
+    actividades pasan a otra nota final: se recalculan las notas finales (y
+    el historial) y el dominio de competencias de sus estudiantes bajo el
+    curso y periodo anteriores y los nuevos.
+    """
+    if raw:
+        return
+    anterior = getattr(instance, '_clave_anterior', None)
+    if not anterior or anterior[1:] == (instance.curso_id, instance.periodo_id):
+        return
+    estudiante_ids = set(instance.estudiantes.values_list('pk', flat=True)) | set(
+        Entrega.objects.filter(actividad__clase=instance, calificacion__isnull=False).values_list('estudiante_id', flat=True)
+    )
+    if not estudiante_ids:
+        return
+    for curso_id, periodo_id in (anterior[1:], (instance.curso_id, instance.periodo_id)):
+        notas_finales.recalcular(curso_id, periodo_id, estudiante_ids)
+        dominio.recalcular(curso_id, periodo_id, estudiante_ids)
+
+
+@receiver(m2m_changed, sender=Clase.estudiantes.through)
+def marcar_resumen_on_inscripcion(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Cuando se inscriben o retiran estudiantes, invalida la tarjeta cacheada del curso.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        kpi.marcar_clases_actualizadas([instance])
+    elif pk_set:
+        kpi.marcar_clases_actualizadas(Clase.objects.filter(pk__in=pk_set))
+
+
+@receiver(m2m_changed, sender=Clase.estudiantes.through)
+def invalidar_dashboard_on_inscripcion(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Cuando cambia la inscripción, invalida el dashboard de los estudiantes
+    afectados. En ``clear`` se usa ``pre_clear``, cuando aún se conocen los inscritos.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        if action == 'pre_clear':
+            StudentDashboardService.invalidar_clases([instance.pk])
+        elif pk_set:
+            StudentDashboardService.invalidar(pk_set, instance.periodo_id)
+        return
+    clases = Clase.objects.filter(estudiantes=instance) if action == 'pre_clear' else Clase.objects.filter(pk__in=pk_set or ())
+    for periodo_id in set(clases.values_list('periodo_id', flat=True)):
+        StudentDashboardService.invalidar([instance.pk], periodo_id)
+
+
+@receiver(pre_delete, sender=Clase)
+def invalidar_dashboard_on_clase_delete(sender, instance, **kwargs):
+    """
+    Antes de eliminar una clase, invalida el dashboard de sus estudiantes.
+    """
+    StudentDashboardService.invalidar_clases([instance.pk])
+
+
+@receiver(post_save, sender=Actividad)
+@receiver(post_delete, sender=Actividad)
+def invalidar_dashboard_on_actividad(sender, instance, raw=False, **kwargs):
+    """
+    Cuando cambia una actividad, invalida el dashboard de los estudiantes de su clase.
+    """
+    if not raw:
+        StudentDashboardService.invalidar_clases([instance.clase_id])
+
+
+@receiver(post_save, sender=Entrega)
+@receiver(post_delete, sender=Entrega)
+def invalidar_dashboard_on_entrega(sender, instance, raw=False, **kwargs):
+    """
+    Cuando cambia una entrega, invalida el dashboard de su estudiante.
+    """
+    if raw:
+        return
+    periodo_id = Actividad.objects.filter(pk=instance.actividad_id).values_list('clase__periodo', flat=True).first()
+    if periodo_id:
+        StudentDashboardService.invalidar([instance.estudiante_id], periodo_id)
+
+
+@receiver(post_save, sender=Entrega)
+@receiver(post_delete, sender=Entrega)
+def invalidar_estadisticas_on_entrega(sender, instance, raw=False, **kwargs):
+    """
+    Cuando cambia una entrega, invalida las estadísticas cacheadas de su
+    actividad (y de la anterior, si se movió de actividad). Se invalida al
+    confirmar la transacción para que una lectura concurrente no vuelva a
+    cachear los datos de antes del cambio.
+    """
+    if raw:
+        return
+    actividad_ids = {instance.actividad_id, getattr(instance, '_actividad_anterior', None)} - {None}
+    instance._actividad_anterior = None
+    transaction.on_commit(lambda: estadisticas.invalidar(actividad_ids))
+
+
+@receiver(m2m_changed, sender=Clase.estudiantes.through)
+def invalidar_estadisticas_on_inscripcion(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Cuando cambia la inscripción, cambia el número de entregas faltantes de
+    las actividades de las clases afectadas.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        estadisticas.invalidar_clases([instance.pk])
+    elif action == 'pre_clear':
+        estadisticas.invalidar_clases(Clase.objects.filter(estudiantes=instance).values_list('pk', flat=True))
+    elif pk_set:
+        estadisticas.invalidar_clases(pk_set)
+
+
+@receiver(m2m_changed, sender=PadreDeFamilia.hijos.through)
+def invalidar_hijos_on_cambio(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Cuando cambian los hijos de un padre, invalida su conjunto cacheado.
+    En ``clear`` inverso se usa ``pre_clear``, cuando aún se conocen los padres.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            permisos.invalidar_hijos([instance.pk])
+    elif action == 'pre_clear':
+        permisos.invalidar_hijos(instance.padres.values_list('pk', flat=True))
+    elif pk_set:
+        permisos.invalidar_hijos(pk_set)
@@ -0,0 +1,114 @@
+"""
+Sincronización por lotes de asistencia tomada sin conexión.
+
+El cliente acumula registros ``(clase, fecha, estudiante, estado)`` y los
+envía juntos con una clave de idempotencia. Todo el lote se valida en
+memoria (clases del maestro con una consulta), se guarda con un único upsert
+(``portal.asistencia.guardar_registros``) y la respuesta, con el resultado
+de cada registro, queda en LoteSincronizacion en la misma transacción. Un
+reenvío con la misma clave devuelve esa respuesta con una sola lectura.
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction
+
+from academico.models import Clase, AsistenciaClase
+from . import asistencia
+from .models import LoteSincronizacion
+
+
+LIMITE_REGISTROS = 5000
+LONGITUD_CLAVE = 64
+
+
+class LoteInvalido(Exception):
+    """El lote no tiene el formato esperado; no se guarda nada."""
+
+
+def _respuesta_previa(maestro, clave):
+    respuesta = LoteSincronizacion.objects.filter(maestro=maestro, clave=clave).values_list(
+        'respuesta', flat=True
+    ).first()
+    return None if respuesta is None else dict(respuesta, repetido=True)
+
+
+def _leer(registro):
+    """Devuelve ``(clase_id, estudiante_id, fecha, estado)`` o lanza ``ValueError`` con el motivo."""
+    if not isinstance(registro, dict):
+        raise ValueError("El registro debe ser un objeto.")
+    try:
+        clase_id, estudiante_id = int(registro['clase']), int(registro['estudiante'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Faltan 'clase' o 'estudiante', o no son números.")
+    try:
+        fecha = date.fromisoformat(registro['fecha'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("La fecha debe tener el formato AAAA-MM-DD.")
+    estado = registro.get('estado')
+    if estado not in AsistenciaClase.EstadoAsistencia.values:
+        raise ValueError(f"Estado inválido: '{estado}'.")
+    return clase_id, estudiante_id, fecha, estado
+
+
+def sincronizar(maestro, clave, registros):
+    """
+    Aplica el lote ``registros`` del maestro y devuelve la respuesta:
+    ``{'clave', 'guardados', 'errores', 'resultados': [{'indice', 'ok', 'error'?}]}``.
+    Si un registro se repite dentro del lote, vale el último.
+    """
+    if not isinstance(clave, str) or not clave or len(clave) > LONGITUD_CLAVE:
+        raise LoteInvalido(f"La clave de idempotencia es obligatoria (máximo {LONGITUD_CLAVE} caracteres).")
+    if not isinstance(registros, list):
+        raise LoteInvalido("'registros' debe ser una lista.")
+    if len(registros) > LIMITE_REGISTROS:
+        raise LoteInvalido(f"El lote supera el máximo de {LIMITE_REGISTROS} registros.")
+
+    previa = _respuesta_previa(maestro, clave)
+    if previa is not None:
+        return previa
+
+    errores = {}
+    leidos = {}
+    for indice, registro in enumerate(registros):
+        try:
+            leidos[indice] = _leer(registro)
+        except ValueError as error:
+            errores[indice] = str(error)
+
+    clases = list(Clase.objects.filter(maestro=maestro, pk__in={datos[0] for datos in leidos.values()}))
+    clase_ids = {clase.pk for clase in clases}
+    pendientes = {}
+    for indice, (clase_id, estudiante_id, fecha, estado) in leidos.items():
+        if clase_id not in clase_ids:
+            errores[indice] = "La clase no existe o no está asignada a este maestro."
+        else:
+            pendientes[indice] = (clase_id, estudiante_id, fecha)
+
+    try:
+        with transaction.atomic():
+            guardados = asistencia.guardar_registros(clases, {
+                llave: leidos[indice][3] for indice, llave in pendientes.items()
+            })
+            for indice, llave in pendientes.items():
+                if llave not in guardados:
+                    errores[indice] = "El estudiante no está inscrito en la clase."
+
+            resultados = [
+                {'indice': indice, 'ok': False, 'error': errores[indice]} if indice in errores
+                else {'indice': indice, 'ok': True}
+                for indice in range(len(registros))
+            ]
+            respuesta = {
+                'clave': clave,
+                'guardados': len(registros) - len(errores),
+                'errores': len(errores),
+                'resultados': resultados,
+            }
+            LoteSincronizacion.objects.create(maestro=maestro, clave=clave, respuesta=respuesta)
+    except IntegrityError:
+        # El mismo lote llegó dos veces a la vez: vale el que se guardó primero
+        previa = _respuesta_previa(maestro, clave)
+        if previa is None:
+            raise
+        return previa
+    return dict(respuesta, repetido=False)
@@ -1,3 +1,1351 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+import json
+from decimal import Decimal
+import os
+import time as time_module
+from io import BytesIO, StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+from zipfile import ZipFile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from academico.models import Curso, Grado, PeriodoAcademico, Clase, Actividad, Entrega, AsistenciaClase, BitacoraPedagogica, CategoriaCalificacion, Competencia
+from users.models import User, Maestro, Estudiante, PadreDeFamilia
+from .dashboard import actividades_del_maestro, clases_del_maestro, construir_dashboard, contadores_por_curso
+from .kpi import kpi_maestro, tarjeta_curso
+from .models import ResumenKpiCurso, Notificacion, NotificacionUsuario, NotaFinal, PosicionRanking, ResumenAcademico, BoletaGenerada, DominioCompetencia, AsistenciaMensual, LoteSincronizacion, DispositivoKiosco
+from . import asistencia, asistencia_mensual, boletas, calificaciones, dominio, historial, importacion, kiosco, notificaciones, ranking
+from .libro_notas import MatrizCalificaciones
+from .services import StudentDashboardService, FamilyOverviewService
+from .permisos import hijos_del_padre
+from .tiempos import estadisticas_llenado
+
+
+class PortalTestMixin:
+    """Utilidades para crear datos mínimos del portal."""
+
+    def crear_maestro(self, username='maestro'):
+        user = User.objects.create_user(
+            username=username, password='x', user_type=User.UserType.MAESTRO,
+            first_name='Ana', last_name='López'
+        )
+        return Maestro.objects.create(
+            user=user, numero_empleado=f"EMP-{user.pk:04d}",
+            especialidad='General', fecha_contratacion=date(2020, 1, 1)
+        )
+
+    def crear_estudiante(self, username):
+        user = User.objects.create_user(
+            username=username, password='x', user_type=User.UserType.ESTUDIANTE,
+            first_name=username.title(), last_name='Pérez'
+        )
+        return Estudiante.objects.create(
+            user=user, matricula=f"EST-{user.pk:04d}", fecha_nacimiento=date(2010, 1, 1),
+            nombre_padre='Padre', contacto_emergencia='555'
+        )
+
+    def crear_periodo(self):
+        return PeriodoAcademico.objects.create(
+            nombre='2025', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31)
+        )
+
+    def crear_clase(self, maestro, periodo, indice, estudiantes=(), dia='LUN'):
+        curso = Curso.objects.create(nombre=f"Curso {indice}", codigo=f"C{indice}")
+        clase = Clase.objects.create(
+            periodo=periodo, curso=curso, maestro=maestro,
+            dia_semana=dia, hora_inicio=time(7 + indice % 10), hora_fin=time(8 + indice % 10)
+        )
+        clase.estudiantes.set(estudiantes)
+        return clase
+
+
+class DatosDashboardMixin(PortalTestMixin):
+
+    def setUp(self):
+        cache.clear()
+        self.maestro = self.crear_maestro()
+        self.periodo = self.crear_periodo()
+        self.estudiantes = [self.crear_estudiante(f"alumno{i}") for i in range(3)]
+        self.indice = 0
+
+    def agregar_curso(self):
+        self.indice += 1
+        clase = self.crear_clase(self.maestro, self.periodo, self.indice, self.estudiantes)
+        ahora = timezone.now()
+        for n in range(2):
+            actividad = Actividad.objects.create(
+                clase=clase, titulo=f"Tarea {n}", fecha_entrega=ahora,
+                fecha_inicio_calculo=ahora - timedelta(minutes=10), fecha_fin_calculo=ahora,
+            )
+            for i, estudiante in enumerate(self.estudiantes):
+                Entrega.objects.create(
+                    actividad=actividad, estudiante=estudiante,
+                    calificacion=Decimal(80 + i * 5) if i < 2 else None
+                )
+        for i, estudiante in enumerate(self.estudiantes):
+            AsistenciaClase.objects.create(
+                clase=clase, estudiante=estudiante, fecha=date(2025, 2, 3),
+                estado=AsistenciaClase.EstadoAsistencia.PRESENTE if i else AsistenciaClase.EstadoAsistencia.AUSENTE
+            )
+        BitacoraPedagogica.objects.create(clase=clase, fecha=date(2025, 2, 3), temas_cubiertos='Tema')
+        return clase
+
+
+def dashboard_sin_snapshots(maestro, periodo):
+    """Referencia para las pruebas: el dashboard completo calculado sin ResumenKpiCurso."""
+    clases = clases_del_maestro(maestro, periodo)
+    clase_ids = [clase.pk for clase in clases]
+    return construir_dashboard(clases, actividades_del_maestro(clase_ids), contadores_por_curso(clase_ids))
+
+
+class DashboardMaestroTests(DatosDashboardMixin, TestCase):
+
+    def contar_consultas(self, funcion, *args):
+        # La primera llamada crea los resúmenes que falten; se mide la siguiente
+        funcion(self.maestro, self.periodo, *args)
+        with CaptureQueriesContext(connection) as consultas:
+            funcion(self.maestro, self.periodo, *args)
+        return len(consultas)
+
+    def test_numero_de_consultas_constante(self):
+        clase = self.agregar_curso()
+        consultas_kpi = self.contar_consultas(kpi_maestro)
+        consultas_tarjeta = self.contar_consultas(tarjeta_curso, clase.curso_id)
+        for _ in range(4):
+            self.agregar_curso()
+        clase.estudiantes.add(self.crear_estudiante('extra'))
+        Actividad.objects.create(clase=clase, titulo='Extra', fecha_entrega=timezone.now())
+        self.assertEqual(self.contar_consultas(kpi_maestro), consultas_kpi)
+        self.assertEqual(self.contar_consultas(tarjeta_curso, clase.curso_id), consultas_tarjeta)
+
+    def test_kpis_por_curso(self):
+        clase = self.agregar_curso()
+        self.agregar_curso()
+        kpi, _ = kpi_maestro(self.maestro, self.periodo)
+
+        self.assertEqual(kpi['total_cursos'], 2)
+        self.assertEqual(kpi['total_estudiantes'], 3)
+        self.assertEqual(kpi['total_actividades'], 4)
+        self.assertEqual(kpi['total_entregas'], 12)
+        self.assertEqual(kpi['total_entregas_calificadas'], 8)
+        self.assertEqual(kpi['promedio_general'], Decimal('82.5'))
+        self.assertEqual(kpi['tasa_asistencia'], 66.7)
+        self.assertEqual(kpi['total_bitacoras'], 2)
+        self.assertEqual(kpi['total_actividades_con_tiempo'], 4)
+        self.assertEqual(kpi['tiempo_promedio_actividad'], '10m 0s')
+
+        curso = tarjeta_curso(self.maestro, self.periodo, clase.curso_id)
+        self.assertEqual(curso['total_entregas'], 6)
+        self.assertEqual(curso['total_entregas_calificadas'], 4)
+        self.assertEqual(curso['num_estudiantes'], 3)
+        self.assertEqual(curso['bitacoras'], 1)
+        self.assertEqual([a.num_entregas for a in curso['actividades']], [3, 3])
+        self.assertEqual([a.num_calificadas for a in curso['actividades']], [2, 2])
+
+    def test_vista_portal_maestro(self):
+        self.agregar_curso()
+        self.client.force_login(self.maestro.user)
+        response = self.client.get(reverse('portal_maestro'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['kpi']['total_cursos'], 1)
+        self.assertEqual(response.context['kpi']['total_entregas'], 6)
+        self.assertContains(response, reverse('tarjeta_curso_maestro', args=[response.context['cursos_con_clases'][0]['curso'].pk]))
+
+    def test_tarjeta_curso(self):
+        clase = self.agregar_curso()
+        otro = self.crear_clase(self.crear_maestro('otro'), self.periodo, 99)
+        self.client.force_login(self.maestro.user)
+        url = reverse('tarjeta_curso_maestro', args=[clase.curso_id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Tarea 0')
+
+        datos = self.client.get(url, {'formato': 'json'}).json()
+        self.assertEqual(datos['num_estudiantes'], 3)
+        self.assertEqual([a['num_entregas'] for a in datos['actividades']], [3, 3])
+
+        # Un cambio en el curso invalida la tarjeta cacheada
+        Actividad.objects.create(clase=clase, titulo='Tarea nueva', fecha_entrega=timezone.now())
+        self.assertContains(self.client.get(url), 'Tarea nueva')
+
+        response = self.client.get(reverse('tarjeta_curso_maestro', args=[otro.curso_id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ResumenKpiTests(DatosDashboardMixin, TestCase):
+
+    def assertResumenCoincide(self):
+        kpi_snapshot, cursos_snapshot = kpi_maestro(self.maestro, self.periodo)
+        kpi_vivo, cursos_vivo = dashboard_sin_snapshots(self.maestro, self.periodo)
+        self.assertEqual(kpi_snapshot, kpi_vivo)
+        self.assertEqual([item['curso'] for item in cursos_snapshot], [item['curso'] for item in cursos_vivo])
+        for vivo in cursos_vivo:
+            snapshot = tarjeta_curso(self.maestro, self.periodo, vivo['curso'].pk)
+            self.assertEqual(
+                {k: v for k, v in snapshot.items() if k not in ('actividades', 'clases', 'estudiantes')},
+                {k: v for k, v in vivo.items() if k not in ('actividades', 'clases', 'estudiantes')},
+            )
+
+    def test_actualizacion_incremental(self):
+        clase = self.agregar_curso()
+        self.assertResumenCoincide()
+        self.assertEqual(ResumenKpiCurso.objects.count(), 1)
+
+        entrega = Entrega.objects.filter(actividad__clase=clase, calificacion__isnull=True).first()
+        entrega.calificacion = Decimal('100')
+        entrega.save()
+        AsistenciaClase.objects.filter(clase=clase).first().delete()
+        ahora = timezone.now()
+        Actividad.objects.create(
+            clase=clase, titulo='Nueva', fecha_entrega=ahora,
+            fecha_inicio_calculo=ahora - timedelta(minutes=90), fecha_fin_calculo=ahora,
+        )
+        BitacoraPedagogica.objects.create(clase=clase, fecha=date(2025, 2, 4), temas_cubiertos='Tema')
+        self.assertResumenCoincide()
+
+    def test_rebuild_kpi_snapshots(self):
+        self.agregar_curso()
+        self.agregar_curso()
+        kpi_maestro(self.maestro, self.periodo)
+        ResumenKpiCurso.objects.update(total_entregas=0)
+
+        call_command('rebuild_kpi_snapshots', stdout=StringIO())
+        self.assertEqual(ResumenKpiCurso.objects.count(), 2)
+        self.assertResumenCoincide()
+
+    def test_reasignar_clase_mueve_sus_aportes(self):
+        clase = self.agregar_curso()
+        otra = self.agregar_curso()
+        otro_maestro = self.crear_maestro('otro')
+        kpi_maestro(self.maestro, self.periodo)
+        kpi_maestro(otro_maestro, self.periodo)
+
+        clase.curso = otra.curso
+        clase.save()
+        self.assertEqual(
+            dict(ResumenKpiCurso.objects.filter(maestro=self.maestro).values_list('curso', 'total_entregas')),
+            {otra.curso_id: 12},
+        )
+        self.assertResumenCoincide()
+
+        clase.maestro = otro_maestro
+        clase.save()
+        self.assertEqual(
+            list(ResumenKpiCurso.objects.values_list('maestro', 'curso', 'total_entregas').order_by('maestro')),
+            [(self.maestro.pk, otra.curso_id, 6), (otro_maestro.pk, otra.curso_id, 6)],
+        )
+        self.assertResumenCoincide()
+
+
+class EstadisticasLlenadoTests(DatosDashboardMixin, TestCase):
+
+    def test_percentiles_en_una_consulta(self):
+        clase = self.agregar_curso()
+        ahora = timezone.now()
+        for minutos in range(1, 9):
+            Actividad.objects.create(
+                clase=clase, titulo='T', fecha_entrega=ahora,
+                fecha_inicio_calculo=ahora - timedelta(minutes=minutos), fecha_fin_calculo=ahora,
+            )
+        # Duraciones no positivas se descartan
+        Actividad.objects.create(
+            clase=clase, titulo='T', fecha_entrega=ahora,
+            fecha_inicio_calculo=ahora, fecha_fin_calculo=ahora,
+        )
+
+        with self.assertNumQueries(1):
+            stats = estadisticas_llenado(Actividad.objects.all())
+
+        for nivel, clave in (('clase', clase.pk), ('curso', clase.curso_id), ('maestro', self.maestro.pk)):
+            self.assertEqual(stats[nivel][clave]['total'], 10)
+            self.assertEqual(stats[nivel][clave]['promedio_segundos'], 336.0)
+            self.assertEqual(stats[nivel][clave]['p50'], '5m 0s')
+            self.assertEqual(stats[nivel][clave]['p90'], '10m 0s')
+
+
+class StudentDashboardServiceTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        self.estudiante = self.estudiantes[0]
+
+    def test_resultado_cacheado(self):
+        datos = StudentDashboardService(self.estudiante, self.periodo).obtener()
+        self.assertEqual(len(datos['clases_inscritas']), 1)
+        self.assertEqual(datos['horario_por_dia']['Lunes'], datos['clases_inscritas'])
+        self.assertEqual([a.fue_entregada for a in datos['actividades']], [True, True])
+        self.assertEqual(list(datos['actividades_por_curso']), [self.clase.curso.nombre])
+
+        with self.assertNumQueries(0):
+            StudentDashboardService(self.estudiante, self.periodo).obtener()
+
+    def test_invalidacion(self):
+        servicio = StudentDashboardService(self.estudiante, self.periodo)
+        servicio.obtener()
+
+        Entrega.objects.filter(estudiante=self.estudiante).update(calificacion=None)
+        Entrega.objects.filter(estudiante=self.estudiante).first().save()
+        self.assertIsNone(servicio.obtener()['actividades'][0].calificacion_obtenida)
+
+        Actividad.objects.create(clase=self.clase, titulo='Nueva', fecha_entrega=timezone.now())
+        self.assertEqual(len(servicio.obtener()['actividades']), 3)
+
+        self.clase.estudiantes.remove(self.estudiante)
+        self.assertEqual(servicio.obtener()['clases_inscritas'], [])
+
+        self.estudiante.clases_inscritas.add(self.clase)
+        self.assertEqual(len(servicio.obtener()['clases_inscritas']), 1)
+
+    def test_vistas_estudiante_y_padre(self):
+        self.client.force_login(self.estudiante.user)
+        response = self.client.get(reverse('portal_estudiante'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['actividades']), 2)
+
+        user = User.objects.create_user(username='padre', password='x', user_type=User.UserType.PADRE)
+        padre = PadreDeFamilia.objects.create(user=user)
+        padre.hijos.add(self.estudiante)
+        self.client.force_login(user)
+        response = self.client.get(reverse('portal_padre_ver_estudiante', args=[self.estudiante.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['actividades']), 2)
+
+
+class FamilyOverviewTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        Actividad.objects.create(clase=self.clase, titulo='Pendiente', fecha_entrega=timezone.now())
+        # Lunes, antes de la fecha de entrega de todas las actividades
+        self.lunes = timezone.make_aware(datetime(2025, 2, 3, 8, 0))
+
+    def test_consultas_por_seccion(self):
+        with self.assertNumQueries(3):
+            resumen = FamilyOverviewService(self.estudiantes, self.periodo, ahora=self.lunes).obtener()
+
+        self.assertEqual([r['estudiante'] for r in resumen], self.estudiantes)
+        for r in resumen:
+            self.assertEqual(r['clases_hoy'], [self.clase])
+            self.assertEqual([a.titulo for a in r['pendientes']], ['Pendiente'])
+        self.assertEqual([e.calificacion for e in resumen[1]['calificaciones']], [Decimal('85'), Decimal('85')])
+        self.assertEqual(resumen[2]['calificaciones'], [])
+
+        domingo = self.lunes - timedelta(days=1)
+        resumen = FamilyOverviewService(self.estudiantes, self.periodo, ahora=domingo).obtener()
+        self.assertEqual(resumen[0]['clases_hoy'], [])
+
+    def test_vista_portal_padre(self):
+        user = User.objects.create_user(username='padre', password='x', user_type=User.UserType.PADRE)
+        padre = PadreDeFamilia.objects.create(user=user)
+        padre.hijos.set(self.estudiantes[:2])
+        self.client.force_login(user)
+        response = self.client.get(reverse('portal_padre'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['resumen_familiar']), 2)
+        self.assertContains(response, 'Pendiente')
+
+
+class AutorizacionPadreTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agregar_curso()
+        user = User.objects.create_user(username='padre', password='x', user_type=User.UserType.PADRE)
+        self.padre = PadreDeFamilia.objects.create(user=user)
+        self.padre.hijos.add(self.estudiantes[0])
+        self.client.force_login(user)
+
+    def test_hijos_cacheados_e_invalidados(self):
+        self.assertEqual(hijos_del_padre(self.padre.pk), {self.estudiantes[0].pk})
+        with self.assertNumQueries(0):
+            hijos_del_padre(self.padre.pk)
+
+        self.padre.hijos.add(self.estudiantes[1])
+        self.assertEqual(hijos_del_padre(self.padre.pk), {self.estudiantes[0].pk, self.estudiantes[1].pk})
+        self.estudiantes[0].padres.clear()
+        self.assertEqual(hijos_del_padre(self.padre.pk), {self.estudiantes[1].pk})
+
+    def test_vistas_del_padre(self):
+        hijo, ajeno = self.estudiantes[0], self.estudiantes[1]
+        for nombre in ('portal_padre_ver_estudiante', 'portal_padre_calificaciones'):
+            self.assertEqual(self.client.get(reverse(nombre, args=[hijo.pk])).status_code, 200)
+            self.assertEqual(self.client.get(reverse(nombre, args=[ajeno.pk])).status_code, 403)
+            self.assertEqual(self.client.get(reverse(nombre, args=['x'])).status_code, 403)
+
+        self.padre.hijos.add(ajeno)
+        response = self.client.get(reverse('portal_padre_calificaciones', args=[ajeno.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['estudiante'], ajeno)
+
+
+class NotificacionesTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        self.admin = User.objects.create_user(username='admin', password='x', user_type=User.UserType.ADMIN)
+        self.padre_user = User.objects.create_user(username='padre', password='x', user_type=User.UserType.PADRE)
+        PadreDeFamilia.objects.create(user=self.padre_user).hijos.add(self.estudiantes[0])
+
+    def destinatarios(self, **kwargs):
+        notificacion = Notificacion.objects.create(autor=self.admin, mensaje='Hola', **kwargs)
+        notificaciones.distribuir(notificacion, tamano_lote=2)
+        return set(notificacion.destinatarios.values_list('usuario__username', flat=True))
+
+    def test_distribucion_por_audiencia(self):
+        alumnos = {e.user.username for e in self.estudiantes}
+        self.assertEqual(self.destinatarios(), alumnos | {'maestro', 'padre'})
+        self.assertEqual(self.destinatarios(audiencia=Notificacion.TargetAudiencia.MAESTROS), {'maestro'})
+
+        otra = self.crear_clase(self.crear_maestro('otro'), self.periodo, 2, self.estudiantes[1:])
+        self.assertEqual(
+            self.destinatarios(clase=otra),
+            {self.estudiantes[1].user.username, self.estudiantes[2].user.username, 'otro'}
+        )
+
+        grado = Grado.objects.create(nombre='1ro A', periodo=self.periodo)
+        grado.clases.add(self.clase)
+        Estudiante.objects.filter(pk=self.estudiantes[0].pk).update(grado=grado)
+        self.assertEqual(
+            self.destinatarios(grado=grado, audiencia=Notificacion.TargetAudiencia.PADRES),
+            {'padre'}
+        )
+        self.assertEqual(
+            self.destinatarios(grado=grado),
+            {self.estudiantes[0].user.username, 'maestro', 'padre'}
+        )
+
+    def test_envio_desde_portal_admin(self):
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('portal_admin'), {
+                'audiencia': Notificacion.TargetAudiencia.ESTUDIANTES, 'mensaje': 'Examen'
+            })
+        self.assertRedirects(response, reverse('portal_admin'), fetch_redirect_response=False)
+        notificacion = Notificacion.objects.get()
+        self.assertIsNotNone(notificacion.fecha_distribucion)
+        self.assertEqual(notificacion.destinatarios.count(), 3)
+
+        call_command('distribuir_notificaciones', '--todas', stdout=StringIO())
+        self.assertEqual(NotificacionUsuario.objects.count(), 3)
+
+    def test_bandeja_y_contador(self):
+        usuario = self.estudiantes[0].user
+        for _ in range(5):
+            self.destinatarios()
+        self.assertEqual(notificaciones.no_leidas(usuario), 5)
+
+        filas, siguiente = notificaciones.bandeja(usuario, tamano=2)
+        pagina2, siguiente2 = notificaciones.bandeja(usuario, antes=siguiente, tamano=2)
+        pagina3, fin = notificaciones.bandeja(usuario, antes=siguiente2, tamano=2)
+        ids = [f.pk for f in filas + pagina2 + pagina3]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 5)
+        self.assertIsNone(fin)
+
+        self.client.force_login(usuario)
+        response = self.client.get(reverse('bandeja_notificaciones'))
+        self.assertEqual(response.context['notificaciones_no_leidas'], 5)
+        self.client.post(reverse('marcar_notificaciones_leidas'), {'id': [filas[0].pk]})
+        self.assertEqual(notificaciones.no_leidas(usuario), 4)
+        self.client.post(reverse('marcar_notificaciones_leidas'))
+        self.assertEqual(notificaciones.no_leidas(usuario), 0)
+
+
+class RespuestaCondicionalTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+
+    def assertCondicional(self, url, cambio):
+        self.client.get(url)  # Fija la cookie CSRF, que forma parte del ETag
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        cambio()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_portal_estudiante(self):
+        estudiante = self.estudiantes[0]
+        self.client.force_login(estudiante.user)
+        entrega = Entrega.objects.filter(estudiante=estudiante).first()
+        self.assertCondicional(reverse('portal_estudiante'), lambda: entrega.delete())
+
+    def test_portal_maestro(self):
+        self.client.force_login(self.maestro.user)
+        self.assertCondicional(
+            reverse('portal_maestro'),
+            lambda: Actividad.objects.create(clase=self.clase, titulo='Nueva', fecha_entrega=timezone.now())
+        )
+
+    def test_portal_padre(self):
+        user = User.objects.create_user(username='padre', password='x', user_type=User.UserType.PADRE)
+        PadreDeFamilia.objects.create(user=user).hijos.add(self.estudiantes[0])
+        self.client.force_login(user)
+        admin = User.objects.create_user(username='admin', password='x', user_type=User.UserType.ADMIN)
+
+        def notificar():
+            notificaciones.distribuir(Notificacion.objects.create(autor=admin, mensaje='Aviso'))
+
+        self.assertCondicional(reverse('portal_padre'), notificar)
+
+
+class LibretaCalificacionesTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clases = [self.agregar_curso(), self.agregar_curso()]
+        self.estudiante = self.estudiantes[1]
+        entrega = Entrega.objects.filter(estudiante=self.estudiante, actividad__clase=self.clases[0]).first()
+        entrega.calificacion = Decimal('95')
+        entrega.save()
+
+    def test_resumen_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            cursos = calificaciones.resumen_por_curso(self.estudiante)
+        self.assertEqual([c['curso'] for c in cursos], ['Curso 1', 'Curso 2'])
+        self.assertEqual(cursos[0]['total'], 2)
+        self.assertEqual(cursos[0]['minima'], Decimal('85'))
+        self.assertEqual(cursos[0]['maxima'], Decimal('95'))
+        self.assertAlmostEqual(float(cursos[0]['promedio']), 90.0)
+
+        detalle = calificaciones.detalle_curso(self.estudiante, self.clases[0].curso_id)
+        self.assertEqual(sorted(f['calificacion'] for f in detalle), [Decimal('85'), Decimal('95')])
+
+    def test_vistas(self):
+        self.client.force_login(self.estudiante.user)
+        response = self.client.get(reverse('mis_calificaciones'))
+        self.assertEqual(len(response.context['cursos']), 2)
+        response = self.client.get(reverse('mis_calificaciones_curso', args=[self.clases[0].curso_id]))
+        self.assertContains(response, '95')
+
+        user = User.objects.create_user(username='padre', password='x', user_type=User.UserType.PADRE)
+        PadreDeFamilia.objects.create(user=user).hijos.add(self.estudiante)
+        self.client.force_login(user)
+        url = reverse('portal_padre_calificaciones_curso', args=[self.estudiante.pk, self.clases[0].curso_id])
+        self.assertContains(self.client.get(url), '95')
+        url = reverse('portal_padre_calificaciones_curso', args=[self.estudiantes[0].pk, self.clases[0].curso_id])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class LibroNotasTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+
+    def test_matriz(self):
+        with self.assertNumQueries(3):
+            matriz = MatrizCalificaciones(self.clase)
+        self.assertEqual(matriz.valores.shape, (3, 2))
+        filas = list(matriz.filas())
+        self.assertEqual([f[2] for f in filas], [80.0, 85.0, None])
+        self.assertEqual(matriz.promedios_actividades, [82.5, 82.5])
+        self.assertEqual(matriz.promedio_general, 82.5)
+
+    def test_vista_y_exportacion_csv(self):
+        self.client.force_login(self.maestro.user)
+        response = self.client.get(reverse('libro_notas', args=[self.clase.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Tarea 1')
+
+        response = self.client.get(reverse('exportar_libro_notas', args=[self.clase.pk]), {'formato': 'csv'})
+        lineas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lineas[0], 'Estudiante,Tarea 0,Tarea 1,Promedio')
+        self.assertEqual(lineas[-1], 'Promedio,82.5,82.5,82.5')
+        self.assertEqual(len(lineas), 5)
+
+        response = self.client.get(reverse('exportar_libro_notas', args=[self.clase.pk]), {'formato': 'xlsx'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        hoja = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)['Calificaciones']
+        filas = [list(fila) for fila in hoja.iter_rows(values_only=True)]
+        self.assertEqual(filas[0], ['Estudiante', 'Tarea 0', 'Tarea 1', 'Promedio'])
+        self.assertEqual(filas[-1], ['Promedio', 82.5, 82.5, 82.5])
+        self.assertEqual(len(filas), 5)
+
+        self.client.force_login(self.crear_maestro('otro').user)
+        self.assertEqual(self.client.get(reverse('libro_notas', args=[self.clase.pk])).status_code, 403)
+
+class TomarAsistenciaTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        kpi_maestro(self.maestro, self.periodo)
+        self.client.force_login(self.maestro.user)
+
+    def url(self, fecha):
+        return reverse('tomar_asistencia_fecha', args=[self.clase.pk, fecha])
+
+    def datos(self, estados):
+        datos = {'form-TOTAL_FORMS': len(estados), 'form-INITIAL_FORMS': len(estados)}
+        for i, (estudiante_id, estado) in enumerate(estados.items()):
+            datos[f'form-{i}-estudiante_id'] = estudiante_id
+            datos[f'form-{i}-estado'] = estado
+        return datos
+
+    def contadores(self):
+        return ResumenKpiCurso.objects.filter(curso=self.clase.curso).values_list(
+            'total_asistencias', 'total_presentes'
+        ).get()
+
+    def test_hoja_precargada_con_una_consulta(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url('2025-02-03'))
+        self.assertEqual(len([q for q in consultas if 'academico_asistenciaclase' in q['sql']]), 1)
+        estados = {form.initial['estudiante_id']: form.initial['estado'] for form in response.context['formset']}
+        self.assertEqual(estados[self.estudiantes[0].pk], AsistenciaClase.EstadoAsistencia.AUSENTE)
+        self.assertEqual(estados[self.estudiantes[1].pk], AsistenciaClase.EstadoAsistencia.PRESENTE)
+
+    def test_guardar_en_un_upsert(self):
+        self.assertEqual(self.contadores(), (3, 2))
+        ajeno = self.crear_estudiante('ajeno')
+        estados = {estudiante.pk: AsistenciaClase.EstadoAsistencia.PRESENTE for estudiante in self.estudiantes}
+        estados[ajeno.pk] = AsistenciaClase.EstadoAsistencia.PRESENTE
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(self.url('2025-02-03'), self.datos(estados))
+        inserts = [q for q in consultas if q['sql'].startswith('INSERT INTO "academico_asistenciaclase"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse(AsistenciaClase.objects.filter(estudiante=ajeno).exists())
+        self.assertEqual(AsistenciaClase.objects.filter(clase=self.clase, fecha=date(2025, 2, 3)).count(), 3)
+        self.assertEqual(self.contadores(), (3, 3))
+
+        estados[self.estudiantes[2].pk] = AsistenciaClase.EstadoAsistencia.TARDANZA
+        self.client.post(self.url('2025-02-04'), self.datos(estados))
+        self.assertEqual(self.contadores(), (6, 5))
+
+class AsistenciaDiaTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clases = [self.agregar_curso(), self.agregar_curso()]
+        # Otro día de la semana: no aparece en la hoja del lunes
+        self.crear_clase(self.maestro, self.periodo, 9, self.estudiantes, dia='MAR')
+        kpi_maestro(self.maestro, self.periodo)
+        self.client.force_login(self.maestro.user)
+        self.url = reverse('asistencia_dia_fecha', args=['2025-02-03'])
+
+    def consultas_get(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url)
+        return response, len(consultas)
+
+    def test_consultas_fijas_y_guardado_en_una_transaccion(self):
+        response, consultas = self.consultas_get()
+        self.assertEqual([s['clase'] for s in response.context['secciones']], self.clases)
+        self.assertEqual(len(response.context['secciones'][0]['alumnos_con_form']), 3)
+        self.clases.append(self.agregar_curso())
+        response, consultas_con_otra_clase = self.consultas_get()
+        self.assertEqual(len(response.context['secciones']), 3)
+        self.assertEqual(consultas_con_otra_clase, consultas)
+
+        datos = {}
+        for seccion in response.context['secciones']:
+            formset = seccion['formset']
+            datos[f'{formset.prefix}-TOTAL_FORMS'] = datos[f'{formset.prefix}-INITIAL_FORMS'] = len(formset.forms)
+            for i, form in enumerate(formset):
+                datos[f'{formset.prefix}-{i}-estudiante_id'] = form.initial['estudiante_id']
+                datos[f'{formset.prefix}-{i}-estado'] = AsistenciaClase.EstadoAsistencia.PRESENTE
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(self.url, datos)
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        inserts = [q for q in consultas if q['sql'].startswith('INSERT INTO "academico_asistenciaclase"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            AsistenciaClase.objects.filter(fecha=date(2025, 2, 3), estado=AsistenciaClase.EstadoAsistencia.PRESENTE).count(), 9
+        )
+        self.assertEqual(
+            list(ResumenKpiCurso.objects.filter(curso=self.clases[0].curso).values_list('total_asistencias', 'total_presentes')),
+            [(3, 3)],
+        )
+
+class AsistenciaMensualTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+
+    def estados(self):
+        return dict(AsistenciaMensual.objects.filter(clase=self.clase).values_list('estudiante', 'estados'))
+
+    def test_filas_mensuales_siguen_a_la_asistencia(self):
+        e0, e1, e2 = (e.pk for e in self.estudiantes)
+        self.assertEqual(self.estados(), {e0: '--A', e1: '--P', e2: '--P'})
+
+        asistencia.guardar_asistencias(self.clase, date(2025, 2, 4), {e0: 'T', e1: 'P'})
+        AsistenciaClase.objects.get(clase=self.clase, estudiante_id=e2, fecha=date(2025, 2, 3)).delete()
+        registro = AsistenciaClase.objects.get(clase=self.clase, estudiante_id=e1, fecha=date(2025, 2, 3))
+        registro.fecha = date(2025, 2, 5)
+        registro.save()
+        self.assertEqual(self.estados(), {e0: '--AT', e1: '---PP'})
+
+        incremental = self.estados()
+        asistencia_mensual.reconstruir([self.clase.pk])
+        self.assertEqual(self.estados(), incremental)
+
+    def test_calendario_lee_filas_mensuales(self):
+        estudiante = self.estudiantes[0]
+        self.client.force_login(estudiante.user)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('calendario_asistencia'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in consultas if 'academico_asistenciaclase' in q['sql']])
+        self.assertEqual(len(response.context['meses']), 12)
+        febrero = response.context['meses'][1]
+        dias = {dia['dia']: dia['estado'] for semana in febrero['semanas'] for dia in semana if dia}
+        self.assertEqual(dias[3], 'A')
+        self.assertIn(('Ausente', 1), response.context['totales'])
+
+        url = reverse('calendario_asistencia_maestro', args=[self.clase.pk, estudiante.pk])
+        self.client.force_login(self.maestro.user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(self.crear_maestro('otro').user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+class SincronizacionAsistenciaTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        kpi_maestro(self.maestro, self.periodo)
+        self.otro = self.crear_maestro('otro')
+        self.ajena = self.crear_clase(self.otro, self.periodo, 5, self.estudiantes)
+        self.client.force_login(self.maestro.user)
+        self.url = reverse('sincronizar_asistencia')
+
+    def enviar(self, datos):
+        return self.client.post(self.url, json.dumps(datos), content_type='application/json')
+
+    def test_lote_con_errores_por_registro_y_reenvio_idempotente(self):
+        e0, e1, e2 = (e.pk for e in self.estudiantes)
+        fuera = self.crear_estudiante('fuera')
+        lote = {'clave': 'tableta-1:0001', 'registros': [
+            {'clase': self.clase.pk, 'estudiante': e0, 'fecha': '2025-02-03', 'estado': 'P'},
+            {'clase': self.clase.pk, 'estudiante': e1, 'fecha': '2025-02-10', 'estado': 'A'},
+            {'clase': self.clase.pk, 'estudiante': fuera.pk, 'fecha': '2025-02-10', 'estado': 'P'},
+            {'clase': self.ajena.pk, 'estudiante': e2, 'fecha': '2025-02-10', 'estado': 'P'},
+            {'clase': self.clase.pk, 'estudiante': e2, 'fecha': '2025-02-10', 'estado': 'X'},
+        ]}
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.enviar(lote).json()
+        inserts = [q for q in consultas if q['sql'].startswith('INSERT INTO "academico_asistenciaclase"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual((respuesta['guardados'], respuesta['errores'], respuesta['repetido']), (2, 3, False))
+        self.assertEqual([r['ok'] for r in respuesta['resultados']], [True, True, False, False, False])
+        self.assertEqual(
+            dict(AsistenciaClase.objects.filter(clase=self.clase, estudiante_id=e0).values_list('fecha', 'estado')),
+            {date(2025, 2, 3): 'P'},
+        )
+        self.assertFalse(AsistenciaClase.objects.filter(clase=self.ajena).exists())
+        # Había 3 registros con 2 presentes: se corrige la ausencia y se agrega una nueva
+        self.assertEqual(
+            list(ResumenKpiCurso.objects.filter(curso=self.clase.curso).values_list('total_asistencias', 'total_presentes')),
+            [(4, 3)],
+        )
+
+        with CaptureQueriesContext(connection) as consultas:
+            repetida = self.enviar(lote).json()
+        self.assertTrue(repetida['repetido'])
+        self.assertEqual(repetida['resultados'], respuesta['resultados'])
+        self.assertFalse([q for q in consultas if 'academico_asistenciaclase' in q['sql']])
+        self.assertEqual(LoteSincronizacion.objects.count(), 1)
+
+    def test_lote_mal_formado(self):
+        self.assertEqual(self.client.post(self.url, 'no es json', content_type='application/json').status_code, 400)
+        self.assertEqual(self.enviar({'registros': []}).status_code, 400)
+        self.assertEqual(self.enviar({'clave': 'k', 'registros': {}}).status_code, 400)
+        self.assertFalse(LoteSincronizacion.objects.exists())
+
+        self.client.force_login(self.estudiantes[0].user)
+        self.assertEqual(self.enviar({'clave': 'k', 'registros': []}).status_code, 403)
+
+
+class KioscoLlegadaTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()  # lunes de 8:00 a 9:00
+        kpi_maestro(self.maestro, self.periodo)
+        self.token, huella = kiosco.generar_token()
+        DispositivoKiosco.objects.create(nombre='Entrada', huella_token=huella, tolerancia_minutos=10)
+        kiosco._dispositivos.limpiar()
+        kiosco._padrones.limpiar()
+        self.buffer = kiosco.BufferAsistencia(intervalo=None)
+        parche = mock.patch.object(kiosco, 'buffer', self.buffer)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def llegar(self, estudiante, hora, dia=10, token=None):
+        ahora = timezone.make_aware(datetime(2025, 2, dia, *hora))
+        with mock.patch('django.utils.timezone.now', return_value=ahora):
+            return self.client.post(
+                reverse('kiosco_llegada'), json.dumps({'matricula': estudiante.matricula}),
+                content_type='application/json', HTTP_AUTHORIZATION=f"Token {token or self.token}",
+            )
+
+    def test_llegadas_en_bufer_y_guardado_en_lote(self):
+        e0, e1, e2 = self.estudiantes
+        respuesta = self.llegar(e0, (7, 45))
+        self.assertEqual(respuesta.status_code, 202)
+        self.assertEqual(respuesta.json()['estado'], 'P')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.llegar(e1, (8, 20)).json()['estado'], 'T')
+            self.assertTrue(self.llegar(e0, (8, 30)).json()['repetido'])
+        self.assertEqual(len(consultas), 0)
+        # El lunes anterior ya tenía asistencia: la llegada no la sobrescribe
+        self.llegar(e0, (8, 0), dia=3)
+        self.assertFalse(AsistenciaClase.objects.filter(fecha=date(2025, 2, 10)).exists())
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.buffer.vaciar(), 2)
+        inserts = [q for q in consultas if q['sql'].startswith('INSERT INTO "academico_asistenciaclase"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            dict(AsistenciaClase.objects.filter(clase=self.clase, fecha=date(2025, 2, 10)).values_list('estudiante', 'estado')),
+            {e0.pk: 'P', e1.pk: 'T'},
+        )
+        self.assertEqual(AsistenciaClase.objects.get(estudiante=e0, fecha=date(2025, 2, 3)).estado, 'A')
+        self.assertEqual(
+            list(ResumenKpiCurso.objects.filter(curso=self.clase.curso).values_list('total_asistencias', 'total_presentes')),
+            [(5, 3)],
+        )
+        self.assertEqual(self.buffer.vaciar(), 0)
+
+    def test_memoria_acotada_y_sin_fallos(self):
+        memoria = kiosco._Memoria(vigencia=60, maximo=2)
+        self.assertIsNone(memoria.obtener('malo', lambda: None))
+        self.assertEqual(memoria.valores, {})
+        for clave in 'abc':
+            memoria.obtener(clave, lambda: clave.upper())
+        self.assertEqual(list(memoria.valores), ['b', 'c'])
+        self.assertEqual(memoria.obtener('c', lambda: 'otro'), 'C')
+
+        with mock.patch.object(kiosco.time, 'monotonic', return_value=time_module.monotonic() + 120):
+            memoria.obtener('d', lambda: 'D')
+        self.assertEqual(list(memoria.valores), ['d'])
+
+        self.llegar(self.estudiantes[0], (8, 0), token='otro')
+        self.assertEqual(kiosco._dispositivos.valores, {})
+
+    def test_rechazos(self):
+        self.assertEqual(self.llegar(self.estudiantes[0], (8, 0), token='otro').status_code, 401)
+        self.assertEqual(self.llegar(self.estudiantes[0], (12, 0)).status_code, 404)
+        self.assertEqual(self.llegar(self.crear_estudiante('fuera'), (8, 0)).status_code, 404)
+        self.assertEqual(self.llegar(self.estudiantes[0], (8, 0), dia=11).status_code, 404)
+        self.assertFalse(self.buffer.pendientes)
+
+
+class CalificacionMasivaTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        self.actividad = Actividad.objects.filter(clase=self.clase).first()
+        self.url = reverse('actividad_entregas', args=[self.actividad.pk])
+
+    def datos(self, cambios):
+        """POST del formset con los valores actuales y los ``cambios`` por estudiante."""
+        formset = self.client.get(self.url).context['formset']
+        datos = {
+            'form-TOTAL_FORMS': len(formset.forms),
+            'form-INITIAL_FORMS': len(formset.forms),
+        }
+        for i, form in enumerate(formset):
+            entrega = form.instance
+            calificacion = cambios.get(entrega.estudiante_id, entrega.calificacion)
+            datos[f'form-{i}-id'] = entrega.pk
+            datos[f'form-{i}-calificacion'] = '' if calificacion is None else calificacion
+            datos[f'form-{i}-comentarios_maestro'] = entrega.comentarios_maestro
+        return datos
+
+    def test_guarda_solo_filas_cambiadas_en_un_update(self):
+        self.client.force_login(self.maestro.user)
+        sin_calificar = self.estudiantes[2]
+        StudentDashboardService(sin_calificar, self.periodo).obtener()
+        datos = self.datos({sin_calificar.pk: '70'})
+
+        with CaptureQueriesContext(connection) as consultas, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, datos)
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        updates = [q['sql'] for q in consultas if q['sql'].startswith('UPDATE "academico_entrega"')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(Entrega.objects.get(actividad=self.actividad, estudiante=sin_calificar).calificacion, Decimal('70'))
+        resumen = ResumenKpiCurso.objects.get(maestro=self.maestro, curso=self.clase.curso)
+        self.assertEqual(resumen.total_entregas_calificadas, 5)
+        self.assertIsNone(cache.get(StudentDashboardService.clave(sin_calificar.pk, self.periodo.pk)))
+
+    def test_errores_no_guardan_nada(self):
+        self.client.force_login(self.maestro.user)
+        datos = self.datos({self.estudiantes[0].pk: '60', self.estudiantes[1].pk: 'abc'})
+        response = self.client.post(self.url, datos)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].errors)
+        self.assertEqual(Entrega.objects.get(actividad=self.actividad, estudiante=self.estudiantes[0]).calificacion, Decimal('80'))
+
+        self.client.force_login(self.crear_maestro('otro').user)
+        self.assertEqual(self.client.post(self.url, datos).status_code, 403)
+
+    def test_estadisticas_cacheadas_e_invalidadas(self):
+        self.client.force_login(self.maestro.user)
+        datos = self.client.get(self.url, {'formato': 'json'}).json()
+        self.assertEqual((datos['media'], datos['mediana'], datos['desviacion']), (82.5, 82.5, 2.5))
+        self.assertEqual((datos['calificadas'], datos['sin_calificar'], datos['faltantes']), (2, 1, 0))
+        self.assertEqual([i['total'] for i in datos['histograma'] if i['desde'] == 80], [2])
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url, {'formato': 'json'})
+        self.assertFalse([q for q in consultas if 'academico_entrega' in q['sql']])
+
+        self.clase.estudiantes.add(self.crear_estudiante('nuevo'))
+        self.assertEqual(self.client.get(self.url, {'formato': 'json'}).json()['faltantes'], 1)
+
+        entrega = Entrega.objects.get(actividad=self.actividad, estudiante=self.estudiantes[2])
+        entrega.calificacion = Decimal('90')
+        with self.captureOnCommitCallbacks() as callbacks:
+            entrega.save()
+        # Hasta confirmar la transacción se siguen sirviendo las estadísticas cacheadas
+        self.assertEqual(self.client.get(self.url, {'formato': 'json'}).json()['calificadas'], 2)
+        for callback in callbacks:
+            callback()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['estadisticas']['mediana'], 85.0)
+
+        # Mover una entrega a otra actividad invalida también la de origen
+        otra = Actividad.objects.create(clase=self.clase, titulo='Extra', fecha_entrega=timezone.now())
+        entrega.actividad = otra
+        with self.captureOnCommitCallbacks(execute=True):
+            entrega.save()
+        self.assertEqual(self.client.get(self.url, {'formato': 'json'}).json()['calificadas'], 2)
+        self.assertEqual(self.client.get(self.url, {'formato': 'json'}).json()['maxima'], 85.0)
+        entrega.actividad = self.actividad
+        with self.captureOnCommitCallbacks(execute=True):
+            entrega.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, self.datos({self.estudiantes[2].pk: '60'}))
+        self.assertEqual(self.client.get(self.url, {'formato': 'json'}).json()['maxima'], 85.0)
+
+class NotasFinalesTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        self.examen, self.tarea = Actividad.objects.filter(clase=self.clase).order_by('titulo')
+
+    def nota(self, estudiante):
+        return NotaFinal.objects.get(estudiante=estudiante, curso=self.clase.curso, periodo=self.periodo).nota
+
+    def calificar(self, estudiante, actividad, calificacion):
+        entrega = Entrega.objects.get(estudiante=estudiante, actividad=actividad)
+        entrega.calificacion = calificacion
+        entrega.save()
+
+    def test_sin_esquema_es_el_promedio_simple(self):
+        self.assertEqual(self.nota(self.estudiantes[0]), Decimal('80'))
+        self.assertFalse(NotaFinal.objects.filter(estudiante=self.estudiantes[2]).exists())
+        self.calificar(self.estudiantes[2], self.tarea, Decimal('70'))
+        self.assertEqual(self.nota(self.estudiantes[2]), Decimal('70'))
+
+    def test_ponderacion_incremental_igual_a_recalcular(self):
+        examenes = CategoriaCalificacion.objects.create(curso=self.clase.curso, nombre='Exámenes', peso=60)
+        tareas = CategoriaCalificacion.objects.create(curso=self.clase.curso, nombre='Tareas', peso=40)
+        self.examen.categoria = examenes
+        self.examen.save()
+        self.tarea.categoria = tareas
+        self.tarea.save()
+
+        self.calificar(self.estudiantes[0], self.tarea, Decimal('100'))
+        self.assertEqual(self.nota(self.estudiantes[0]), Decimal('88.00'))
+        self.calificar(self.estudiantes[2], self.examen, Decimal('50'))
+        self.assertEqual(self.nota(self.estudiantes[2]), Decimal('50.00'))
+        Entrega.objects.get(estudiante=self.estudiantes[0], actividad=self.tarea).delete()
+        self.assertEqual(self.nota(self.estudiantes[0]), Decimal('80.00'))
+
+        incrementales = dict(NotaFinal.objects.values_list('estudiante_id', 'nota'))
+        call_command('rebuild_notas_finales', stdout=StringIO())
+        self.assertEqual(dict(NotaFinal.objects.values_list('estudiante_id', 'nota')), incrementales)
+
+        # Al eliminar la categoría sus actividades pesan el 60 % restante
+        tareas.delete()
+        self.assertEqual(self.nota(self.estudiantes[1]), Decimal('85.00'))
+
+    def test_reasignar_clase_mueve_sus_notas(self):
+        otra = self.crear_clase(self.maestro, self.periodo, 7)
+        self.clase.curso = otra.curso
+        self.clase.save()
+        self.assertEqual(
+            set(NotaFinal.objects.values_list('estudiante_id', 'curso_id', 'nota')),
+            {(self.estudiantes[0].pk, otra.curso_id, Decimal('80')), (self.estudiantes[1].pk, otra.curso_id, Decimal('85'))},
+        )
+        self.assertEqual(
+            set(ResumenAcademico.objects.values_list('estudiante_id', 'periodo_id')),
+            {(self.estudiantes[0].pk, self.periodo.pk), (self.estudiantes[1].pk, self.periodo.pk)},
+        )
+
+        nuevo = PeriodoAcademico.objects.create(nombre='2026', fecha_inicio=date(2026, 1, 1), fecha_fin=date(2026, 12, 31))
+        self.clase.periodo = nuevo
+        self.clase.save()
+        self.assertEqual(set(NotaFinal.objects.values_list('periodo_id', flat=True)), {nuevo.pk})
+
+    def test_boleta_lee_notas_precalculadas(self):
+        CategoriaCalificacion.objects.create(curso=self.clase.curso, nombre='Exámenes', peso=50)
+        self.client.force_login(self.estudiantes[1].user)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('boleta_estudiante'))
+        self.assertEqual([n['nota'] for n in response.context['reporte_notas']], [Decimal('85.00')])
+        self.assertFalse([q for q in consultas if 'academico_entrega' in q['sql']])
+
+class RankingTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agregar_curso()
+        self.clase = self.agregar_curso()
+        self.grado = Grado.objects.create(nombre='1ro A', periodo=self.periodo)
+        Estudiante.objects.filter(pk__in=[e.pk for e in self.estudiantes]).update(grado=self.grado)
+        entrega = Entrega.objects.filter(estudiante=self.estudiantes[2], actividad__clase=self.clase).first()
+        entrega.calificacion = Decimal('85')
+        entrega.save()
+
+    def test_posiciones_con_empates(self):
+        import numpy as np
+        posicion, total, percentil = ranking.posiciones(
+            np.array([1, 1, 1, 1, 2, 2]), np.array([90.0, 80.0, 90.0, 70.0, 50.0, 60.0])
+        )
+        self.assertEqual(list(posicion), [1, 3, 1, 4, 2, 1])
+        self.assertEqual(list(total), [4, 4, 4, 4, 2, 2])
+        self.assertEqual(list(percentil), [75.0, 37.5, 75.0, 12.5, 25.0, 75.0])
+
+    def test_empate_en_grado_no_depende_del_orden_de_las_notas(self):
+        NotaFinal.objects.all().delete()
+        cursos = [Curso.objects.create(nombre=f"Extra {i}", codigo=f"X{i}") for i in range(3)]
+        notas = [Decimal('70.10'), Decimal('80.20'), Decimal('90.30')]
+        e0, e1, e2 = self.estudiantes
+        NotaFinal.objects.bulk_create(
+            [NotaFinal(estudiante=e0, curso=c, periodo=self.periodo, acumulados={}, nota=n) for c, n in zip(cursos, notas)]
+            + [NotaFinal(estudiante=e1, curso=c, periodo=self.periodo, acumulados={}, nota=n)
+               for c, n in zip(cursos, notas[2:] + notas[:2])]
+            + [NotaFinal(estudiante=e2, curso=cursos[0], periodo=self.periodo, acumulados={}, nota=Decimal('95'))]
+        )
+        en_grado = {
+            fila.estudiante_id: (fila.posicion, fila.promedio)
+            for fila in ranking.calcular(self.periodo) if fila.ambito == PosicionRanking.Ambito.GRADO
+        }
+        self.assertEqual(en_grado, {
+            e2.pk: (1, Decimal('95.0')), e0.pk: (2, Decimal('80.2')), e1.pk: (2, Decimal('80.2')),
+        })
+
+    def test_comando_y_boleta(self):
+        with CaptureQueriesContext(connection) as consultas:
+            filas = ranking.actualizar(self.periodo)
+        self.assertEqual(len([q for q in consultas if q['sql'].startswith('SELECT')]), 1)
+        # 2 cursos (3 + 2 estudiantes calificados) y 3 estudiantes en el grado
+        self.assertEqual(filas, 8)
+        call_command('actualizar_ranking', periodo=self.periodo.pk, stdout=StringIO())
+
+        en_curso = dict(PosicionRanking.objects.filter(
+            curso=self.clase.curso, ambito=PosicionRanking.Ambito.CURSO
+        ).values_list('estudiante_id', 'posicion'))
+        self.assertEqual(en_curso, {self.estudiantes[0].pk: 3, self.estudiantes[1].pk: 1, self.estudiantes[2].pk: 1})
+        en_grado = PosicionRanking.objects.get(estudiante=self.estudiantes[0], ambito=PosicionRanking.Ambito.GRADO)
+        self.assertEqual((en_grado.posicion, en_grado.total, en_grado.percentil), (3, 3, Decimal('16.67')))
+
+        self.client.force_login(self.estudiantes[1].user)
+        response = self.client.get(reverse('boleta_estudiante'))
+        self.assertEqual(response.context['ranking_grado'].posicion, 1)
+        self.assertEqual([f['ranking'].posicion for f in response.context['reporte_notas']], [1, 1])
+
+def pdf_de_prueba(datos):
+    """Sustituye a ``boletas.pdf_boleta`` en los procesos de trabajo (debe poder serializarse)."""
+    return f"PDF {datos['matricula']} {os.getpid()}".encode()
+
+
+class BoletasPdfTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        media = TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=media.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        # El PDF en sí depende de librerías del sistema; aquí basta con el HTML
+        for nombre, valor in (('WEASYPRINT_AVAILABLE', True), ('pdf_boleta', lambda datos: repr(datos).encode())):
+            parche = mock.patch.object(boletas, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def test_datos_en_consultas_fijas(self):
+        with self.assertNumQueries(4):
+            datos = boletas.datos_boletas(self.periodo)
+        self.assertEqual(set(datos), {self.estudiantes[0].pk, self.estudiantes[1].pk})
+        self.assertEqual(datos[self.estudiantes[0].pk]['notas'][0]['nota'], '80.00')
+
+    def test_omite_boletas_sin_cambios(self):
+        resultado = boletas.generar(self.periodo, procesos=1)
+        self.assertEqual((resultado.generadas, resultado.omitidas), (2, 0))
+        boleta = BoletaGenerada.objects.get(estudiante=self.estudiantes[0], periodo=self.periodo)
+        self.assertTrue(boleta.archivo.name.endswith(f"{self.estudiantes[0].matricula}.pdf"))
+
+        resultado = boletas.generar(self.periodo, procesos=1)
+        self.assertEqual((resultado.generadas, resultado.omitidas), (0, 2))
+
+        entrega = Entrega.objects.filter(estudiante=self.estudiantes[0], actividad__clase=self.clase).first()
+        entrega.calificacion = Decimal('100')
+        entrega.save()
+        resultado = boletas.generar(self.periodo, procesos=1)
+        self.assertEqual((resultado.generadas, resultado.omitidas), (1, 1))
+        nombre = BoletaGenerada.objects.get(estudiante=self.estudiantes[0], periodo=self.periodo).archivo.name
+        self.assertEqual(nombre, boleta.archivo.name)
+
+    def test_generacion_en_procesos_de_trabajo(self):
+        with mock.patch.object(boletas, 'pdf_boleta', pdf_de_prueba):
+            resultado = boletas.generar(self.periodo, procesos=2)
+        self.assertEqual((resultado.generadas, resultado.errores), (2, []))
+        for boleta in BoletaGenerada.objects.filter(periodo=self.periodo).select_related('estudiante'):
+            contenido = boleta.archivo.read().decode()
+            self.assertTrue(contenido.startswith(f"PDF {boleta.estudiante.matricula} "))
+            self.assertNotEqual(contenido.split()[-1], str(os.getpid()))
+
+    def test_accion_del_admin_lanza_el_comando(self):
+        grado = Grado.objects.create(nombre='1ro A', periodo=self.periodo)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+        with mock.patch.object(boletas.subprocess, 'Popen') as popen:
+            response = self.client.post(reverse('admin:academico_grado_changelist'), {
+                'action': 'generar_boletas', '_selected_action': [grado.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        comando = popen.call_args.args[0]
+        self.assertEqual(comando[2:], ['generar_boletas', '--periodo', str(self.periodo.pk), '--grado', str(grado.pk)])
+        self.assertTrue(popen.call_args.kwargs['start_new_session'])
+        self.assertFalse(BoletaGenerada.objects.exists())
+
+class DominioCompetenciaTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        self.tarea0, self.tarea1 = Actividad.objects.filter(clase=self.clase).order_by('titulo')
+        self.suma = Competencia.objects.create(curso=self.clase.curso, codigo='M1', descripcion='Suma')
+        self.resta = Competencia.objects.create(curso=self.clase.curso, codigo='M2', descripcion='Resta')
+        self.tarea0.competencias.add(self.suma, self.resta)
+        self.tarea1.competencias.add(self.suma)
+
+    def niveles(self, estudiante):
+        return dict(DominioCompetencia.objects.filter(estudiante=estudiante, periodo=self.periodo).values_list(
+            'competencia__codigo', 'nivel'
+        ))
+
+    def test_vincular_y_calificar_actualiza_el_dominio(self):
+        self.assertEqual(self.niveles(self.estudiantes[0]), {'M1': Decimal('80'), 'M2': Decimal('80')})
+        self.assertEqual(self.niveles(self.estudiantes[2]), {})
+
+        entrega = Entrega.objects.get(actividad=self.tarea1, estudiante=self.estudiantes[0])
+        entrega.calificacion = Decimal('100')
+        entrega.save()
+        self.assertEqual(self.niveles(self.estudiantes[0]), {'M1': Decimal('90'), 'M2': Decimal('80')})
+
+        Entrega.objects.filter(actividad=self.tarea0, estudiante=self.estudiantes[2]).update(calificacion=Decimal('60'))
+        calificaciones.propagar_calificaciones(self.clase, [self.estudiantes[2].pk])
+        self.assertEqual(self.niveles(self.estudiantes[2]), {'M1': Decimal('60'), 'M2': Decimal('60')})
+
+        # Lo incremental coincide con un recálculo completo
+        incremental = set(DominioCompetencia.objects.values_list('estudiante', 'competencia', 'nivel', 'evaluaciones'))
+        dominio.recalcular(self.clase.curso_id, self.periodo.pk)
+        self.assertEqual(
+            set(DominioCompetencia.objects.values_list('estudiante', 'competencia', 'nivel', 'evaluaciones')), incremental
+        )
+
+        entrega.delete()
+        self.tarea0.competencias.remove(self.resta)
+        self.assertEqual(self.niveles(self.estudiantes[0]), {'M1': Decimal('80')})
+        self.tarea0.delete()
+        self.assertEqual(self.niveles(self.estudiantes[0]), {})
+
+    def test_competencias_de_otro_curso_no_cuentan(self):
+        otro_curso = self.crear_clase(self.maestro, self.periodo, 99).curso
+        self.tarea1.competencias.add(Competencia.objects.create(curso=otro_curso, codigo='X1', descripcion='Ajena'))
+        entrega = Entrega.objects.get(actividad=self.tarea1, estudiante=self.estudiantes[2])
+        entrega.calificacion = Decimal('60')
+        entrega.save()
+        self.assertEqual(self.niveles(self.estudiantes[2]), {'M1': Decimal('60')})
+
+    def test_mapa_de_calor(self):
+        self.client.force_login(self.maestro.user)
+        url = reverse('mapa_competencias', args=[self.clase.pk])
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in consultas if 'portal_dominiocompetencia' in q['sql']]), 1)
+        filas = {fila['nombre']: fila for fila in response.context['filas']}
+        self.assertEqual(len(filas), 3)
+        self.assertEqual([c['etiqueta'] for c in response.context['competencias']], ['En proceso', 'En proceso'])
+
+        self.client.force_login(self.crear_maestro('otro').user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+class HistorialAcademicoTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.estudiante = self.estudiantes[0]
+        self.curso_anterior = self.agregar_curso().curso
+        self.curso_anterior.creditos = 4
+        self.curso_anterior.save()
+
+        self.periodo_nuevo = PeriodoAcademico.objects.create(
+            nombre='2026', fecha_inicio=date(2026, 1, 1), fecha_fin=date(2026, 12, 31)
+        )
+        clase = self.crear_clase(self.maestro, self.periodo_nuevo, 9, [self.estudiante])
+        actividad = Actividad.objects.create(clase=clase, titulo='Examen', fecha_entrega=timezone.now())
+        Entrega.objects.create(actividad=actividad, estudiante=self.estudiante, calificacion=Decimal('90'))
+
+    def resumen(self, periodo):
+        return ResumenAcademico.objects.get(estudiante=self.estudiante, periodo=periodo)
+
+    def test_promedio_por_periodo_y_acumulado(self):
+        anterior, nuevo = self.resumen(self.periodo), self.resumen(self.periodo_nuevo)
+        self.assertEqual((anterior.creditos, anterior.promedio, anterior.promedio_acumulado), (4, Decimal('80.00'), Decimal('80.00')))
+        self.assertEqual((nuevo.creditos, nuevo.promedio), (5, Decimal('90.00')))
+        self.assertEqual((nuevo.creditos_acumulados, nuevo.promedio_acumulado), (9, Decimal('85.56')))
+
+        # Cambiar los créditos de un curso actualiza el acumulado de periodos posteriores
+        self.curso_anterior.creditos = 1
+        self.curso_anterior.save()
+        self.assertEqual(self.resumen(self.periodo_nuevo).promedio_acumulado, Decimal('88.33'))
+
+        self.assertEqual([r.estudiante_id for r in historial.cuadro_de_honor(self.periodo_nuevo)], [self.estudiante.pk])
+        self.assertFalse(historial.cuadro_de_honor(self.periodo).exists())
+
+    def test_calificar_bloquea_al_estudiante(self):
+        entrega = Entrega.objects.filter(estudiante=self.estudiante, actividad__clase__periodo=self.periodo).first()
+        entrega.calificacion = Decimal('100')
+        with mock.patch.object(historial, 'bloquear', wraps=historial.bloquear) as bloquear:
+            entrega.save()
+        self.assertTrue(bloquear.call_args_list)
+        self.assertTrue(all(list(c.args[0]) == [self.estudiante.pk] for c in bloquear.call_args_list))
+        self.assertEqual(self.resumen(self.periodo).promedio, Decimal('90.00'))
+
+    def test_vista_historial(self):
+        self.client.force_login(self.estudiante.user)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('historial_academico'))
+        self.assertEqual([p['periodo'] for p in response.context['historial']], [self.periodo, self.periodo_nuevo])
+        self.assertEqual(response.context['resumen_actual'].promedio_acumulado, Decimal('85.56'))
+        self.assertFalse([q for q in consultas if 'academico_entrega' in q['sql']])
+
+class ImportacionCalificacionesTests(DatosDashboardMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clase = self.agregar_curso()
+        self.nueva = Actividad.objects.create(clase=self.clase, titulo='Proyecto', fecha_entrega=timezone.now())
+        self.matriculas = [e.matricula for e in self.estudiantes]
+
+    def csv(self, filas, encabezado='matricula,actividad,calificacion,comentario'):
+        return '\n'.join([encabezado] + filas).encode('utf-8')
+
+    def test_upsert_por_lotes_y_errores_por_fila(self):
+        contenido = self.csv([
+            f'{self.matriculas[0]},Tarea 0,95,Muy bien',
+            f'{self.matriculas[0]},{self.nueva.pk},70,',
+            f'{self.matriculas[1]},proyecto,88.5,',
+            f'{self.matriculas[2]},Proyecto,abc,',
+            f'EST-9999,Proyecto,90,',
+            f'{self.matriculas[2]},Examen,90,',
+            f'{self.matriculas[2]},Proyecto,1500,',
+        ])
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = importacion.importar_calificaciones(
+                self.clase, importacion.leer_csv(BytesIO(contenido)), tamano_lote=2
+            )
+        self.assertEqual(resultado.guardadas, 3)
+        self.assertEqual([linea for linea, _ in resultado.errores], [5, 6, 7, 8])
+        inserciones = [q for q in consultas if q['sql'].startswith('INSERT INTO "academico_entrega"')]
+        self.assertEqual(len(inserciones), 2)
+
+        entrega = Entrega.objects.get(actividad__titulo='Tarea 0', estudiante=self.estudiantes[0])
+        self.assertEqual((entrega.calificacion, entrega.comentarios_maestro), (Decimal('95'), 'Muy bien'))
+        self.assertEqual(Entrega.objects.filter(actividad=self.nueva).count(), 2)
+        # Lo derivado se actualiza una vez al final
+        self.assertEqual(
+            NotaFinal.objects.get(estudiante=self.estudiantes[1], curso=self.clase.curso).nota, Decimal('86.17')
+        )
+        self.assertEqual(ResumenKpiCurso.objects.get(curso=self.clase.curso).total_entregas, 8)
+
+    def test_importacion_xlsx_con_celdas_numericas(self):
+        Estudiante.objects.filter(pk=self.estudiantes[0].pk).update(matricula='12345')
+        libro = Workbook()
+        hoja = libro.active
+        hoja.append(['Matricula', 'Actividad', 'Calificacion', 'Comentario'])
+        hoja.append([12345.0, float(self.nueva.pk), 77.5, None])
+        hoja.append([12345, 'Tarea 1', 90, 'Bien'])
+        hoja.append([self.matriculas[1], 'Proyecto', '88', None])
+        hoja.append([99999.0, 'Proyecto', 60, None])
+        guardado = BytesIO()
+        libro.save(guardado)
+        # openpyxl escribe 12345.0 como 12345; Excel y otras herramientas lo guardan con decimales
+        contenido = BytesIO()
+        with ZipFile(guardado) as origen, ZipFile(contenido, 'w') as destino:
+            for nombre in origen.namelist():
+                datos = origen.read(nombre)
+                if nombre == 'xl/worksheets/sheet1.xml':
+                    datos = datos.replace(b'<v>12345</v>', b'<v>12345.0</v>', 1).replace(
+                        f'<v>{self.nueva.pk}</v>'.encode(), f'<v>{self.nueva.pk}.0</v>'.encode(), 1
+                    )
+                destino.writestr(nombre, datos)
+
+        self.client.force_login(self.maestro.user)
+        response = self.client.post(
+            reverse('importar_calificaciones', args=[self.clase.pk]),
+            {'archivo': SimpleUploadedFile('notas.xlsx', contenido.getvalue())},
+        )
+        resultado = response.context['resultado']
+        self.assertEqual(resultado.guardadas, 3)
+        self.assertEqual([linea for linea, _ in resultado.errores], [5])
+        self.assertEqual(
+            dict(Entrega.objects.filter(estudiante=self.estudiantes[0], actividad__clase=self.clase).values_list(
+                'actividad__titulo', 'calificacion'
+            )),
+            {'Tarea 0': Decimal('80'), 'Tarea 1': Decimal('90'), 'Proyecto': Decimal('77.5')},
+        )
+        self.assertEqual(Entrega.objects.get(actividad=self.nueva, estudiante=self.estudiantes[1]).calificacion, Decimal('88'))
+
+    def test_vista(self):
+        self.client.force_login(self.maestro.user)
+        url = reverse('importar_calificaciones', args=[self.clase.pk])
+        archivo = SimpleUploadedFile('notas.csv', self.csv([f'{self.matriculas[2]},Tarea 1,60'], 'Matricula,Actividad,Calificacion'))
+        response = self.client.post(url, {'archivo': archivo})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['resultado'].guardadas, 1)
+        self.assertEqual(Entrega.objects.get(actividad__titulo='Tarea 1', estudiante=self.estudiantes[2]).calificacion, Decimal('60'))
+
+        archivo = SimpleUploadedFile('notas.csv', self.csv([], 'matricula,nota'))
+        self.assertTrue(self.client.post(url, {'archivo': archivo}).context['form'].errors)
+
+        self.client.force_login(self.crear_maestro('otro').user)
+        self.assertEqual(self.client.get(url).status_code, 403)
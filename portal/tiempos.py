@@ -0,0 +1,107 @@
+"""
+Estadísticas del tiempo de llenado de formularios (Bitácora, Actividad y
+Planificación) calculadas en la base de datos.
+
+La duración es ``fecha_fin_calculo - fecha_inicio_calculo``. Los percentiles
+usan el método de rango más cercano: se numeran las duraciones de cada grupo
+con ``ROW_NUMBER()`` y solo se traen las filas en la posición ``ceil(p * n)``
+(comparado con aritmética entera para que SQL y Python coincidan).
+Así una sola consulta devuelve, a lo sumo, dos filas por grupo y nivel.
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+from academico.models import Actividad, Planificacion, BitacoraPedagogica
+from .dashboard import DURACION_LLENADO, formatear_duracion
+
+
+# Nivel de agrupación -> campo relativo al modelo (todos tienen FK 'clase').
+NIVELES = {
+    'clase': 'clase',
+    'curso': 'clase__curso',
+    'maestro': 'clase__maestro',
+}
+
+# (nombre, numerador, denominador) del percentil.
+PERCENTILES = (('p50', 1, 2), ('p90', 9, 10))
+
+
+def _estadistica_vacia(total):
+    return {
+        'total': total,
+        'promedio_segundos': None,
+        'p50_segundos': None,
+        'p90_segundos': None,
+        'promedio': None,
+        'p50': None,
+        'p90': None,
+    }
+
+
+def estadisticas_llenado(queryset, niveles=('clase', 'curso', 'maestro')):
+    """
+    Calcula cantidad, promedio, mediana (p50) y p90 de las duraciones de
+    llenado positivas del queryset, agrupadas por cada nivel pedido.
+
+    Ejecuta una sola consulta. Devuelve ``{nivel: {pk: estadistica}}`` donde
+    cada estadística trae los segundos y su versión formateada ('12m 5s').
+    """
+    anotaciones = {}
+    condicion = Q()
+    for nivel in niveles:
+        campo = F(NIVELES[nivel])
+        anotaciones[f"pos_{nivel}"] = Window(RowNumber(), partition_by=[campo], order_by=F('duracion').asc())
+        anotaciones[f"total_{nivel}"] = Window(Count('pk'), partition_by=[campo])
+        anotaciones[f"promedio_{nivel}"] = Window(Avg('duracion'), partition_by=[campo])
+        posicion, total = F(f"pos_{nivel}"), F(f"total_{nivel}")
+        for _, num, den in PERCENTILES:
+            # posicion == ceil(total * num / den)
+            condicion |= Q(
+                GreaterThanOrEqual(posicion * den, total * num),
+                LessThan((posicion - 1) * den, total * num),
+            )
+
+    filas = queryset.filter(
+        fecha_inicio_calculo__isnull=False,
+        fecha_fin_calculo__isnull=False,
+    ).annotate(
+        duracion=DURACION_LLENADO
+    ).filter(
+        duracion__gt=timedelta(0)
+    ).annotate(**anotaciones).filter(condicion).order_by().values(
+        'duracion', *[NIVELES[nivel] for nivel in niveles], *anotaciones.keys()
+    )
+
+    resultado = {nivel: {} for nivel in niveles}
+    for fila in filas:
+        segundos = fila['duracion'].total_seconds()
+        for nivel in niveles:
+            total = fila[f"total_{nivel}"]
+            stats = resultado[nivel].setdefault(fila[NIVELES[nivel]], _estadistica_vacia(total))
+            if stats['promedio_segundos'] is None:
+                promedio = fila[f"promedio_{nivel}"].total_seconds()
+                stats['promedio_segundos'] = round(promedio, 1)
+                stats['promedio'] = formatear_duracion(promedio)
+            for nombre, num, den in PERCENTILES:
+                if fila[f"pos_{nivel}"] == -(-total * num // den):
+                    stats[f"{nombre}_segundos"] = round(segundos, 1)
+                    stats[nombre] = formatear_duracion(segundos)
+    return resultado
+
+
+def tiempos_del_maestro(maestro, periodo):
+    """
+    Estadísticas de llenado del maestro en el periodo para cada formulario.
+    Una consulta por modelo; devuelve ``{'bitacora': stats, ...}`` (o ``None``).
+    """
+    resultado = {}
+    for clave, modelo in (('bitacora', BitacoraPedagogica), ('actividad', Actividad), ('planificacion', Planificacion)):
+        stats = estadisticas_llenado(
+            modelo.objects.filter(clase__maestro=maestro, clase__periodo=periodo),
+            niveles=('maestro',)
+        )
+        resultado[clave] = stats['maestro'].get(maestro.pk)
+    return resultado
@@ -4,8 +4,14 @@ from . import views
 urlpatterns = [
     path('estudiante/', views.PortalEstudianteView.as_view(), name='portal_estudiante'),
     path('estudiante/calificaciones/', views.MisCalificacionesView.as_view(), name='mis_calificaciones'),
+    path('estudiante/calificaciones/curso/<int:curso_pk>/', views.MisCalificacionesCursoView.as_view(), name='mis_calificaciones_curso'),
     path('maestro/', views.PortalMaestroView.as_view(), name='portal_maestro'),
+    path('maestro/curso/<int:curso_pk>/tarjeta/', views.TarjetaCursoMaestroView.as_view(), name='tarjeta_curso_maestro'),
     path('clase/<int:clase_pk>/crear-actividad/', views.ActividadCreateView.as_view(), name='actividad_create'),
+    path('clase/<int:clase_pk>/libro-notas/', views.LibroNotasView.as_view(), name='libro_notas'),
+    path('clase/<int:clase_pk>/libro-notas/exportar/', views.ExportarLibroNotasView.as_view(), name='exportar_libro_notas'),
+    path('clase/<int:clase_pk>/libro-notas/importar/', views.ImportarCalificacionesView.as_view(), name='importar_calificaciones'),
+    path('clase/<int:clase_pk>/competencias/', views.MapaCompetenciasView.as_view(), name='mapa_competencias'),
     path('actividad/<int:pk>/', views.ActividadDetailView.as_view(), name='actividad_detail'),
     path('actividad/<int:pk>/entregas/', views.ActividadEntregasView.as_view(), name='actividad_entregas'),
     path('actividad/<int:pk>/editar/', views.ActividadUpdateView.as_view(), name='actividad_update'),
@@ -19,6 +25,11 @@ urlpatterns = [
     path('noticias/<int:pk>/eliminar/', views.NoticiaDeleteView.as_view(), name='noticia_delete'),
     path('clase/<int:clase_pk>/asistencia/', views.TomarAsistenciaView.as_view(), name='tomar_asistencia'),
     path('clase/<int:clase_pk>/asistencia/<str:fecha>/', views.TomarAsistenciaView.as_view(), name='tomar_asistencia_fecha'),
+    path('clase/<int:clase_pk>/asistencia/estudiante/<int:estudiante_pk>/calendario/', views.MaestroCalendarioAsistenciaView.as_view(), name='calendario_asistencia_maestro'),
+    path('kiosco/llegada/', views.KioscoLlegadaView.as_view(), name='kiosco_llegada'),
+    path('asistencia/sincronizar/', views.SincronizarAsistenciaView.as_view(), name='sincronizar_asistencia'),
+    path('asistencia/dia/', views.AsistenciaDiaView.as_view(), name='asistencia_dia'),
+    path('asistencia/dia/<str:fecha>/', views.AsistenciaDiaView.as_view(), name='asistencia_dia_fecha'),
     path('clase/<int:clase_pk>/planificacion/', views.PlanificacionListView.as_view(), name='planificacion_list'),
     path('clase/<int:clase_pk>/planificacion/nueva/', views.PlanificacionCreateView.as_view(), name='planificacion_create'),
     path('planificacion/<int:pk>/editar/', views.PlanificacionUpdateView.as_view(), name='planificacion_update'),
@@ -26,6 +37,14 @@ urlpatterns = [
     path('padre/', views.PortalPadreView.as_view(), name='portal_padre'),
     path('padre/ver/<str:estudiante_pk>/', views.PadreEstudianteDashboardView.as_view(), name='portal_padre_ver_estudiante'),
     path('padre/ver/<str:estudiante_pk>/calificaciones/', views.PadreMisCalificacionesView.as_view(), name='portal_padre_calificaciones'),
+    path('padre/ver/<str:estudiante_pk>/calificaciones/curso/<int:curso_pk>/', views.PadreCalificacionesCursoView.as_view(), name='portal_padre_calificaciones_curso'),
     path('estudiante/boleta/', views.CalificacionesPeriodoView.as_view(), name='boleta_estudiante'),
+    path('estudiante/historial/', views.MiHistorialAcademicoView.as_view(), name='historial_academico'),
+    path('estudiante/asistencia/', views.MiCalendarioAsistenciaView.as_view(), name='calendario_asistencia'),
+    path('padre/ver/<str:estudiante_pk>/historial/', views.PadreHistorialAcademicoView.as_view(), name='portal_padre_historial'),
+    path('padre/ver/<str:estudiante_pk>/asistencia/', views.PadreCalendarioAsistenciaView.as_view(), name='portal_padre_asistencia'),
+    path('admin/cuadro-honor/', views.CuadroHonorView.as_view(), name='cuadro_honor'),
+    path('notificaciones/', views.BandejaNotificacionesView.as_view(), name='bandeja_notificaciones'),
+    path('notificaciones/marcar-leidas/', views.MarcarNotificacionesLeidasView.as_view(), name='marcar_notificaciones_leidas'),
     path('cambiar-periodo/', views.CambiarPeriodoView.as_view(), name='cambiar_periodo'),
 ]
\ No newline at end of file
@@ -1,21 +1,33 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import TemplateView, CreateView, FormView, DetailView, UpdateView, DeleteView, ListView
-from academico.models import Clase, PeriodoAcademico, Actividad, Entrega, AsistenciaClase, Planificacion, Competencia, BitacoraPedagogica
-from .forms import ActividadForm, EntregaForm, CalificacionForm, EntregaEditForm, NoticiaForm, NotificacionForm, AsistenciaForm, PlanificacionForm
-from portal.models import Noticia
+from academico.models import Clase, PeriodoAcademico, Actividad, Entrega, AsistenciaClase, Planificacion, Competencia
+from .forms import ActividadForm, EntregaForm, CalificacionForm, CalificacionMasivaFormSet, ImportarCalificacionesForm, EntregaEditForm, NoticiaForm, NotificacionForm, AsistenciaForm, PlanificacionForm
+from portal.models import Noticia, ResumenKpiCurso, NotaFinal
 from users.models import User, Maestro, Estudiante, PadreDeFamilia
 from datetime import datetime, timedelta, date
+from decimal import Decimal, InvalidOperation
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, get_object_or_404, render
 from django.urls import reverse_lazy, reverse
-from django.db.models import Exists, OuterRef, Subquery, DecimalField, Avg, Q, Case, When, Value, IntegerField, Count, F, ExpressionWrapper, DurationField
-from .models import Notificacion
+from django.db.models import Count
+from .kpi import kpi_maestro, tarjeta_curso, version_resumen
+from .dashboard import tarjeta_a_json
+from .tiempos import tiempos_del_maestro
+from .services import StudentDashboardService, FamilyOverviewService
+from .permisos import puede_ver_estudiante, hijos_del_padre
+from .condicional import RespuestaCondicionalMixin, huella, huella_estudiante, huella_familia, huella_noticias
+from . import asistencia, asistencia_mensual, calificaciones, dominio, estadisticas, historial, importacion, kiosco, notificaciones, ranking, sincronizacion
+from .libro_notas import MatrizCalificaciones, OPENPYXL_AVAILABLE, exportar_csv, exportar_xlsx
 from django.utils import timezone
 from django.forms import formset_factory
 from django.views import View
-from collections import defaultdict, OrderedDict
-from django.http import HttpResponseBadRequest, HttpResponseForbidden
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+import json
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, HttpResponse, JsonResponse, Http404, FileResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.template.loader import render_to_string
 from django.db import transaction
 
 
@@ -77,392 +89,208 @@ class PeriodoSeleccionadoMixin:
         return periodo_actual
 
 
-class PortalEstudianteView(LoginRequiredMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, TemplateView):
+class PortalEstudianteView(LoginRequiredMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, RespuestaCondicionalMixin, TemplateView):
     template_name = 'portal/portal_estudiante.html'
 
     def test_func(self):
         return (self.request.user.user_type == User.UserType.ESTUDIANTE and
                 self.request.user.get_estudiante_profile() is not None)
 
+    def get_validadores(self):
+        estudiante = self.request.user.get_estudiante_profile()
+        periodo = self.get_periodo_actual()
+        return (
+            estudiante.pk, periodo.pk if periodo else None,
+            huella_estudiante(estudiante, periodo), huella_noticias(),
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         estudiante = self.request.user.get_estudiante_profile()
         self.request.session['estudiante_seleccionado_pk'] = estudiante.pk
 
         periodo_actual = self.get_periodo_actual()
-        clases_inscritas = []
-        actividades = Actividad.objects.none()
-
-        if periodo_actual:
-            day_order = Case(
-                When(dia_semana='LUN', then=Value(0)),
-                When(dia_semana='MAR', then=Value(1)),
-                When(dia_semana='MIE', then=Value(2)),
-                When(dia_semana='JUE', then=Value(3)),
-                When(dia_semana='VIE', then=Value(4)),
-                When(dia_semana='SAB', then=Value(5)),
-                output_field=IntegerField(),
-            )
-            clases_inscritas = Clase.objects.filter(
-                estudiantes=estudiante,
-                periodo=periodo_actual
-            ).select_related('curso', 'maestro__user').order_by(day_order, 'hora_inicio')
-
-            subquery_entrega = Entrega.objects.filter(
-                actividad=OuterRef('pk'),
-                estudiante=estudiante
-            )
-            subquery_calificacion = subquery_entrega.values('calificacion')[:1]
-
-            actividades = Actividad.objects.filter(
-                clase__in=clases_inscritas
-            ).select_related('clase__curso').annotate(
-                fue_entregada=Exists(subquery_entrega),
-                calificacion_obtenida=Subquery(subquery_calificacion, output_field=DecimalField())
-            ).order_by('fecha_entrega')
-
-        orden_dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
-        horario_por_dia = OrderedDict()
-        for dia in orden_dias:
-            horario_por_dia[dia] = []
-        for clase in clases_inscritas:
-            dia_display = clase.get_dia_semana_display()
-            horario_por_dia[dia_display].append(clase)
-
-        actividades_por_curso = OrderedDict()
-        for actividad in actividades:
-            curso_nombre = actividad.clase.curso.nombre
-            if curso_nombre not in actividades_por_curso:
-                actividades_por_curso[curso_nombre] = []
-            actividades_por_curso[curso_nombre].append(actividad)
 
         context['estudiante'] = estudiante
-        context['clases_inscritas'] = clases_inscritas
         context['periodo_actual'] = periodo_actual
-        context['actividades'] = actividades
-        context['horario_por_dia'] = horario_por_dia
-        context['actividades_por_curso'] = actividades_por_curso
+        context.update(StudentDashboardService(estudiante, periodo_actual).obtener())
         context['noticias'] = Noticia.objects.filter(publicado=True).order_by('-fecha_publicacion')[:5]
-        context['notificaciones'] = Notificacion.objects.filter(
-            Q(audiencia=Notificacion.TargetAudiencia.TODOS) |
-            Q(audiencia=Notificacion.TargetAudiencia.ESTUDIANTES) |
-            Q(audiencia=Notificacion.TargetAudiencia.PADRES)
-        ).order_by('-fecha_envio')[:5]
+        context['notificaciones'] = notificaciones.recientes(self.request.user)
         return context
 
 
-class MisCalificacionesView(LoginRequiredMixin, UserPassesTestMixin, ListView):
-    model = Entrega
-    template_name = 'portal/mis_calificaciones.html'
-    context_object_name = 'entregas'
+class LibretaCalificacionesMixin:
+    """
+    Libreta del estudiante (``get_estudiante()``): resumen por curso en una
+    consulta agrupada; el detalle de cada curso se carga al expandirlo.
+    """
+    es_padre = False
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        estudiante = self.get_estudiante()
+        context['estudiante'] = estudiante
+        context['cursos'] = calificaciones.resumen_por_curso(estudiante)
+        context['es_padre'] = self.es_padre
+        return context
+
+
+class DetalleCalificacionesMixin:
+    """Fragmento con las calificaciones de un curso de la libreta."""
+    template_name = 'portal/calificaciones_curso_detalle.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filas'] = calificaciones.detalle_curso(self.get_estudiante(), self.kwargs['curso_pk'])
+        return context
+
+
+class EstudianteActualMixin:
+    """El estudiante es el propio usuario autenticado."""
 
     def test_func(self):
         return (self.request.user.user_type == User.UserType.ESTUDIANTE and
                 self.request.user.get_estudiante_profile() is not None)
 
-    def get_queryset(self):
-        estudiante = self.request.user.get_estudiante_profile()
-        return Entrega.objects.filter(
-            estudiante=estudiante,
-            calificacion__isnull=False
-        ).select_related(
-            'actividad__clase__curso', 'actividad'
-        ).order_by('actividad__clase__curso__nombre', 'actividad__fecha_entrega')
+    def get_estudiante(self):
+        return self.request.user.get_estudiante_profile()
+
+
+class MisCalificacionesView(LoginRequiredMixin, EstudianteActualMixin, UserPassesTestMixin, LibretaCalificacionesMixin, TemplateView):
+    template_name = 'portal/mis_calificaciones.html'
+
+
+class MisCalificacionesCursoView(LoginRequiredMixin, EstudianteActualMixin, UserPassesTestMixin, DetalleCalificacionesMixin, TemplateView):
+    pass
+
+
+class HistorialAcademicoMixin:
+    """
+    Historial de todos los periodos del estudiante (``get_estudiante()``) con
+    su promedio ponderado por créditos, leído de ResumenAcademico.
+    """
+    template_name = 'portal/historial_academico.html'
+    es_padre = False
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        calificaciones_por_curso = defaultdict(list)
-        for entrega in context['entregas']:
-            curso_nombre = entrega.actividad.clase.curso.nombre
-            calificaciones_por_curso[curso_nombre].append(entrega)
-
-        calificaciones_agrupadas = {}
-        for curso, entregas_lista in calificaciones_por_curso.items():
-            total_curso = sum(entrega.calificacion for entrega in entregas_lista)
-            promedio_curso = total_curso / len(entregas_lista)
-            calificaciones_agrupadas[curso] = {
-                'entregas': entregas_lista,
-                'promedio': promedio_curso
-            }
+        estudiante = self.get_estudiante()
+        periodos = historial.historial(estudiante)
+        context['estudiante'] = estudiante
+        context['historial'] = periodos
+        context['resumen_actual'] = periodos[-1]['resumen'] if periodos else None
+        context['es_padre'] = self.es_padre
+        return context
+
 
-        context['calificaciones_agrupadas'] = calificaciones_agrupadas
-        context['es_padre'] = False
+class MiHistorialAcademicoView(LoginRequiredMixin, EstudianteActualMixin, UserPassesTestMixin, HistorialAcademicoMixin, TemplateView):
+    pass
+
+
+class CalendarioAsistenciaMixin:
+    """
+    Calendario de asistencia del estudiante (``get_estudiante()``) en el
+    periodo (``get_periodo()``), leído de las filas de AsistenciaMensual.
+    ``get_clase_ids()`` limita las clases que se muestran.
+    """
+    template_name = 'portal/calendario_asistencia.html'
+
+    def get_clase_ids(self):
+        return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        estudiante = self.get_estudiante()
+        periodo = self.get_periodo()
+        context['estudiante'] = estudiante
+        context['periodo'] = periodo
+        if periodo:
+            context['meses'], context['totales'] = asistencia_mensual.calendario(
+                estudiante, periodo.fecha_inicio, periodo.fecha_fin, self.get_clase_ids()
+            )
         return context
 
 
-class PortalMaestroView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+class MiCalendarioAsistenciaView(LoginRequiredMixin, EstudianteActualMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, CalendarioAsistenciaMixin, TemplateView):
+
+    def get_periodo(self):
+        return self.get_periodo_actual()
+
+
+class PortalMaestroView(LoginRequiredMixin, UserPassesTestMixin, RespuestaCondicionalMixin, TemplateView):
     template_name = 'portal/portal_maestro.html'
 
     def test_func(self):
         return (self.request.user.user_type == User.UserType.MAESTRO and
                 self.request.user.get_maestro_profile() is not None)
 
+    def get_validadores(self):
+        maestro = self.request.user.get_maestro_profile()
+        periodo = PeriodoAcademico.objects.order_by('-fecha_inicio').first()
+        if not periodo:
+            return ()
+        return (
+            periodo.pk,
+            huella(Clase.objects.filter(maestro=maestro, periodo=periodo)),
+            huella(ResumenKpiCurso.objects.filter(maestro=maestro, periodo=periodo)),
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         maestro = self.request.user.get_maestro_profile()
         periodo_actual = PeriodoAcademico.objects.order_by('-fecha_inicio').first()
 
-        cursos_con_clases = []
-        kpi = {
-            'total_estudiantes': 0,
-            'total_cursos': 0,
-            'total_clases_semana': 0,
-            'total_actividades': 0,
-            'total_entregas': 0,
-            'total_entregas_calificadas': 0,
-            'promedio_general': None,
-            'tasa_asistencia': None,
-            'total_bitacoras': 0,
-            'total_planificaciones': 0,
-            'total_bitacoras_con_tiempo': 0,
-            'tiempo_promedio_bitacora': None,
-            'tiempo_promedio_segundos': None,
-            'total_actividades_con_tiempo': 0,
-            'tiempo_promedio_actividad': None,
-            'total_planificaciones_con_tiempo': 0,
-            'tiempo_promedio_planificacion': None,
-        }
-
-        if periodo_actual and maestro:
-            clases = Clase.objects.filter(
-                maestro=maestro,
-                periodo=periodo_actual
-            ).select_related('curso').prefetch_related(
-                'estudiantes__user'
-            ).order_by('curso__nombre')
-
-            kpi['total_clases_semana'] = clases.count()
-            todas_clases_ids = list(clases.values_list('pk', flat=True))
-
-            clases_por_curso = OrderedDict()
-            for clase in clases:
-                curso_nombre = clase.curso.nombre
-                if curso_nombre not in clases_por_curso:
-                    clases_por_curso[curso_nombre] = {
-                        'curso': clase.curso,
-                        'clases': [],
-                        'estudiantes': [],
-                        'estudiantes_set': set(),
-                        'clase_ids': [],
-                    }
-                clases_por_curso[curso_nombre]['clases'].append(clase)
-                clases_por_curso[curso_nombre]['clase_ids'].append(clase.pk)
-                for est in clase.estudiantes.all():
-                    if est.pk not in clases_por_curso[curso_nombre]['estudiantes_set']:
-                        clases_por_curso[curso_nombre]['estudiantes'].append(est)
-                        clases_por_curso[curso_nombre]['estudiantes_set'].add(est.pk)
-
-            actividades = Actividad.objects.filter(
-                clase__in=todas_clases_ids
-            ).prefetch_related('entregas').select_related('clase__curso').order_by('-fecha_creacion')
-
-            actividades_por_curso = OrderedDict()
-            for actividad in actividades:
-                curso_nombre = actividad.clase.curso.nombre
-                if curso_nombre not in actividades_por_curso:
-                    actividades_por_curso[curso_nombre] = []
-                actividades_por_curso[curso_nombre].append(actividad)
-
-            kpi['total_actividades'] = actividades.count()
-
-            entregas = Entrega.objects.filter(
-                actividad__clase__in=todas_clases_ids
-            )
-            kpi['total_entregas'] = entregas.count()
-            kpi['total_entregas_calificadas'] = entregas.filter(calificacion__isnull=False).count()
-
-            prom_gral = entregas.filter(calificacion__isnull=False).aggregate(
-                avg=Avg('calificacion')
-            )['avg']
-            kpi['promedio_general'] = round(prom_gral, 1) if prom_gral else None
-
-            asistencias = AsistenciaClase.objects.filter(clase__in=todas_clases_ids)
-            total_asistencias = asistencias.count()
-            if total_asistencias > 0:
-                presentes = asistencias.filter(estado=AsistenciaClase.EstadoAsistencia.PRESENTE).count()
-                kpi['tasa_asistencia'] = round((presentes / total_asistencias) * 100, 1)
-
-            kpi['total_planificaciones'] = Planificacion.objects.filter(
-                clase__in=todas_clases_ids
-            ).count()
-
-            bitacoras_con_tiempo = BitacoraPedagogica.objects.filter(
-                clase__in=todas_clases_ids,
-                fecha_inicio_calculo__isnull=False,
-                fecha_fin_calculo__isnull=False,
-            )
-            kpi['total_bitacoras_con_tiempo'] = bitacoras_con_tiempo.count()
-            avg_seconds = None
-            if kpi['total_bitacoras_con_tiempo'] > 0:
-                tiempos = bitacoras_con_tiempo.annotate(
-                    duracion=ExpressionWrapper(
-                        F('fecha_fin_calculo') - F('fecha_inicio_calculo'),
-                        output_field=DurationField()
-                    )
-                ).values_list('duracion', flat=True)
-                total_seconds = sum(t.total_seconds() for t in tiempos if t and t.total_seconds() > 0)
-                count_valid = sum(1 for t in tiempos if t and t.total_seconds() > 0)
-                if count_valid > 0:
-                    avg_seconds = total_seconds / count_valid
-                    if avg_seconds < 3600:
-                        kpi['tiempo_promedio_bitacora'] = f"{int(avg_seconds // 60)}m {int(avg_seconds % 60)}s"
-                    else:
-                        horas = int(avg_seconds // 3600)
-                        minutos = int((avg_seconds % 3600) // 60)
-                        kpi['tiempo_promedio_bitacora'] = f"{horas}h {minutos}m"
-                    kpi['tiempo_promedio_segundos'] = round(avg_seconds, 1)
-                else:
-                    kpi['tiempo_promedio_bitacora'] = None
-                    kpi['tiempo_promedio_segundos'] = None
-            else:
-                kpi['tiempo_promedio_bitacora'] = None
-                kpi['tiempo_promedio_segundos'] = None
-
-            def _calc_timing_stats(qs):
-                total_con_tiempo = qs.count()
-                avg_str = None
-                if total_con_tiempo > 0:
-                    tiempos = qs.annotate(
-                        duracion=ExpressionWrapper(
-                            F('fecha_fin_calculo') - F('fecha_inicio_calculo'),
-                            output_field=DurationField()
-                        )
-                    ).values_list('duracion', flat=True)
-                    segs = [t.total_seconds() for t in tiempos if t and t.total_seconds() > 0]
-                    if segs:
-                        avg_s = sum(segs) / len(segs)
-                        if avg_s < 3600:
-                            avg_str = f"{int(avg_s // 60)}m {int(avg_s % 60)}s"
-                        else:
-                            horas = int(avg_s // 3600)
-                            minutos = int((avg_s % 3600) // 60)
-                            avg_str = f"{horas}h {minutos}m"
-                return total_con_tiempo, avg_str
-
-            actividades_con_tiempo = Actividad.objects.filter(
-                clase__in=todas_clases_ids,
-                fecha_inicio_calculo__isnull=False,
-                fecha_fin_calculo__isnull=False,
-            )
-            kpi['total_actividades_con_tiempo'], kpi['tiempo_promedio_actividad'] = _calc_timing_stats(actividades_con_tiempo)
-
-            planificaciones_con_tiempo = Planificacion.objects.filter(
-                clase__in=todas_clases_ids,
-                fecha_inicio_calculo__isnull=False,
-                fecha_fin_calculo__isnull=False,
-            )
-            kpi['total_planificaciones_con_tiempo'], kpi['tiempo_promedio_planificacion'] = _calc_timing_stats(planificaciones_con_tiempo)
-
-            all_students_set = set()
-            for data in clases_por_curso.values():
-                for est in data['estudiantes']:
-                    all_students_set.add(est.pk)
-            kpi['total_estudiantes'] = len(all_students_set)
-            kpi['total_cursos'] = len(clases_por_curso)
-
-            for curso_nombre, data in clases_por_curso.items():
-                curso_clase_ids = data['clase_ids']
-                curso_actividades = actividades_por_curso.get(curso_nombre, [])
-                total_acts = len(curso_actividades)
-                total_ent_curso = sum(
-                    a.entregas.count() for a in curso_actividades
-                )
-                total_entregadas_curso = sum(
-                    a.entregas.filter(calificacion__isnull=False).count()
-                    for a in curso_actividades
-                )
-                prom_curso = None
-                curso_entregas_calif = Entrega.objects.filter(
-                    actividad__in=curso_actividades,
-                    calificacion__isnull=False
-                ).aggregate(avg=Avg('calificacion'))['avg']
-                if curso_entregas_calif:
-                    prom_curso = round(curso_entregas_calif, 1)
-
-                tasa_asistencia_curso = None
-                asistencias_curso = AsistenciaClase.objects.filter(clase__in=curso_clase_ids)
-                total_asist_curso = asistencias_curso.count()
-                if total_asist_curso > 0:
-                    presentes_curso = asistencias_curso.filter(
-                        estado=AsistenciaClase.EstadoAsistencia.PRESENTE
-                    ).count()
-                    tasa_asistencia_curso = round((presentes_curso / total_asist_curso) * 100, 1)
-
-                planif_count = Planificacion.objects.filter(
-                    clase__in=curso_clase_ids
-                ).count()
-
-                bitacora_count = BitacoraPedagogica.objects.filter(
-                    clase__in=curso_clase_ids
-                ).count()
-
-                bitacoras_tiempo_curso = BitacoraPedagogica.objects.filter(
-                    clase__in=curso_clase_ids,
-                    fecha_inicio_calculo__isnull=False,
-                    fecha_fin_calculo__isnull=False,
-                )
-                curso_bitacoras_con_tiempo = bitacoras_tiempo_curso.count()
-                tiempo_promedio_curso_str = None
-                if curso_bitacoras_con_tiempo > 0:
-                    tiempos_curso = bitacoras_tiempo_curso.annotate(
-                        duracion=ExpressionWrapper(
-                            F('fecha_fin_calculo') - F('fecha_inicio_calculo'),
-                            output_field=DurationField()
-                        )
-                    ).values_list('duracion', flat=True)
-                    segs = [t.total_seconds() for t in tiempos_curso if t and t.total_seconds() > 0]
-                    if segs:
-                        avg_s = sum(segs) / len(segs)
-                        if avg_s < 3600:
-                            tiempo_promedio_curso_str = f"{int(avg_s // 60)}m {int(avg_s % 60)}s"
-                        else:
-                            tiempo_promedio_curso_str = f"{int(avg_s // 3600)}h {int((avg_s % 3600) // 60)}m"
-
-                actividades_tiempo_curso = Actividad.objects.filter(
-                    clase__in=curso_clase_ids,
-                    fecha_inicio_calculo__isnull=False,
-                    fecha_fin_calculo__isnull=False,
-                )
-                curso_actividades_con_tiempo, tiempo_promedio_actividad_str = _calc_timing_stats(actividades_tiempo_curso)
-
-                planificaciones_tiempo_curso = Planificacion.objects.filter(
-                    clase__in=curso_clase_ids,
-                    fecha_inicio_calculo__isnull=False,
-                    fecha_fin_calculo__isnull=False,
-                )
-                curso_planificaciones_con_tiempo, tiempo_promedio_planificacion_str = _calc_timing_stats(planificaciones_tiempo_curso)
-
-                cursos_con_clases.append({
-                    'curso': data['curso'],
-                    'clases': data['clases'],
-                    'estudiantes': data['estudiantes'],
-                    'actividades': curso_actividades,
-                    'total_actividades': total_acts,
-                    'total_entregas': total_ent_curso,
-                    'total_entregas_calificadas': total_entregadas_curso,
-                    'promedio': prom_curso,
-                    'tasa_asistencia': tasa_asistencia_curso,
-                    'planificaciones': planif_count,
-                    'bitacoras': bitacora_count,
-                    'num_estudiantes': len(data['estudiantes']),
-                    'bitacoras_con_tiempo': curso_bitacoras_con_tiempo,
-                    'tiempo_promedio_bitacora': tiempo_promedio_curso_str,
-                    'actividades_con_tiempo': curso_actividades_con_tiempo,
-                    'tiempo_promedio_actividad': tiempo_promedio_actividad_str,
-                    'planificaciones_con_tiempo': curso_planificaciones_con_tiempo,
-                    'tiempo_promedio_planificacion': tiempo_promedio_planificacion_str,
-                })
+        # Solo KPIs y la lista de cursos; cada tarjeta se carga por separado
+        # desde TarjetaCursoMaestroView.
+        kpi, cursos_con_clases = kpi_maestro(maestro, periodo_actual)
 
         context['periodo_actual'] = periodo_actual
         context['cursos_con_clases'] = cursos_con_clases
         context['kpi'] = kpi
-        context['notificaciones'] = Notificacion.objects.filter(
-            Q(audiencia=Notificacion.TargetAudiencia.TODOS) |
-            Q(audiencia=Notificacion.TargetAudiencia.MAESTROS)
-        ).order_by('-fecha_envio')[:5]
+        context['tiempos_llenado'] = tiempos_del_maestro(maestro, periodo_actual) if periodo_actual and maestro else {}
+        context['notificaciones'] = notificaciones.recientes(self.request.user)
         return context
 
 
+class TarjetaCursoMaestroView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Fragmento HTML (o JSON con ``?formato=json``) con la analítica de un curso
+    del maestro. Se cachea usando la fecha del resumen de KPIs como versión,
+    así cualquier cambio en el curso produce una clave nueva.
+    """
+    CACHE_TIMEOUT = 300
+
+    def test_func(self):
+        return (self.request.user.user_type == User.UserType.MAESTRO and
+                self.request.user.get_maestro_profile() is not None)
+
+    def get(self, request, curso_pk):
+        maestro = request.user.get_maestro_profile()
+        periodo_actual = PeriodoAcademico.objects.order_by('-fecha_inicio').first()
+        if not periodo_actual:
+            raise Http404("No hay periodo académico activo.")
+        formato = 'json' if request.GET.get('formato') == 'json' else 'html'
+
+        clave = 'portal:tarjeta_curso:{}:{}:{}:{}:{}'.format(
+            maestro.pk, periodo_actual.pk, curso_pk, formato,
+            version_resumen(maestro, periodo_actual, curso_pk)
+        )
+        contenido = cache.get(clave)
+        if contenido is None:
+            item = tarjeta_curso(maestro, periodo_actual, curso_pk)
+            if item is None:
+                raise Http404("No imparte este curso en el periodo actual.")
+            if formato == 'json':
+                contenido = tarjeta_a_json(item)
+            else:
+                contenido = render_to_string('portal/tarjeta_curso.html', {'item': item}, request=request)
+            cache.set(clave, contenido, self.CACHE_TIMEOUT)
+
+        if formato == 'json':
+            return JsonResponse(contenido)
+        return HttpResponse(contenido)
+
+
 class ActividadCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Actividad
     form_class = ActividadForm
@@ -490,6 +318,11 @@ class ActividadCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
         messages.success(self.request, f"Actividad '{form.instance.titulo}' creada exitosamente.")
         return super().form_valid(form)
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['curso'] = self.clase.curso
+        return kwargs
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['titulo'] = f"Nueva Actividad - {self.clase.curso.nombre}"
@@ -562,6 +395,13 @@ class ActividadDetailView(LoginRequiredMixin, DetailView):
 
 
 class ActividadEntregasView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    """
+    Entregas de una actividad con una hoja para calificarlas todas a la vez.
+    Solo se guardan las filas modificadas, con un único ``bulk_update`` dentro
+    de una transacción; los resúmenes y cachés dependientes se invalidan una
+    sola vez al final. Incluye la distribución de calificaciones de la
+    actividad, también disponible como JSON con ``?formato=json``.
+    """
     model = Actividad
     template_name = 'portal/actividad_entregas.html'
     context_object_name = 'actividad'
@@ -569,14 +409,177 @@ class ActividadEntregasView(LoginRequiredMixin, UserPassesTestMixin, DetailView)
     def test_func(self):
         return self.request.user.user_type == User.UserType.MAESTRO
 
+    def get_queryset(self):
+        return Actividad.objects.select_related('clase__curso')
+
+    def es_maestro_de(self, actividad):
+        maestro = self.request.user.get_maestro_profile()
+        return maestro is not None and actividad.clase.maestro_id == maestro.pk
+
+    def get_entregas(self):
+        return Entrega.objects.filter(
+            actividad=self.object
+        ).select_related('estudiante__user').order_by('estudiante__user__last_name', 'estudiante__user__first_name', 'pk')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        actividad = self.get_object()
-        context['entregas'] = Entrega.objects.filter(
-            actividad=actividad
-        ).select_related('estudiante__user').order_by('estudiante__user__last_name')
+        formset = kwargs.get('formset')
+        if formset is None and self.es_maestro_de(self.object):
+            formset = CalificacionMasivaFormSet(queryset=self.get_entregas())
+        context['formset'] = formset
+        context['entregas'] = [form.instance for form in formset] if formset is not None else self.get_entregas()
+        datos = estadisticas.obtener(self.object)
+        mayor = max((intervalo['total'] for intervalo in datos['histograma']), default=0)
+        context['estadisticas'] = datos
+        context['histograma'] = [
+            dict(intervalo, porcentaje=round(100 * intervalo['total'] / mayor) if mayor else 0)
+            for intervalo in datos['histograma']
+        ]
         return context
 
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('formato') == 'json':
+            self.object = self.get_object()
+            return JsonResponse(estadisticas.obtener(self.object))
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if not self.es_maestro_de(self.object):
+            return HttpResponseForbidden("No tienes permiso para calificar esta actividad.")
+
+        formset = CalificacionMasivaFormSet(request.POST, queryset=self.get_entregas())
+        if not formset.is_valid():
+            messages.error(request, "Revisa las calificaciones marcadas; no se guardó ningún cambio.")
+            return self.render_to_response(self.get_context_data(formset=formset))
+
+        # commit=False devuelve solo las entregas cuyas filas cambiaron
+        entregas = formset.save(commit=False)
+        if not entregas:
+            messages.info(request, "No hubo cambios que guardar.")
+            return redirect('actividad_entregas', pk=self.object.pk)
+
+        ahora = timezone.now()
+        for entrega in entregas:
+            # bulk_update no aplica auto_now
+            entrega.fecha_actualizacion = ahora
+        with transaction.atomic():
+            Entrega.objects.bulk_update(entregas, ['calificacion', 'comentarios_maestro', 'fecha_actualizacion'])
+            calificaciones.propagar_calificaciones(self.object.clase, [entrega.estudiante_id for entrega in entregas])
+
+        messages.success(request, f"Se guardaron {len(entregas)} calificaciones.")
+        return redirect('actividad_entregas', pk=self.object.pk)
+
+
+class LibroNotasMixin:
+    """Clase del maestro autenticado para el libro de notas."""
+
+    def test_func(self):
+        return self.request.user.user_type == User.UserType.MAESTRO
+
+    def get_clase(self):
+        return get_object_or_404(Clase.objects.select_related('curso', 'periodo'), pk=self.kwargs['clase_pk'])
+
+    def es_maestro_de(self, clase):
+        maestro = self.request.user.get_maestro_profile()
+        return maestro is not None and clase.maestro_id == maestro.pk
+
+
+class LibroNotasView(LoginRequiredMixin, LibroNotasMixin, UserPassesTestMixin, View):
+    template_name = 'portal/libro_notas.html'
+
+    def get(self, request, *args, **kwargs):
+        clase = self.get_clase()
+        if not self.es_maestro_de(clase):
+            return HttpResponseForbidden("No tienes permiso para ver las notas de esta clase.")
+        matriz = MatrizCalificaciones(clase)
+        return render(request, self.template_name, {
+            'clase': clase,
+            'matriz': matriz,
+            'filas': list(matriz.filas()),
+            'promedios_actividades': matriz.promedios_actividades,
+            'xlsx_disponible': OPENPYXL_AVAILABLE,
+        })
+
+
+class MapaCompetenciasView(LoginRequiredMixin, LibroNotasMixin, UserPassesTestMixin, View):
+    """Mapa de calor estudiantes × competencias leído del resumen precalculado."""
+    template_name = 'portal/mapa_competencias.html'
+
+    def get(self, request, *args, **kwargs):
+        clase = self.get_clase()
+        if not self.es_maestro_de(clase):
+            return HttpResponseForbidden("No tienes permiso para ver las notas de esta clase.")
+        competencias, filas = dominio.mapa_de_calor(clase)
+        return render(request, self.template_name, {
+            'clase': clase,
+            'competencias': competencias,
+            'filas': filas,
+            'niveles': dominio.NIVELES,
+        })
+
+
+class ExportarLibroNotasView(LoginRequiredMixin, LibroNotasMixin, UserPassesTestMixin, View):
+    """Descarga del libro de notas: CSV en streaming o XLSX (si openpyxl está instalado)."""
+
+    def get(self, request, *args, **kwargs):
+        clase = self.get_clase()
+        if not self.es_maestro_de(clase):
+            return HttpResponseForbidden("No tienes permiso para ver las notas de esta clase.")
+        matriz = MatrizCalificaciones(clase)
+        nombre = f"notas_{clase.curso.codigo}_{clase.pk}"
+
+        if request.GET.get('formato') == 'xlsx':
+            if not OPENPYXL_AVAILABLE:
+                messages.error(request, "La exportación a Excel no está disponible en este servidor.")
+                return redirect('libro_notas', clase_pk=clase.pk)
+            return FileResponse(
+                exportar_xlsx(matriz), as_attachment=True, filename=f"{nombre}.xlsx",
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+
+        response = StreamingHttpResponse(exportar_csv(matriz), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+        return response
+
+
+class ImportarCalificacionesView(LoginRequiredMixin, LibroNotasMixin, UserPassesTestMixin, FormView):
+    """
+    Importa un CSV/XLSX de calificaciones a las entregas de la clase y
+    muestra los errores por fila.
+    """
+    form_class = ImportarCalificacionesForm
+    template_name = 'portal/importar_calificaciones.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.clase = self.get_clase()
+        return super().dispatch(request, *args, **kwargs)
+
+    def test_func(self):
+        return super().test_func() and self.es_maestro_de(self.clase)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['clase'] = self.clase
+        context['columnas'] = importacion.COLUMNAS
+        return context
+
+    def form_valid(self, form):
+        archivo = form.cleaned_data['archivo']
+        try:
+            resultado = importacion.importar_calificaciones(
+                self.clase, importacion.leer_archivo(archivo, archivo.name)
+            )
+        except importacion.ArchivoInvalido as error:
+            form.add_error('archivo', str(error))
+            return self.form_invalid(form)
+
+        if resultado.guardadas:
+            messages.success(self.request, f"Se importaron {resultado.guardadas} calificaciones.")
+        if resultado.errores:
+            messages.warning(self.request, f"{len(resultado.errores)} filas no se importaron.")
+        return self.render_to_response(self.get_context_data(form=self.get_form_class()(), resultado=resultado))
+
 
 class ActividadUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     model = Actividad
@@ -594,6 +597,11 @@ class ActividadUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
             return HttpResponseForbidden("No tienes permiso para editar esta actividad.")
         return super().dispatch(request, *args, **kwargs)
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['curso'] = self.object.clase.curso
+        return kwargs
+
     def form_valid(self, form):
         form.instance.fecha_fin_calculo = timezone.now()
         messages.success(self.request, "Actividad actualizada exitosamente.")
@@ -724,7 +732,7 @@ class PortalAdminView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         if form.is_valid():
             notificacion = form.save(commit=False)
             notificacion.autor = request.user
-            notificacion.save()
+            notificaciones.enviar(notificacion)
             messages.success(request, "Notificación enviada exitosamente.")
             return redirect('portal_admin')
         else:
@@ -733,6 +741,39 @@ class PortalAdminView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
             return self.render_to_response(context)
 
 
+class BandejaNotificacionesView(LoginRequiredMixin, TemplateView):
+    """
+    Historial de notificaciones del usuario, paginado por cursor
+    (``?antes=<id>``) en lugar de OFFSET.
+    """
+    template_name = 'portal/bandeja_notificaciones.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            antes = int(self.request.GET.get('antes', ''))
+        except ValueError:
+            antes = None
+        filas, siguiente = notificaciones.bandeja(self.request.user, antes=antes)
+        context['filas'] = filas
+        context['siguiente'] = siguiente
+        context['es_primera_pagina'] = antes is None
+        return context
+
+
+class MarcarNotificacionesLeidasView(LoginRequiredMixin, View):
+    """Marca como leída una notificación (``id``) o todas las del usuario."""
+
+    def post(self, request, *args, **kwargs):
+        ids = request.POST.getlist('id')
+        try:
+            ids = [int(pk) for pk in ids] if ids else None
+        except ValueError:
+            return HttpResponseBadRequest("ID de notificación inválido.")
+        notificaciones.marcar_leidas(request.user, ids)
+        return redirect(request.POST.get('next') or 'bandeja_notificaciones')
+
+
 class NoticiaCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Noticia
     form_class = NoticiaForm
@@ -839,21 +880,10 @@ class TomarAsistenciaView(LoginRequiredMixin, UserPassesTestMixin, View):
         formset = AsistenciaFormSet(request.POST)
 
         if formset.is_valid():
-            with transaction.atomic():
-                for form in formset:
-                    estudiante_id = form.cleaned_data['estudiante_id']
-                    estado = form.cleaned_data['estado']
-
-                    if not clase.estudiantes.filter(pk=estudiante_id).exists():
-                        continue
-
-                    AsistenciaClase.objects.update_or_create(
-                        clase=clase,
-                        estudiante_id=estudiante_id,
-                        fecha=fecha_seleccionada,
-                        defaults={'estado': estado}
-                    )
-
+            # Un solo upsert; los estudiantes no inscritos se descartan
+            asistencia.guardar_asistencias(clase, fecha_seleccionada, {
+                form.cleaned_data['estudiante_id']: form.cleaned_data['estado'] for form in formset
+            })
             messages.success(request, f"Asistencia guardada para el {fecha_seleccionada.strftime('%d/%m/%Y')}.")
         else:
             messages.error(request, "Error al guardar la asistencia. Verifica los datos.")
@@ -865,22 +895,14 @@ class TomarAsistenciaView(LoginRequiredMixin, UserPassesTestMixin, View):
     def render_asistencia(self, request, clase, fecha_seleccionada):
         estudiantes = clase.estudiantes.select_related('user').order_by('user__last_name', 'user__first_name')
 
-        initial_data = []
-        for estudiante in estudiantes:
-            try:
-                asistencia = AsistenciaClase.objects.get(
-                    clase=clase,
-                    estudiante=estudiante,
-                    fecha=fecha_seleccionada
-                )
-                estado_inicial = asistencia.estado
-            except AsistenciaClase.DoesNotExist:
-                estado_inicial = AsistenciaClase.EstadoAsistencia.PRESENTE
-
-            initial_data.append({
+        estados = asistencia.estados_del_dia(clase, fecha_seleccionada)
+        initial_data = [
+            {
                 'estudiante_id': estudiante.pk,
-                'estado': estado_inicial,
-            })
+                'estado': estados.get(estudiante.pk, AsistenciaClase.EstadoAsistencia.PRESENTE),
+            }
+            for estudiante in estudiantes
+        ]
 
         formset = AsistenciaFormSet(initial=initial_data)
 
@@ -911,6 +933,166 @@ class TomarAsistenciaView(LoginRequiredMixin, UserPassesTestMixin, View):
         return render(request, self.template_name, context)
 
 
+class SincronizarAsistenciaView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    API JSON para sincronizar asistencia tomada sin conexión. Recibe
+    ``{"clave": ..., "registros": [{"clase", "fecha", "estudiante", "estado"}]}``
+    y devuelve el resultado de cada registro. Reenviar la misma clave no
+    vuelve a aplicar el lote.
+    """
+
+    def test_func(self):
+        return (self.request.user.user_type == User.UserType.MAESTRO and
+                self.request.user.get_maestro_profile() is not None)
+
+    def post(self, request, *args, **kwargs):
+        try:
+            datos = json.loads(request.body)
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': "El cuerpo debe ser JSON válido."}, status=400)
+        if not isinstance(datos, dict):
+            return JsonResponse({'error': "Se esperaba un objeto JSON."}, status=400)
+        try:
+            respuesta = sincronizacion.sincronizar(
+                request.user.get_maestro_profile(), datos.get('clave'), datos.get('registros')
+            )
+        except sincronizacion.LoteInvalido as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        return JsonResponse(respuesta)
+
+
+class MaestroCalendarioAsistenciaView(LoginRequiredMixin, UserPassesTestMixin, CalendarioAsistenciaMixin, TemplateView):
+    """Calendario de un estudiante inscrito, limitado a la clase del maestro."""
+
+    def test_func(self):
+        maestro = self.request.user.get_maestro_profile()
+        return (self.request.user.user_type == User.UserType.MAESTRO and maestro is not None and
+                self.get_clase().maestro_id == maestro.pk)
+
+    def get_clase(self):
+        if not hasattr(self, '_clase'):
+            self._clase = get_object_or_404(Clase.objects.select_related('curso', 'periodo'), pk=self.kwargs['clase_pk'])
+        return self._clase
+
+    def get_estudiante(self):
+        return get_object_or_404(
+            self.get_clase().estudiantes.select_related('user'), pk=self.kwargs['estudiante_pk']
+        )
+
+    def get_periodo(self):
+        return self.get_clase().periodo
+
+    def get_clase_ids(self):
+        return [self.get_clase().pk]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['clase'] = self.get_clase()
+        return context
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class KioscoLlegadaView(View):
+    """
+    Registro de llegada desde un kiosco. No usa sesión: el dispositivo envía
+    ``Authorization: Token <token>`` y la matrícula del estudiante, y la
+    llegada queda en el búfer de portal/kiosco.py hasta el próximo guardado.
+    """
+
+    def post(self, request, *args, **kwargs):
+        esquema, _, token = request.headers.get('Authorization', '').partition(' ')
+        dispositivo = kiosco.autenticar(token.strip()) if esquema == 'Token' else None
+        if dispositivo is None:
+            return JsonResponse({'error': "Dispositivo no autorizado."}, status=401)
+
+        if request.content_type == 'application/json':
+            try:
+                datos = json.loads(request.body)
+            except (ValueError, UnicodeDecodeError):
+                datos = None
+            matricula = datos.get('matricula') if isinstance(datos, dict) else None
+        else:
+            matricula = request.POST.get('matricula')
+        if not isinstance(matricula, str) or not matricula.strip():
+            return JsonResponse({'error': "Falta la matrícula."}, status=400)
+
+        try:
+            llegada = kiosco.registrar_llegada(dispositivo, matricula)
+        except kiosco.LlegadaRechazada as error:
+            return JsonResponse({'error': str(error)}, status=404)
+        return JsonResponse(llegada, status=202)
+
+
+class AsistenciaDiaView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Hoja de asistencia de todas las clases del maestro en un día. Se carga
+    con un número fijo de consultas y se guarda en una sola transacción.
+    """
+    template_name = 'portal/asistencia_dia.html'
+
+    def test_func(self):
+        return (self.request.user.user_type == User.UserType.MAESTRO and
+                self.request.user.get_maestro_profile() is not None)
+
+    def get_fecha(self):
+        if 'fecha' in self.kwargs:
+            try:
+                return datetime.strptime(self.kwargs['fecha'], '%Y-%m-%d').date()
+            except (ValueError, TypeError):
+                pass
+        return timezone.now().date()
+
+    def get_formsets(self, clases, hoja, data=None):
+        secciones = []
+        for clase in clases:
+            alumnos = hoja[clase.pk]
+            formset = AsistenciaFormSet(data, prefix=f"clase-{clase.pk}", initial=[
+                {'estudiante_id': estudiante_id, 'estado': estado or AsistenciaClase.EstadoAsistencia.PRESENTE}
+                for estudiante_id, _, estado in alumnos
+            ])
+            secciones.append({
+                'clase': clase,
+                'formset': formset,
+                'alumnos_con_form': [
+                    ({'id': estudiante_id, 'nombre': nombre, 'tomada': estado is not None}, form)
+                    for (estudiante_id, nombre, estado), form in zip(alumnos, formset)
+                ],
+            })
+        return secciones
+
+    def get(self, request, *args, **kwargs):
+        fecha = self.get_fecha()
+        clases = asistencia.clases_del_dia(request.user.get_maestro_profile(), fecha)
+        return self.render_dia(request, fecha, self.get_formsets(clases, asistencia.hoja_del_dia(clases, fecha)))
+
+    def post(self, request, *args, **kwargs):
+        fecha = self.get_fecha()
+        clases = asistencia.clases_del_dia(request.user.get_maestro_profile(), fecha)
+        secciones = self.get_formsets(clases, asistencia.hoja_del_dia(clases, fecha), request.POST)
+
+        if not all(seccion['formset'].is_valid() for seccion in secciones):
+            messages.error(request, "Error al guardar la asistencia. Verifica los datos.")
+            return self.render_dia(request, fecha, secciones)
+
+        guardados = asistencia.guardar_asistencias_por_clase(clases, fecha, {
+            seccion['clase'].pk: {
+                form.cleaned_data['estudiante_id']: form.cleaned_data['estado'] for form in seccion['formset']
+            }
+            for seccion in secciones
+        })
+        messages.success(request, f"Asistencia guardada para el {fecha.strftime('%d/%m/%Y')}: {guardados} registros en {len(clases)} clases.")
+        return redirect('asistencia_dia_fecha', fecha=fecha.strftime('%Y-%m-%d'))
+
+    def render_dia(self, request, fecha, secciones):
+        return render(request, self.template_name, {
+            'fecha_seleccionada': fecha,
+            'fecha_anterior': fecha - timedelta(days=1),
+            'fecha_siguiente': fecha + timedelta(days=1),
+            'es_hoy': fecha == timezone.now().date(),
+            'secciones': secciones,
+        })
+
+
 class PlanificacionListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     model = Planificacion
     template_name = 'portal/planificacion_list.html'
@@ -1044,149 +1226,119 @@ class PlanificacionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteVie
         return reverse('planificacion_list', kwargs={'clase_pk': self.object.clase.pk})
 
 
-class PortalPadreView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+class PortalPadreView(LoginRequiredMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, RespuestaCondicionalMixin, TemplateView):
     template_name = 'portal/portal_padre_seleccion.html'
 
     def test_func(self):
         return (self.request.user.user_type == User.UserType.PADRE and
                 hasattr(self.request.user, 'padre_familia'))
 
+    def get_validadores(self):
+        periodo = self.get_periodo_actual()
+        return (
+            periodo.pk if periodo else None,
+            huella_familia(hijos_del_padre(self.request.user.pk), periodo, timezone.now()),
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         padre = self.request.user.padre_familia
-        context['hijos'] = padre.hijos.select_related('user').all()
+        hijos = list(padre.hijos.select_related('user', 'grado__periodo'))
+        periodo_actual = self.get_periodo_actual()
+        context['hijos'] = hijos
+        context['periodo_actual'] = periodo_actual
+        context['resumen_familiar'] = FamilyOverviewService(hijos, periodo_actual).obtener()
         return context
 
 
-class PadreEstudianteDashboardView(LoginRequiredMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, TemplateView):
-    template_name = 'portal/portal_estudiante_dashboard.html'
+class HijoDelPadreMixin:
+    """
+    Autoriza al padre a ver al estudiante ``estudiante_pk`` usando el conjunto
+    cacheado de sus hijos, y resuelve el estudiante una sola vez por request.
+    """
 
     def test_func(self):
-        if self.request.user.user_type != User.UserType.PADRE:
-            return False
-        if not hasattr(self.request.user, 'padre_familia'):
-            return False
-        try:
-            estudiante = Estudiante.objects.get(pk=self.kwargs['estudiante_pk'])
-            padre = self.request.user.padre_familia
-            return estudiante in padre.hijos.all()
-        except Estudiante.DoesNotExist:
-            return False
+        return puede_ver_estudiante(self.request.user, self.kwargs['estudiante_pk'])
+
+    def get_estudiante(self):
+        if not hasattr(self, '_estudiante'):
+            self._estudiante = get_object_or_404(
+                Estudiante.objects.select_related('user'),
+                pk=self.kwargs['estudiante_pk']
+            )
+        return self._estudiante
+
+
+class PadreEstudianteDashboardView(LoginRequiredMixin, HijoDelPadreMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, RespuestaCondicionalMixin, TemplateView):
+    template_name = 'portal/portal_estudiante_dashboard.html'
+
+    def get_validadores(self):
+        # La página fija el estudiante seleccionado en la sesión; solo se
+        # reutiliza si ya apunta a este estudiante.
+        estudiante = self.get_estudiante()
+        periodo = self.get_periodo_actual()
+        return (
+            estudiante.pk, self.request.session.get('estudiante_seleccionado_pk'),
+            periodo.pk if periodo else None, huella_estudiante(estudiante, periodo),
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        estudiante = get_object_or_404(
-            Estudiante.objects.select_related('user'),
-            pk=self.kwargs['estudiante_pk']
-        )
+        estudiante = self.get_estudiante()
         self.request.session['estudiante_seleccionado_pk'] = estudiante.pk
 
         periodo_actual = self.get_periodo_actual()
-        clases_inscritas = []
-        actividades = Actividad.objects.none()
-
-        if periodo_actual:
-            day_order = Case(
-                When(dia_semana='LUN', then=Value(0)),
-                When(dia_semana='MAR', then=Value(1)),
-                When(dia_semana='MIE', then=Value(2)),
-                When(dia_semana='JUE', then=Value(3)),
-                When(dia_semana='VIE', then=Value(4)),
-                When(dia_semana='SAB', then=Value(5)),
-                output_field=IntegerField(),
-            )
-            clases_inscritas = Clase.objects.filter(
-                estudiantes=estudiante,
-                periodo=periodo_actual
-            ).select_related('curso', 'maestro__user').order_by(day_order, 'hora_inicio')
-
-            subquery_entrega = Entrega.objects.filter(
-                actividad=OuterRef('pk'),
-                estudiante=estudiante
-            )
-            subquery_calificacion = subquery_entrega.values('calificacion')[:1]
-
-            actividades = Actividad.objects.filter(
-                clase__in=clases_inscritas
-            ).select_related('clase__curso').annotate(
-                fue_entregada=Exists(subquery_entrega),
-                calificacion_obtenida=Subquery(subquery_calificacion, output_field=DecimalField())
-            ).order_by('fecha_entrega')
-
-        orden_dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
-        horario_por_dia = OrderedDict()
-        for dia in orden_dias:
-            horario_por_dia[dia] = []
-        for clase in clases_inscritas:
-            dia_display = clase.get_dia_semana_display()
-            horario_por_dia[dia_display].append(clase)
-
-        actividades_por_curso = OrderedDict()
-        for actividad in actividades:
-            curso_nombre = actividad.clase.curso.nombre
-            if curso_nombre not in actividades_por_curso:
-                actividades_por_curso[curso_nombre] = []
-            actividades_por_curso[curso_nombre].append(actividad)
 
         context['estudiante'] = estudiante
-        context['clases_inscritas'] = clases_inscritas
         context['periodo_actual'] = periodo_actual
-        context['actividades'] = actividades
-        context['horario_por_dia'] = horario_por_dia
-        context['actividades_por_curso'] = actividades_por_curso
-        context['notificaciones'] = Notificacion.objects.filter(
-            Q(audiencia=Notificacion.TargetAudiencia.TODOS) |
-            Q(audiencia=Notificacion.TargetAudiencia.PADRES)
-        ).order_by('-fecha_envio')[:5]
+        context.update(StudentDashboardService(estudiante, periodo_actual).obtener())
+        context['notificaciones'] = notificaciones.recientes(self.request.user)
         return context
 
 
-class PadreMisCalificacionesView(LoginRequiredMixin, UserPassesTestMixin, ListView):
-    model = Entrega
+class PadreMisCalificacionesView(LoginRequiredMixin, HijoDelPadreMixin, UserPassesTestMixin, LibretaCalificacionesMixin, TemplateView):
     template_name = 'portal/mis_calificaciones.html'
-    context_object_name = 'entregas'
+    es_padre = True
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['titulo'] = f"Calificaciones de {context['estudiante'].user.first_name}"
+        return context
+
+
+class PadreCalificacionesCursoView(LoginRequiredMixin, HijoDelPadreMixin, UserPassesTestMixin, DetalleCalificacionesMixin, TemplateView):
+    pass
+
+
+class PadreHistorialAcademicoView(LoginRequiredMixin, HijoDelPadreMixin, UserPassesTestMixin, HistorialAcademicoMixin, TemplateView):
+    es_padre = True
+
+
+class PadreCalendarioAsistenciaView(LoginRequiredMixin, HijoDelPadreMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, CalendarioAsistenciaMixin, TemplateView):
+
+    def get_periodo(self):
+        return self.get_periodo_actual()
+
+
+class CuadroHonorView(LoginRequiredMixin, UserPassesTestMixin, PeriodoSeleccionadoMixin, TemplateView):
+    template_name = 'portal/cuadro_honor.html'
 
     def test_func(self):
-        if self.request.user.user_type != User.UserType.PADRE:
-            return False
-        try:
-            estudiante_a_ver = Estudiante.objects.get(pk=self.kwargs['estudiante_pk'])
-            padre_logueado = self.request.user.padre_familia
-            return estudiante_a_ver in padre_logueado.hijos.all()
-        except Estudiante.DoesNotExist:
-            return False
+        return self.request.user.user_type == User.UserType.ADMIN
 
-    def get_queryset(self):
-        estudiante = Estudiante.objects.get(pk=self.kwargs['estudiante_pk'])
-        return Entrega.objects.filter(
-            estudiante=estudiante,
-            calificacion__isnull=False
-        ).select_related(
-            'actividad__clase__curso', 'actividad'
-        ).order_by('actividad__clase__curso__nombre', 'actividad__fecha_entrega')
+    def get_minimo(self):
+        try:
+            return Decimal(self.request.GET.get('minimo', historial.MINIMO_CUADRO_HONOR))
+        except (InvalidOperation, TypeError):
+            return historial.MINIMO_CUADRO_HONOR
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        estudiante = Estudiante.objects.get(pk=self.kwargs['estudiante_pk'])
-
-        calificaciones_por_curso = defaultdict(list)
-        for entrega in context['entregas']:
-            curso_nombre = entrega.actividad.clase.curso.nombre
-            calificaciones_por_curso[curso_nombre].append(entrega)
-
-        calificaciones_agrupadas = {}
-        for curso, entregas_lista in calificaciones_por_curso.items():
-            total_curso = sum(entrega.calificacion for entrega in entregas_lista)
-            promedio_curso = total_curso / len(entregas_lista)
-            calificaciones_agrupadas[curso] = {
-                'entregas': entregas_lista,
-                'promedio': promedio_curso
-            }
-
-        context['calificaciones_agrupadas'] = calificaciones_agrupadas
-        context['titulo'] = f"Calificaciones de {estudiante.user.first_name}"
-        context['es_padre'] = True
-        context['estudiante'] = estudiante
+        periodo = self.get_periodo_actual()
+        minimo = self.get_minimo()
+        context['periodo'] = periodo
+        context['minimo'] = minimo
+        context['filas'] = historial.cuadro_de_honor(periodo, minimo) if periodo else []
         return context
 
 
@@ -1218,19 +1370,23 @@ class CalificacionesPeriodoView(LoginRequiredMixin, UserPassesTestMixin, Periodo
             context['estudiante'] = estudiante
             return context
 
-        calificaciones_finales = Entrega.objects.filter(
+        # Notas ponderadas precalculadas (ver portal/notas_finales.py)
+        calificaciones_finales = NotaFinal.objects.filter(
             estudiante=estudiante,
-            actividad__clase__periodo=periodo,
-            calificacion__isnull=False
-        ).values(
-            'actividad__clase__curso__nombre'
-        ).annotate(
-            promedio_final=Avg('calificacion')
-        ).order_by('actividad__clase__curso__nombre')
+            periodo=periodo,
+            nota__isnull=False
+        ).values('curso_id', 'curso__nombre', 'nota').order_by('curso__nombre')
+
+        # Ranking precalculado por el comando actualizar_ranking
+        ranking_grado, ranking_cursos = ranking.del_estudiante(estudiante, periodo)
+        reporte_notas = [
+            dict(fila, ranking=ranking_cursos.get(fila['curso_id'])) for fila in calificaciones_finales
+        ]
 
         context['estudiante'] = estudiante
         context['periodo'] = periodo
-        context['reporte_notas'] = calificaciones_finales
+        context['reporte_notas'] = reporte_notas
+        context['ranking_grado'] = ranking_grado
         context['titulo'] = f"Boleta de Calificaciones - {periodo.nombre}"
         return context
 